@@ -4,6 +4,12 @@ import sqlite3
 from datetime import datetime
 import pandas  as pd
 import os 
+import sys
+
+# Schema helpers shared with the API, so the two schemas cannot drift apart
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "working_version"))
+from init_db import ensure_indexes, ensure_change_log, refresh_ticker_stats
+from queries import TICKER_STATS_DDL
 
 # ----------------------------
 # CONFIG
@@ -36,6 +42,13 @@ CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
 )
 """)
 
+# (ticker, date) covering index: every API query filters on ticker and
+# orders by date
+ensure_indexes(conn)
+
+# Per-ticker summary served by /available-tickers and /ticker-info
+cursor.execute(TICKER_STATS_DDL)
+
 # Performance tuning (safe)
 cursor.execute("PRAGMA journal_mode=WAL;")
 cursor.execute("PRAGMA synchronous=NORMAL;")
@@ -82,9 +95,26 @@ for i in list_of_file:
         insert_query,
         df[["Date", "Ticker", "Open", "High", "Low", "Close", "Volume"]].values.tolist()
     )
+    inserted = cursor.rowcount
     
-    conn.commit()
+    # ----------------------------
+    # REFRESH TICKER SUMMARY
+    # ----------------------------
+    refresh_ticker_stats(conn, [df["Ticker"].iloc[0]])
     
+    print(f"🆕 {inserted:,} new bars")
     
     print("✅ Data successfully stored in SQLite", i)
+
+# ----------------------------
+# CHANGE LOG
+# ----------------------------
+# Change log served by /prices/delta: triggers record every inserted or
+# updated bar. Created after the load so a fresh build does not log every
+# bar; bars loaded before the log existed are caught up with a since_date
+# delta. On later runs the triggers already exist and new bars are logged.
+ensure_change_log(conn)
+
+version = cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM price_changes").fetchone()[0]
+print(f"📜 Change version {version}")
 conn.close()
@@ -0,0 +1,388 @@
+"""
+Vectorized analytics core shared by the Flask (app.py) and FastAPI
+(app_v2.py) services
+Every function takes aligned NumPy arrays with time on axis 0 (a 1-D
+series or a dates x tickers matrix, no NaN) and returns arrays, so one
+call covers any number of tickers and the web layers only load data and
+shape JSON
+
+    python analytics.py --rows 6500 --cols 500     # micro-benchmarks
+"""
+
+import argparse
+import time
+from statistics import NormalDist
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+TRADING_DAYS = 252
+
+RETURN_TYPES = ("simple", "log")
+
+
+# ============================================================================
+# RETURNS
+# ============================================================================
+
+def period_returns(closes: np.ndarray, return_type: str = "log") -> np.ndarray:
+    """
+    Day-over-day returns of a close series or matrix
+
+    Args:
+        closes: (T,) or (T, N) closes
+        return_type: 'simple' or 'log'
+
+    Returns:
+        (T-1,) or (T-1, N) returns; row i is the return into close i+1
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    ratio = closes[1:] / closes[:-1]
+    if return_type == "log":
+        return np.log(ratio)
+    if return_type == "simple":
+        return ratio - 1.0
+    raise ValueError(f"return_type must be one of: {', '.join(RETURN_TYPES)}")
+
+
+def return_statistics(returns: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Summary statistics per column
+
+    Skewness and kurtosis are the bias-corrected sample estimators (excess
+    kurtosis), the same as pandas Series.skew/kurtosis; std uses ddof=1.
+
+    Args:
+        returns: (T,) or (T, N) returns
+
+    Returns:
+        mean, std, min, max, median, skewness, kurtosis and var_95
+        (5th percentile), each a scalar array or (N,) array
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    n = returns.shape[0]
+    mean = returns.mean(axis=0)
+    centered = returns - mean
+    sq = centered ** 2
+    m2 = sq.sum(axis=0)
+    m3 = (sq * centered).sum(axis=0)
+    m4 = (sq ** 2).sum(axis=0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if n >= 3:
+            skewness = np.where(
+                m2 > 0, n * (n - 1) ** 0.5 / (n - 2) * (m3 / m2 ** 1.5), 0.0
+            )
+        else:
+            skewness = np.full(np.shape(mean), np.nan)
+        if n >= 4:
+            adjust = 3 * (n - 1) ** 2 / ((n - 2) * (n - 3))
+            kurtosis = np.where(
+                m2 > 0,
+                n * (n + 1) * (n - 1) * m4 / ((n - 2) * (n - 3) * m2 ** 2) - adjust,
+                0.0
+            )
+        else:
+            kurtosis = np.full(np.shape(mean), np.nan)
+
+    return {
+        "mean": mean,
+        "std": returns.std(axis=0, ddof=1),
+        "min": returns.min(axis=0),
+        "max": returns.max(axis=0),
+        "median": np.median(returns, axis=0),
+        "skewness": skewness,
+        "kurtosis": kurtosis,
+        "var_95": np.percentile(returns, 5, axis=0),
+    }
+
+
+# ============================================================================
+# VOLATILITY, CORRELATION, DRAWDOWN
+# ============================================================================
+
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Rolling sample standard deviation (ddof=1) from prefix sums
+
+    O(T) per column regardless of the window.
+
+    Args:
+        values: (T,) or (T, N) series
+        window: Observations per window (>= 2)
+
+    Returns:
+        (T-window+1,) or (T-window+1, N); row i covers values i..i+window-1
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < window:
+        return values[:0]
+
+    # Centre before squaring so the variance difference keeps its precision
+    shifted = values - values.mean(axis=0)
+    prefix = np.zeros((len(values) + 1,) + values.shape[1:])
+    np.cumsum(shifted, axis=0, out=prefix[1:])
+    s1 = prefix[window:] - prefix[:-window]
+    np.square(shifted, out=shifted)
+    np.cumsum(shifted, axis=0, out=prefix[1:])
+    var = prefix[window:] - prefix[:-window]
+
+    # Buffers are reused in place: (s2 - s1^2 / w) / (w - 1), floored at 0
+    np.square(s1, out=s1)
+    s1 /= window
+    var -= s1
+    var /= window - 1
+    np.maximum(var, 0.0, out=var)
+    return np.sqrt(var, out=var)
+
+
+def correlation_covariance(returns: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sample correlation and covariance (ddof=1) of aligned return columns
+
+    Args:
+        returns: (T, N) returns
+
+    Returns:
+        ((N, N) correlation, (N, N) covariance)
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    cov = np.atleast_2d(np.cov(returns, rowvar=False))
+    std = np.sqrt(np.diag(cov))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = np.clip(cov / np.outer(std, std), -1.0, 1.0)
+    np.fill_diagonal(corr, np.where(std > 0, 1.0, np.nan))
+    return corr, cov
+
+
+def drawdowns(closes: np.ndarray) -> np.ndarray:
+    """
+    Drawdown from the running peak at every date
+
+    Args:
+        closes: (T,) or (T, N) closes
+
+    Returns:
+        Same shape; 0 at a new high, negative below it
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    running_max = np.maximum.accumulate(closes, axis=0)
+    return (closes - running_max) / running_max
+
+
+def max_drawdown(closes: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Deepest drawdown, its date and the first close back above the old peak
+
+    Args:
+        closes: (T,) or (T, N) closes
+
+    Returns:
+        max_drawdown (depth), trough (row of the first deepest point),
+        recovery (first later row closing above the peak, -1 if none)
+        and the full drawdown series
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    running_max = np.maximum.accumulate(closes, axis=0)
+    series = (closes - running_max) / running_max
+    trough = series.argmin(axis=0)
+
+    peak = np.take_along_axis(
+        running_max.reshape(len(closes), -1), np.reshape(trough, (1, -1)), axis=0
+    )
+    rows = np.arange(len(closes))[:, None]
+    recovered = (rows > np.reshape(trough, (1, -1))) & (closes.reshape(len(closes), -1) > peak)
+    recovery = np.where(recovered.any(axis=0), recovered.argmax(axis=0), -1)
+
+    return {
+        "max_drawdown": series.min(axis=0),
+        "trough": trough,
+        "recovery": recovery.reshape(np.shape(trough)),
+        "drawdown": series,
+    }
+
+
+# ============================================================================
+# VALUE AT RISK AND PORTFOLIOS
+# ============================================================================
+
+def historical_var(returns: np.ndarray, confidence_levels: Sequence[float]) -> np.ndarray:
+    """
+    Historical VaR: the (1 - confidence) percentile of returns
+
+    Args:
+        returns: (T,) or (T, N) returns
+        confidence_levels: L levels in (0, 1)
+
+    Returns:
+        (L,) or (L, N) return quantiles (losses are negative)
+    """
+    percentiles = [(1 - conf) * 100 for conf in confidence_levels]
+    return np.percentile(np.asarray(returns, dtype=np.float64), percentiles, axis=0)
+
+
+def gaussian_z(confidence_levels: Sequence[float]) -> np.ndarray:
+    """Standard normal quantiles z(1 - confidence) for each level"""
+    return np.array([NormalDist().inv_cdf(1 - conf) for conf in confidence_levels])
+
+
+def gaussian_var(returns: np.ndarray, confidence_levels: Sequence[float]) -> np.ndarray:
+    """
+    Parametric VaR: mean + z(1 - confidence) * std (ddof=1)
+
+    Args:
+        returns: (T,) or (T, N) returns
+        confidence_levels: L levels in (0, 1)
+
+    Returns:
+        (L,) or (L, N) return quantiles (losses are negative)
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    z = gaussian_z(confidence_levels).reshape((-1,) + (1,) * (returns.ndim - 1))
+    return z * returns.std(axis=0, ddof=1) + returns.mean(axis=0)
+
+
+def portfolio_moments(
+    returns: np.ndarray,
+    weights: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """
+    Daily mean and volatility of one or many fixed-weight portfolios
+
+    Args:
+        returns: (T, N) aligned asset returns
+        weights: (N,) weights, or (P, N) for P portfolios at once
+
+    Returns:
+        daily_return and daily_volatility (scalar or (P,)), plus the
+        (N, N) covariance and correlation they were computed from
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    weights = np.asarray(weights, dtype=np.float64)
+    corr, cov = correlation_covariance(returns)
+    batch = np.atleast_2d(weights)
+    mean = batch @ returns.mean(axis=0)
+    variance = np.einsum("pi,ij,pj->p", batch, cov, batch)
+    vol = np.sqrt(np.maximum(variance, 0.0))
+    if weights.ndim == 1:
+        mean, vol = mean[0], vol[0]
+    return {"daily_return": mean, "daily_volatility": vol, "covariance": cov, "correlation": corr}
+
+
+def annualized_sharpe(
+    daily_return: np.ndarray,
+    daily_volatility: np.ndarray,
+    risk_free_rate: float = 0.0
+) -> np.ndarray:
+    """Annualized Sharpe ratio, 0 where volatility is 0"""
+    annual_vol = np.asarray(daily_volatility) * np.sqrt(TRADING_DAYS)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(
+            annual_vol > 0,
+            (np.asarray(daily_return) * TRADING_DAYS - risk_free_rate) / annual_vol,
+            0.0
+        )
+
+
+# ============================================================================
+# MICRO-BENCHMARKS
+# ============================================================================
+
+def _best_of(fn: Callable, repeat: int) -> float:
+    """Fastest of `repeat` runs, in seconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def benchmark(
+    rows: int = 6500,
+    cols: int = 500,
+    window: int = 20,
+    repeat: int = 5,
+    seed: int = 0
+) -> List[Dict]:
+    """
+    Time each kernel against the per-ticker pandas code it replaced
+
+    Runs on a synthetic random-walk close matrix; the pandas side loops
+    over tickers as the endpoints did (pandas is only needed here).
+
+    Args:
+        rows: Dates
+        cols: Tickers
+        window: Rolling volatility window
+        repeat: Runs per measurement (best is reported)
+        seed: RNG seed
+
+    Returns:
+        One {"kernel", "numpy_ms", "pandas_ms", "speedup"} dict per kernel
+    """
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (rows, cols)), axis=0))
+    frame = pd.DataFrame(closes)
+    returns = period_returns(closes, "log")
+    returns_frame = pd.DataFrame(returns)
+    weights = np.full(cols, 1.0 / cols)
+
+    def pandas_returns():
+        for c in frame:
+            r = np.log(frame[c] / frame[c].shift(1)).dropna()
+            r.mean(), r.std(), r.median(), r.skew(), r.kurtosis(), np.percentile(r, 5)
+
+    def pandas_drawdown():
+        for c in frame:
+            s = frame[c]
+            running_max = s.expanding().max()
+            dd = (s - running_max) / running_max
+            idx = dd.idxmin()
+            s[s.index > idx][s > running_max[idx]]
+
+    cases = [
+        ("returns+statistics",
+         lambda: return_statistics(period_returns(closes, "log")), pandas_returns),
+        (f"rolling_std({window})",
+         lambda: rolling_std(returns, window),
+         lambda: [returns_frame[c].rolling(window).std() for c in returns_frame]),
+        ("correlation_covariance",
+         lambda: correlation_covariance(returns),
+         lambda: (returns_frame.corr(), returns_frame.cov())),
+        ("max_drawdown", lambda: max_drawdown(closes), pandas_drawdown),
+        ("historical_var",
+         lambda: historical_var(returns, (0.95, 0.99)),
+         lambda: [np.percentile(returns_frame[c], [5, 1]) for c in returns_frame]),
+        ("portfolio_moments",
+         lambda: portfolio_moments(returns, weights),
+         lambda: weights @ returns_frame.cov() @ weights),
+    ]
+
+    results = []
+    for name, fast, slow in cases:
+        numpy_s = _best_of(fast, repeat)
+        pandas_s = _best_of(slow, repeat)
+        results.append({
+            "kernel": name,
+            "numpy_ms": numpy_s * 1000,
+            "pandas_ms": pandas_s * 1000,
+            "speedup": pandas_s / numpy_s if numpy_s > 0 else float("inf"),
+        })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analytics core micro-benchmarks")
+    parser.add_argument("--rows", type=int, default=6500, help="Dates in the synthetic matrix")
+    parser.add_argument("--cols", type=int, default=500, help="Tickers in the synthetic matrix")
+    parser.add_argument("--window", type=int, default=20, help="Rolling volatility window")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement")
+    args = parser.parse_args()
+
+    print(f"{args.rows} dates x {args.cols} tickers, best of {args.repeat}")
+    print(f"{'kernel':<26}{'numpy ms':>12}{'pandas ms':>12}{'speedup':>10}")
+    for row in benchmark(args.rows, args.cols, args.window, args.repeat):
+        print(f"{row['kernel']:<26}{row['numpy_ms']:>12.2f}{row['pandas_ms']:>12.2f}{row['speedup']:>9.1f}x")
@@ -5,24 +5,30 @@ Designed for quant professionals with meaningful risk metrics
 
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import sqlite3
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from functools import wraps
+from pathlib import Path
 import json
 
+from series_cache import ConnectionPool, TickerSeriesCache
+
+from analytics import (
+    period_returns, return_statistics, rolling_std, correlation_covariance, max_drawdown,
+    historical_var, gaussian_var, portfolio_moments
+)
+
 app = Flask(__name__)
 CORS(app)
 
-DB_PATH = "../market_data.db"
-
+# Resolved from this file, so the service works from any working directory
+DB_PATH = Path(__file__).parent.parent / "market_data.db"
 
-def get_db_connection():
-    """Get SQLite connection"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+# One pool and one series cache per process; under gunicorn_app.py the
+# master warms the cache and workers inherit it copy-on-write
+db_pool = ConnectionPool(DB_PATH)
+series_cache = TickerSeriesCache(db_pool)
 
 
 def handle_errors(f):
@@ -78,28 +84,15 @@ def get_prices():
     if end_date:
         end_date = parse_date_param(end_date).strftime("%Y-%m-%d")
     
-    conn = get_db_connection()
     results = {}
     
     for ticker in tickers:
-        query = "SELECT * FROM stock_prices WHERE ticker = ?"
-        params = [ticker]
-        
-        if start_date:
-            query += " AND date >= ?"
-            params.append(start_date)
-        if end_date:
-            query += " AND date <= ?"
-            params.append(end_date)
-        
-        query += " ORDER BY date DESC LIMIT ?"
-        params.append(limit)
-        
-        df = pd.read_sql(query, conn, params=params)
+        # Most recent `limit` rows of the range, oldest first
+        df = series_cache.series(ticker, start_date, end_date)
+        df = df.iloc[max(len(df) - limit, 0):] if limit > 0 else df.iloc[:0]
         if df.empty:
             results[ticker] = {"data": [], "count": 0}
         else:
-            df = df.sort_values("date").reset_index(drop=True)
             results[ticker] = {
                 "data": df.to_dict(orient="records"),
                 "count": len(df),
@@ -109,7 +102,6 @@ def get_prices():
                 }
             }
     
-    conn.close()
     return jsonify(results), 200
 
 
@@ -146,47 +138,24 @@ def get_returns():
     if end_date:
         end_date = parse_date_param(end_date).strftime("%Y-%m-%d")
     
-    conn = get_db_connection()
     results = {}
     
     for ticker in tickers:
-        query = "SELECT date, close FROM stock_prices WHERE ticker = ?"
-        params = [ticker]
-        
-        if start_date:
-            query += " AND date >= ?"
-            params.append(start_date)
-        if end_date:
-            query += " AND date <= ?"
-            params.append(end_date)
-        
-        query += " ORDER BY date"
-        
-        df = pd.read_sql(query, conn, params=params)
+        df = series_cache.series(ticker, start_date, end_date)
         
         if len(df) < 2:
             results[ticker] = {"error": "Insufficient data", "count": len(df)}
             continue
         
-        if return_type == "log":
-            returns = np.log(df["close"] / df["close"].shift(1)).dropna()
-        else:
-            returns = (df["close"].pct_change()).dropna()
+        returns = period_returns(df["close"].to_numpy(), return_type)
+        statistics = return_statistics(returns)
         
         results[ticker] = {
             "returns": returns.tolist(),
-            "statistics": {
-                "mean": float(returns.mean()),
-                "std": float(returns.std()),
-                "min": float(returns.min()),
-                "max": float(returns.max()),
-                "skewness": float(returns.skew()),
-                "kurtosis": float(returns.kurtosis())
-            },
+            "statistics": {name: float(value) for name, value in statistics.items()},
             "count": len(returns)
         }
     
-    conn.close()
     return jsonify(results), 200
 
 
@@ -219,37 +188,24 @@ def get_volatility():
     if end_date:
         end_date = parse_date_param(end_date).strftime("%Y-%m-%d")
     
-    conn = get_db_connection()
     results = {}
     
     for ticker in tickers:
-        query = "SELECT date, close FROM stock_prices WHERE ticker = ?"
-        params = [ticker]
-        
-        if start_date:
-            query += " AND date >= ?"
-            params.append(start_date)
-        if end_date:
-            query += " AND date <= ?"
-            params.append(end_date)
-        
-        query += " ORDER BY date"
-        
-        df = pd.read_sql(query, conn, params=params)
+        df = series_cache.series(ticker, start_date, end_date)
         
         if len(df) < window + 1:
             results[ticker] = {"error": f"Insufficient data (need {window + 1} days)"}
             continue
         
-        returns = np.log(df["close"] / df["close"].shift(1)).dropna()
-        rolling_vol = returns.rolling(window=window).std()
+        # Full windows only, so values line up with dates[window:]
+        rolling_vol = rolling_std(period_returns(df["close"].to_numpy(), "log"), window)
         
         results[ticker] = {
             "volatility": rolling_vol.tolist(),
             "dates": df["date"].iloc[window:].tolist(),
             "statistics": {
                 "mean_volatility": float(rolling_vol.mean()),
-                "current_volatility": float(rolling_vol.iloc[-1]),
+                "current_volatility": float(rolling_vol[-1]),
                 "min_volatility": float(rolling_vol.min()),
                 "max_volatility": float(rolling_vol.max())
             },
@@ -257,7 +213,6 @@ def get_volatility():
             "count": len(rolling_vol)
         }
     
-    conn.close()
     return jsonify(results), 200
 
 
@@ -298,27 +253,12 @@ def get_correlation():
     if end_date:
         end_date = parse_date_param(end_date).strftime("%Y-%m-%d")
     
-    conn = get_db_connection()
     price_data = {}
     
     for ticker in tickers:
-        query = "SELECT date, close FROM stock_prices WHERE ticker = ?"
-        params = [ticker]
-        
-        if start_date:
-            query += " AND date >= ?"
-            params.append(start_date)
-        if end_date:
-            query += " AND date <= ?"
-            params.append(end_date)
-        
-        query += " ORDER BY date"
-        
-        df = pd.read_sql(query, conn, params=params)
+        df = series_cache.series(ticker, start_date, end_date)
         price_data[ticker] = df.set_index("date")["close"]
     
-    conn.close()
-    
     # Align all series to common dates
     prices_df = pd.DataFrame(price_data)
     prices_df = prices_df.dropna()
@@ -326,19 +266,14 @@ def get_correlation():
     if len(prices_df) < 2:
         return jsonify({"error": "Insufficient overlapping data"}), 400
     
-    if return_type == "log":
-        returns_df = np.log(prices_df / prices_df.shift(1)).dropna()
-    else:
-        returns_df = prices_df.pct_change().dropna()
-    
-    corr_matrix = returns_df.corr()
-    cov_matrix = returns_df.cov()
+    returns = period_returns(prices_df.to_numpy(), return_type)
+    corr, cov = correlation_covariance(returns)
     
     return jsonify({
-        "correlation": corr_matrix.to_dict(),
-        "covariance": cov_matrix.to_dict(),
+        "correlation": pd.DataFrame(corr, index=prices_df.columns, columns=prices_df.columns).to_dict(),
+        "covariance": pd.DataFrame(cov, index=prices_df.columns, columns=prices_df.columns).to_dict(),
         "tickers": tickers,
-        "observations": len(returns_df),
+        "observations": len(returns),
         "date_range": {
             "start": prices_df.index.min(),
             "end": prices_df.index.max()
@@ -373,43 +308,20 @@ def get_drawdown():
     if end_date:
         end_date = parse_date_param(end_date).strftime("%Y-%m-%d")
     
-    conn = get_db_connection()
-    query = "SELECT date, close FROM stock_prices WHERE ticker = ?"
-    params = [ticker]
-    
-    if start_date:
-        query += " AND date >= ?"
-        params.append(start_date)
-    if end_date:
-        query += " AND date <= ?"
-        params.append(end_date)
-    
-    query += " ORDER BY date"
-    
-    df = pd.read_sql(query, conn, params=params)
-    conn.close()
+    df = series_cache.series(ticker, start_date, end_date)
     
     if df.empty:
         return jsonify({"error": f"No data for ticker {ticker}"}), 404
     
-    # Calculate running maximum and drawdown
-    running_max = df["close"].expanding().max()
-    drawdown = (df["close"] - running_max) / running_max
-    
-    max_drawdown = drawdown.min()
-    max_dd_idx = drawdown.idxmin()
-    recovery_idx = df[df.index > max_dd_idx]["close"][df["close"] > running_max[max_dd_idx]]
-    
-    recovery_date = None
-    if not recovery_idx.empty:
-        recovery_date = df.loc[recovery_idx.index[0], "date"]
+    result = max_drawdown(df["close"].to_numpy())
+    recovery = int(result["recovery"])
     
     return jsonify({
         "ticker": ticker,
-        "max_drawdown": float(max_drawdown),
-        "max_drawdown_date": df.loc[max_dd_idx, "date"],
-        "recovery_date": recovery_date,
-        "drawdown_series": drawdown.tolist(),
+        "max_drawdown": float(result["max_drawdown"]),
+        "max_drawdown_date": df["date"].iloc[int(result["trough"])],
+        "recovery_date": df["date"].iloc[recovery] if recovery >= 0 else None,
+        "drawdown_series": result["drawdown"].tolist(),
         "dates": df["date"].tolist(),
         "observation_count": len(df)
     }), 200
@@ -439,11 +351,7 @@ def get_value_at_risk():
     if method not in ["historical", "gaussian"]:
         return jsonify({"error": "method must be 'historical' or 'gaussian'"}), 400
     
-    conn = get_db_connection()
-    query = "SELECT date, close FROM stock_prices WHERE ticker = ? ORDER BY date"
-    
-    df = pd.read_sql(query, conn, params=[ticker])
-    conn.close()
+    df = series_cache.get(ticker)
     
     if df.empty:
         return jsonify({"error": f"No data for ticker {ticker}"}), 404
@@ -451,23 +359,13 @@ def get_value_at_risk():
     if lookback_days:
         df = df.tail(lookback_days)
     
-    returns = np.log(df["close"] / df["close"].shift(1)).dropna()
-    
-    var_results = {}
-    
-    for conf in confidence_levels:
-        if conf <= 0 or conf >= 1:
-            continue
-        
-        if method == "historical":
-            var = np.percentile(returns, (1 - conf) * 100)
-        else:  # gaussian
-            mean = returns.mean()
-            std = returns.std()
-            from scipy import stats
-            var = stats.norm.ppf(1 - conf) * std + mean
-        
-        var_results[f"VaR_{int(conf*100)}"] = float(var)
+    returns = period_returns(df["close"].to_numpy(), "log")
+    confidence_levels = [conf for conf in confidence_levels if 0 < conf < 1]
+    estimate = historical_var if method == "historical" else gaussian_var
+    var_results = {
+        f"VaR_{int(conf*100)}": float(var)
+        for conf, var in zip(confidence_levels, estimate(returns, confidence_levels))
+    }
     
     return jsonify({
         "ticker": ticker,
@@ -475,7 +373,7 @@ def get_value_at_risk():
         "lookback_days": len(returns),
         "var": var_results,
         "expected_return": float(returns.mean()),
-        "volatility": float(returns.std())
+        "volatility": float(returns.std(ddof=1))
     }), 200
 
 
@@ -520,31 +418,15 @@ def get_portfolio_metrics():
     if end_date:
         end_date = parse_date_param(end_date).strftime("%Y-%m-%d")
     
-    conn = get_db_connection()
     price_data = {}
     
     for ticker in holdings.keys():
-        query = "SELECT date, close FROM stock_prices WHERE ticker = ?"
-        params = [ticker.upper()]
-        
-        if start_date:
-            query += " AND date >= ?"
-            params.append(start_date)
-        if end_date:
-            query += " AND date <= ?"
-            params.append(end_date)
-        
-        query += " ORDER BY date"
-        
-        df = pd.read_sql(query, conn, params=params)
+        df = series_cache.series(ticker.upper(), start_date, end_date)
         if df.empty:
-            conn.close()
             return jsonify({"error": f"No data for ticker {ticker}"}), 404
         
         price_data[ticker.upper()] = df.set_index("date")["close"]
     
-    conn.close()
-    
     # Align all series
     prices_df = pd.DataFrame(price_data)
     prices_df = prices_df.dropna()
@@ -553,16 +435,15 @@ def get_portfolio_metrics():
         return jsonify({"error": "Insufficient overlapping data"}), 400
     
     # Calculate returns
-    returns_df = np.log(prices_df / prices_df.shift(1)).dropna()
+    returns = period_returns(prices_df.to_numpy(), "log")
     
     # Portfolio weights
     weights = np.array([holdings[ticker.upper()] for ticker in holdings.keys()])
     
     # Portfolio return and volatility
-    portfolio_return = float((returns_df.mean() * weights).sum())
-    cov_matrix = returns_df.cov()
-    portfolio_variance = float(weights @ cov_matrix @ weights)
-    portfolio_volatility = float(np.sqrt(portfolio_variance))
+    moments = portfolio_moments(returns, weights)
+    portfolio_return = float(moments["daily_return"])
+    portfolio_volatility = float(moments["daily_volatility"])
     
     # Sharpe ratio (assuming 0% risk-free rate)
     sharpe_ratio = float(portfolio_return / portfolio_volatility) if portfolio_volatility > 0 else 0
@@ -574,8 +455,10 @@ def get_portfolio_metrics():
             "volatility": portfolio_volatility,
             "sharpe_ratio": sharpe_ratio
         },
-        "correlation_matrix": returns_df.corr().to_dict(),
-        "observations": len(returns_df),
+        "correlation_matrix": pd.DataFrame(
+            moments["correlation"], index=prices_df.columns, columns=prices_df.columns
+        ).to_dict(),
+        "observations": len(returns),
         "date_range": {
             "start": prices_df.index.min(),
             "end": prices_df.index.max()
@@ -597,10 +480,9 @@ def health():
 @handle_errors
 def available_tickers():
     """Get all tickers in database"""
-    conn = get_db_connection()
     query = "SELECT DISTINCT ticker FROM stock_prices ORDER BY ticker"
-    df = pd.read_sql(query, conn)
-    conn.close()
+    with db_pool.connection() as conn:
+        df = pd.read_sql(query, conn)
     
     return jsonify({
         "tickers": df["ticker"].tolist(),
@@ -613,7 +495,6 @@ def available_tickers():
 def ticker_info(ticker):
     """Get metadata about a ticker"""
     ticker = ticker.upper()
-    conn = get_db_connection()
     
     query = """
     SELECT 
@@ -624,8 +505,8 @@ def ticker_info(ticker):
     FROM stock_prices WHERE ticker = ?
     """
     
-    df = pd.read_sql(query, conn, params=[ticker])
-    conn.close()
+    with db_pool.connection() as conn:
+        df = pd.read_sql(query, conn, params=[ticker])
     
     if df.empty or df["record_count"].iloc[0] == 0:
         return jsonify({"error": f"No data for ticker {ticker}"}), 404
@@ -3,60 +3,119 @@ FastAPI for quantitative finance data and portfolio risk analysis
 Designed for quant professionals with meaningful risk metrics
 """
 
+import time
+STARTUP_STARTED = time.perf_counter()
+
 import os
+import json
+import asyncio
+import hashlib
 import logging
-from contextlib import asynccontextmanager
-from datetime import datetime
-from typing import Optional, Dict, List
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timedelta
+from typing import Optional, Dict, List, Tuple
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 import sqlite3
-from scipy import stats
 
-from fastapi import FastAPI, Query, HTTPException, Body, status
+from fastapi import FastAPI, Query, HTTPException, Body, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field, validator, EmailStr
 
+from queries import (
+    build_price_query, LOAD_TICKER_STATS_QUERY, CHANGE_VERSION_QUERY, CLOSES_BEFORE_QUERY,
+    CHANGED_TICKERS_QUERY, changed_keys_query, rows_after_date_query
+)
+from init_db import ensure_indexes, ensure_change_log, refresh_ticker_stats
+from price_delta import rolling_update
+from analytics import (
+    period_returns, return_statistics, rolling_std, correlation_covariance, max_drawdown,
+    historical_var, gaussian_var, portfolio_moments, annualized_sharpe
+)
+from subscriptions import SubscriptionHub
+from price_matrix import PriceMatrixCache, frame_to_json
+from shared_matrix import SharedMatrixStore
+from sector_analytics import (
+    load_equity_master, aggregate_returns, index_levels, group_statistics
+)
+from benchmark_analytics import (
+    attach_benchmarks, load_aligned_closes, portfolio_returns, relative_metrics
+)
+from factor_model import (
+    FACTOR_GROUPS, build_factor_returns, fit_exposures, rolling_exposures, exposure_table
+)
+from screener import LOOKBACK_DAYS, compute_metrics, run_screen
+from stress_testing import date_windows, rolling_windows, window_metrics, portfolio_log_returns
+from backtest import (
+    REBALANCE_FREQUENCIES, period_starts, target_schedule, simulate, run_backtest,
+    performance_stats
+)
+from scenarios import (
+    HISTORICAL_SCENARIOS, scenario_vector, proxy_missing, factor_shock_vector, apply_scenarios
+)
+
+# Seconds spent in each startup phase, reported by /health and at startup
+STARTUP_TIMINGS: Dict[str, float] = {"imports": time.perf_counter() - STARTUP_STARTED}
+
 # ============================================================================
 # LOGGING SETUP
 # ============================================================================
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/api.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
-# Create logs directory if it doesn't exist
-Path('logs').mkdir(exist_ok=True)
+def setup_logging():
+    """
+    File and console logging, configured from lifespan
+    
+    Kept out of import time so importing the module (tests, scripts,
+    gunicorn preload) creates no files and no handlers.
+    """
+    # Create logs directory if it doesn't exist
+    Path('logs').mkdir(exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('logs/api.log'),
+            logging.StreamHandler()
+        ]
+    )
 
 # ============================================================================
 # DATABASE CONFIGURATION
 # ============================================================================
 DB_PATH = Path(__file__).parent.parent / "market_data.db"
+EQUITY_MASTER_PATH = Path(__file__).parent.parent / "equity_master.db"
+BENCHMARK_DB_PATH = Path(__file__).parent.parent / "benchmark_data.db"
 
 class DatabaseManager:
     """SQLite connection manager with error handling"""
     
     def __init__(self, db_path: Path):
         self.db_path = db_path
-        self._validate_database()
+        self.validated = False
     
     def _validate_database(self):
-        """Validate database exists and is accessible"""
+        """
+        Validate database exists and is accessible
+        
+        Runs from lifespan before traffic, or on the first connection when
+        the module is used without the app; the checks are idempotent.
+        """
         if not self.db_path.exists():
             raise FileNotFoundError(f"Database not found at {self.db_path}")
         
         # Test connection
         try:
-            conn = self.get_connection()
+            conn = self._connect()
+            if ensure_indexes(conn):
+                logger.warning("Created missing (ticker, date) covering index")
+            if ensure_change_log(conn):
+                logger.warning("Created price_changes log - deltas start from now")
             conn.close()
+            self.validated = True
             logger.info(f"Database connection verified: {self.db_path}")
         except Exception as e:
             logger.error(f"Database connection failed: {e}")
@@ -64,18 +123,181 @@ class DatabaseManager:
     
     def get_connection(self):
         """Get SQLite connection with proper configuration"""
+        if not self.validated:
+            self._validate_database()
+        return self._connect()
+    
+    def _connect(self):
         conn = sqlite3.connect(str(self.db_path))
         conn.row_factory = sqlite3.Row
         conn.execute("PRAGMA journal_mode=WAL")  # Better concurrent access
         conn.execute("PRAGMA foreign_keys=ON")
         return conn
+    
+    def get_benchmark_connection(self):
+        """Connection with benchmark_data.db attached as `bench` for SQL joins"""
+        if not BENCHMARK_DB_PATH.exists():
+            raise FileNotFoundError(f"Benchmark database not found at {BENCHMARK_DB_PATH}")
+        conn = self.get_connection()
+        attach_benchmarks(conn, BENCHMARK_DB_PATH)
+        return conn
+    
+    def data_version(self) -> tuple:
+        """
+        Cheap change marker for the database
+        
+        Ingest commits touch the WAL (or the main file once checkpointed),
+        so (mtime, size) of both changes whenever new data lands.
+        """
+        version = []
+        for path in (self.db_path, Path(f"{self.db_path}-wal")):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                version.append(None)
+                continue
+            # Readers create an empty WAL and the last close deletes it;
+            # neither is a data change
+            version.append((st.st_mtime_ns, st.st_size) if st.st_size else None)
+        return tuple(version)
 
 db_manager = DatabaseManager(DB_PATH)
 
+# ============================================================================
+# TICKER SUMMARY CACHE
+# ============================================================================
+
+class TickerStatsCache:
+    """In-memory copy of the ticker_stats summary table"""
+    
+    def __init__(self, db_manager: DatabaseManager):
+        self.db_manager = db_manager
+        self.stats: Dict[str, Dict] = {}
+        self.tickers: List[str] = []
+        self.version = None
+    
+    def load(self):
+        """Load ticker_stats, building it first if ingest never populated it"""
+        version = self.db_manager.data_version()
+        conn = self.db_manager.get_connection()
+        try:
+            has_rows = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'ticker_stats'"
+            ).fetchone() and conn.execute(
+                "SELECT 1 FROM ticker_stats LIMIT 1"
+            ).fetchone()
+            
+            if not has_rows:
+                logger.warning("ticker_stats missing or empty - rebuilding from stock_prices")
+                refresh_ticker_stats(conn)
+            
+            rows = conn.execute(LOAD_TICKER_STATS_QUERY).fetchall()
+        finally:
+            conn.close()
+        
+        if not has_rows:
+            # Our own rebuild (and its checkpoint on close) changed the file
+            version = self.db_manager.data_version()
+        
+        self.stats = {row["ticker"]: dict(row) for row in rows}
+        self.tickers = list(self.stats)
+        self.version = version
+        logger.info(f"Loaded ticker_stats for {len(self.tickers)} tickers")
+    
+    def refresh_if_stale(self):
+        """Reload when the database has changed since the last load"""
+        if self.db_manager.data_version() != self.version:
+            self.load()
+    
+    def get(self, ticker: str) -> Optional[Dict]:
+        """O(1) lookup of one ticker's summary row"""
+        self.refresh_if_stale()
+        return self.stats.get(ticker)
+    
+    def all_tickers(self) -> List[str]:
+        """Sorted list of every ticker with data"""
+        self.refresh_if_stale()
+        return self.tickers
+    
+    def latest_date(self) -> Optional[str]:
+        """Most recent date with data for any ticker"""
+        self.refresh_if_stale()
+        return max((s["latest_date"] for s in self.stats.values()), default=None)
+    
+    def version_of(self, ticker: str) -> Optional[str]:
+        """
+        Change marker for one ticker's history
+        
+        Ingest is append-only (INSERT OR IGNORE) and refreshes the
+        ticker's summary row, so the row changes exactly when new bars land.
+        """
+        row = self.get(ticker)
+        if row is None:
+            return None
+        key = "|".join(str(row[k]) for k in ("record_count", "earliest_date", "latest_date", "last_close"))
+        return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+ticker_stats_cache = TickerStatsCache(db_manager)
+
+# Directory of memory-mapped universe matrices shared by every worker
+# process (e.g. /dev/shm/quant_api, see gunicorn_app_v2.py); unset keeps
+# per-process matrices
+SHARED_MATRIX_DIR = os.environ.get("QUANT_SHARED_MATRIX_DIR")
+
+# Date x ticker matrices for universe-wide analytics, cached per date range
+price_cache = PriceMatrixCache(
+    db_manager,
+    shared=SharedMatrixStore(Path(SHARED_MATRIX_DIR)) if SHARED_MATRIX_DIR else None
+)
+
+def publish_shared_matrices():
+    """
+    Load the universe matrices into shared memory ahead of the workers
+    
+    Called from the gunicorn master (on_starting) so workers attach to an
+    existing version and start warm. No-op without QUANT_SHARED_MATRIX_DIR.
+    """
+    if price_cache.shared is None:
+        logger.warning("QUANT_SHARED_MATRIX_DIR not set - nothing to publish")
+        return
+    matrices = price_cache.shared_matrices()
+    logger.info(f"Shared matrices ready: {matrices['close'].shape} in {price_cache.shared.root}")
+
+_equity_master: Optional[pd.DataFrame] = None
+
+def get_equity_master() -> pd.DataFrame:
+    """Ticker metadata (sector, industry, market cap), loaded once"""
+    global _equity_master
+    if _equity_master is None:
+        _equity_master = load_equity_master(EQUITY_MASTER_PATH)
+        logger.info(f"Loaded equity master for {len(_equity_master)} tickers")
+    return _equity_master
+
 # ============================================================================
 # PYDANTIC MODELS (Request/Response Validation)
 # ============================================================================
 
+def check_holdings(v: Dict[str, float]) -> Dict[str, float]:
+    """Validate a ticker -> weight mapping (non-empty, non-negative, sums to 1)"""
+    if not v:
+        raise ValueError("holdings cannot be empty")
+    
+    # Validate each ticker
+    for ticker, weight in v.items():
+        if not isinstance(ticker, str) or not ticker.strip():
+            raise ValueError(f"Invalid ticker: {ticker}")
+        if not isinstance(weight, (int, float)):
+            raise ValueError(f"Weight for {ticker} must be numeric")
+        if weight < 0:
+            raise ValueError(f"Weight for {ticker} cannot be negative")
+    
+    # Validate sum
+    weight_sum = sum(v.values())
+    if not (0.99 <= weight_sum <= 1.01):
+        raise ValueError(f"Weights must sum to 1.0, got {weight_sum:.4f}")
+    
+    return v
+
 class PortfolioRequest(BaseModel):
     """Portfolio metrics request model"""
     holdings: Dict[str, float] = Field(
@@ -99,26 +321,239 @@ class PortfolioRequest(BaseModel):
         description="Annual risk-free rate for Sharpe ratio"
     )
     
+    benchmark: Optional[str] = Field(
+        None,
+        pattern=r"^[A-Za-z0-9_]+$",
+        description="Optional benchmark series (benchmark_data) for relative metrics"
+    )
+    benchmark_window: int = Field(
+        60,
+        ge=2,
+        le=500,
+        description="Rolling window in days for benchmark-relative series"
+    )
+    
+    @validator("holdings")
+    def validate_weights(cls, v):
+        """Validate holdings dictionary"""
+        return check_holdings(v)
+
+class BenchmarkRequest(BaseModel):
+    """Benchmark-relative analytics request model"""
+    benchmark: str = Field(
+        ...,
+        pattern=r"^[A-Za-z0-9_]+$",
+        description="Benchmark series in benchmark_data (e.g. SP500, OVX_Oil)"
+    )
+    tickers: Optional[List[str]] = Field(
+        None,
+        description="Tickers to evaluate; omit (with no portfolios) for the whole universe"
+    )
+    portfolios: Dict[str, Dict[str, float]] = Field(
+        default_factory=dict,
+        description="Portfolio name -> {ticker: weight}"
+    )
+    start_date: Optional[str] = Field(None, pattern=r"^\d{4}-\d{2}-\d{2}$")
+    end_date: Optional[str] = Field(None, pattern=r"^\d{4}-\d{2}-\d{2}$")
+    risk_free_rate: float = Field(0.02, ge=0, le=0.1, description="Annual risk-free rate for alpha")
+    window: int = Field(60, ge=2, le=500, description="Rolling window in days")
+    include_rolling: bool = Field(
+        False,
+        description="Return rolling beta/alpha/tracking error/information ratio series"
+    )
+    
+    @validator("portfolios")
+    def validate_portfolios(cls, v):
+        """Validate every portfolio's holdings"""
+        for name, holdings in v.items():
+            try:
+                check_holdings(holdings)
+            except ValueError as e:
+                raise ValueError(f"Portfolio {name}: {e}")
+        return v
+
+class StressWindow(BaseModel):
+    """Named date window for stress testing"""
+    name: Optional[str] = Field(None, max_length=100)
+    start_date: str = Field(..., pattern=r"^\d{4}-\d{2}-\d{2}$")
+    end_date: str = Field(..., pattern=r"^\d{4}-\d{2}-\d{2}$")
+
+class StressTestRequest(BaseModel):
+    """Window-by-window stress test request model"""
+    holdings: Dict[str, float] = Field(
+        ...,
+        description="Ticker -> weight mapping (must sum to 1.0)"
+    )
+    windows: List[StressWindow] = Field(
+        default_factory=list,
+        max_items=5000,
+        description="Explicit regime windows"
+    )
+    rolling_window: Optional[int] = Field(
+        None,
+        ge=2,
+        le=2520,
+        description="Also evaluate every trailing window of this many days"
+    )
+    step: int = Field(21, ge=1, le=2520, description="Days between rolling windows")
+    start_date: Optional[str] = Field(None, pattern=r"^\d{4}-\d{2}-\d{2}$")
+    end_date: Optional[str] = Field(None, pattern=r"^\d{4}-\d{2}-\d{2}$")
+    risk_free_rate: float = Field(0.02, ge=0, le=0.1, description="Annual risk-free rate for Sharpe ratio")
+    confidence: float = Field(0.95, gt=0.5, lt=1, description="VaR confidence level")
+    
     @validator("holdings")
     def validate_weights(cls, v):
         """Validate holdings dictionary"""
+        return check_holdings(v)
+
+class FactorShock(BaseModel):
+    """Hypothetical factor shock (factor -> shocked return)"""
+    name: str = Field(..., max_length=100)
+    shocks: Dict[str, float] = Field(
+        ...,
+        description="Factor -> return, e.g. {\"market\": -0.2, \"sector_Energy\": -0.1}"
+    )
+
+class ScenarioRequest(BaseModel):
+    """Scenario replay request model"""
+    portfolios: Dict[str, Dict[str, float]] = Field(
+        ...,
+        description="Portfolio name -> {ticker: weight}"
+    )
+    scenarios: Optional[List[str]] = Field(
+        None,
+        description="Built-in historical scenarios (see GET /portfolio-scenarios); omit for all"
+    )
+    custom_windows: List[StressWindow] = Field(
+        default_factory=list,
+        description="Additional historical windows to replay"
+    )
+    factor_shocks: List[FactorShock] = Field(
+        default_factory=list,
+        description="Hypothetical shocks propagated through factor betas"
+    )
+    beta_start_date: Optional[str] = Field(
+        None,
+        pattern=r"^\d{4}-\d{2}-\d{2}$",
+        description="Start of the beta estimation window (default: 3 years before beta_end_date)"
+    )
+    beta_end_date: Optional[str] = Field(None, pattern=r"^\d{4}-\d{2}-\d{2}$")
+    proxy_missing: bool = Field(
+        True,
+        description="Fill tickers without history in a scenario with their sector's return"
+    )
+    include_contributions: bool = Field(False, description="Return per-holding contributions")
+    
+    @validator("portfolios")
+    def validate_portfolios(cls, v):
+        """Validate every portfolio's holdings"""
         if not v:
-            raise ValueError("holdings cannot be empty")
-        
-        # Validate each ticker
-        for ticker, weight in v.items():
-            if not isinstance(ticker, str) or not ticker.strip():
-                raise ValueError(f"Invalid ticker: {ticker}")
-            if not isinstance(weight, (int, float)):
-                raise ValueError(f"Weight for {ticker} must be numeric")
-            if weight < 0:
-                raise ValueError(f"Weight for {ticker} cannot be negative")
-        
-        # Validate sum
-        weight_sum = sum(v.values())
-        if not (0.99 <= weight_sum <= 1.01):
-            raise ValueError(f"Weights must sum to 1.0, got {weight_sum:.4f}")
-        
+            raise ValueError("At least one portfolio required")
+        for name, holdings in v.items():
+            try:
+                check_holdings(holdings)
+            except ValueError as e:
+                raise ValueError(f"Portfolio {name}: {e}")
+        return v
+    
+    @validator("factor_shocks", always=True)
+    def validate_scenario_names(cls, v, values):
+        """Scenario names key the results, so they must be unique across sources"""
+        windows = values.get("custom_windows") or []
+        names = [w.name or f"{w.start_date}:{w.end_date}" for w in windows] + [s.name for s in v]
+        seen, duplicates = set(HISTORICAL_SCENARIOS), []
+        for name in names:
+            if name in seen and name not in duplicates:
+                duplicates.append(name)
+            seen.add(name)
+        if duplicates:
+            raise ValueError(
+                f"Duplicate scenario name(s): {', '.join(duplicates)} "
+                "(custom windows and factor shocks need names distinct from each other "
+                "and from the built-in scenarios)"
+            )
+        return v
+
+class ScheduleEntry(BaseModel):
+    """Target weights effective from a date"""
+    date: str = Field(..., pattern=r"^\d{4}-\d{2}-\d{2}$")
+    weights: Dict[str, float]
+    
+    @validator("weights")
+    def validate_weights(cls, v):
+        """Validate holdings dictionary"""
+        return check_holdings(v)
+
+class BacktestStrategy(BaseModel):
+    """One rebalancing strategy: fixed target weights or a dated schedule"""
+    name: str = Field(..., max_length=100)
+    weights: Optional[Dict[str, float]] = Field(
+        None,
+        description="Fixed target weights (must sum to 1.0)"
+    )
+    schedule: Optional[List[ScheduleEntry]] = Field(
+        None,
+        description="Dated target weights; each entry applies until the next"
+    )
+    rebalance: str = Field(
+        "monthly",
+        pattern=r"^(" + "|".join(REBALANCE_FREQUENCIES) + r")$",
+        description="Rebalance frequency back to target"
+    )
+    
+    @validator("weights")
+    def validate_weights(cls, v):
+        """Validate holdings dictionary"""
+        return None if v is None else check_holdings(v)
+
+class BacktestRequest(BaseModel):
+    """Batch backtest request model"""
+    strategies: List[BacktestStrategy] = Field(..., min_items=1, max_items=500)
+    start_date: Optional[str] = Field(None, pattern=r"^\d{4}-\d{2}-\d{2}$")
+    end_date: Optional[str] = Field(None, pattern=r"^\d{4}-\d{2}-\d{2}$")
+    cost_bps: float = Field(10.0, ge=0, le=500, description="One-way transaction cost in basis points")
+    risk_free_rate: float = Field(0.02, ge=0, le=0.1, description="Annual risk-free rate for Sharpe ratio")
+    curve: str = Field("monthly", pattern=r"^(daily|monthly|none)$", description="Equity curve sampling")
+    stream: bool = Field(False, description="Stream NDJSON progress events before the result")
+
+class SubscriptionRequest(BaseModel):
+    """Push subscription request model"""
+    tickers: List[str] = Field(default_factory=list, max_items=500)
+    portfolios: Dict[str, Dict[str, float]] = Field(
+        default_factory=dict,
+        description="Portfolio name -> {ticker: weight}"
+    )
+    window: int = Field(20, ge=2, le=500, description="Rolling volatility window in days")
+    confidence_levels: List[float] = Field([0.95, 0.99], min_items=1, max_items=5)
+    lookback_days: int = Field(252, ge=2, le=10000, description="Trading days of history per update")
+    risk_free_rate: float = Field(0.02, ge=0, le=0.1, description="Annual risk-free rate for Sharpe ratio")
+    
+    @validator("tickers")
+    def validate_ticker_list(cls, v):
+        """Normalize ticker symbols"""
+        return list(dict.fromkeys(validate_ticker(t) for t in v))
+    
+    @validator("portfolios")
+    def validate_portfolios(cls, v):
+        """Validate every portfolio's holdings"""
+        if len(v) > 100:
+            raise ValueError("At most 100 portfolios per subscription")
+        for name, holdings in v.items():
+            try:
+                check_holdings(holdings)
+            except ValueError as e:
+                raise ValueError(f"Portfolio {name}: {e}")
+        return {
+            name: {validate_ticker(t): w for t, w in holdings.items()}
+            for name, holdings in v.items()
+        }
+    
+    @validator("confidence_levels")
+    def validate_confidence(cls, v):
+        """Confidence levels must lie in (0, 1)"""
+        for conf in v:
+            if not (0 < conf < 1):
+                raise ValueError(f"Confidence level must be between 0 and 1, got {conf}")
         return v
 
 class PriceResponse(BaseModel):
@@ -186,6 +621,7 @@ class TickerInfoResponse(BaseModel):
     earliest_date: str
     latest_date: str
     avg_volume: float
+    last_close: Optional[float] = None
 
 class HealthResponse(BaseModel):
     """Health check response"""
@@ -193,6 +629,7 @@ class HealthResponse(BaseModel):
     timestamp: str
     database: str
     version: str = "1.0.0"
+    startup: Dict[str, float] = {}
 
 # ============================================================================
 # UTILITY FUNCTIONS
@@ -309,12 +746,77 @@ def execute_query(
 # APPLICATION LIFESPAN
 # ============================================================================
 
+# Cache warm-up at startup: "off", "background" (serve at once, warm in a
+# worker thread) or "blocking" (warm before taking traffic)
+PREWARM = os.environ.get("QUANT_PREWARM", "off")
+
+@contextmanager
+def startup_phase(name: str):
+    """Record the duration of a startup step in STARTUP_TIMINGS"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STARTUP_TIMINGS[name] = time.perf_counter() - started
+
+def prewarm():
+    """
+    Load what the first universe-wide requests would otherwise pay for
+    
+    Steps are independent; one failing (e.g. no equity master) is logged
+    and the rest still run.
+    """
+    steps = [
+        ("prewarm_scipy", lambda: __import__("scipy.stats")),
+        ("prewarm_equity_master", get_equity_master),
+        ("prewarm_returns", lambda: price_cache.returns(None, None, "simple")),
+        ("prewarm_screen", lambda: compute_screen_metrics(ticker_stats_cache.latest_date())),
+    ]
+    for name, step in steps:
+        try:
+            with startup_phase(name):
+                step()
+        except Exception as e:
+            logger.warning(f"Prewarm step {name} failed: {e}")
+    logger.info("Prewarm complete: " + ", ".join(
+        f"{name}={STARTUP_TIMINGS[name]:.3f}s" for name, _ in steps
+    ))
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application startup and shutdown"""
+    setup_logging()
     logger.info("🚀 Quant Finance API starting up...")
     logger.info(f"Database: {DB_PATH}")
+    with startup_phase("database_validation"):
+        db_manager._validate_database()
+    with startup_phase("ticker_stats"):
+        ticker_stats_cache.load()
+    if price_cache.shared is not None:
+        # Attach (or publish, if the master did not) before taking traffic
+        with startup_phase("shared_matrices"):
+            await asyncio.to_thread(price_cache.shared_matrices)
+    with startup_phase("change_version"):
+        push_hub.version = current_change_version()
+    
+    prewarm_task = None
+    if PREWARM == "blocking":
+        await asyncio.to_thread(prewarm)
+    elif PREWARM == "background":
+        prewarm_task = asyncio.create_task(asyncio.to_thread(prewarm))
+    elif PREWARM != "off":
+        logger.warning(f"Unknown QUANT_PREWARM '{PREWARM}' - not prewarming")
+    
+    STARTUP_TIMINGS["ready"] = time.perf_counter() - STARTUP_STARTED
+    logger.info("Startup breakdown: " + ", ".join(
+        f"{name}={seconds:.3f}s" for name, seconds in STARTUP_TIMINGS.items()
+    ))
+    
+    watcher = asyncio.create_task(watch_for_updates())
     yield
+    watcher.cancel()
+    if prewarm_task is not None:
+        prewarm_task.cancel()
     logger.info("🛑 Quant Finance API shutting down...")
 
 # ============================================================================
@@ -338,8 +840,73 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Data-Version"],
 )
 
+# ============================================================================
+# DATA VERSIONS / CONDITIONAL GET
+# ============================================================================
+
+# GET endpoints whose response depends only on the requested tickers' history
+PER_TICKER_PATHS = {"/prices", "/returns", "/volatility", "/correlation", "/drawdown", "/var"}
+
+UNVERSIONED_PATHS = {"/", "/health", "/docs", "/redoc", "/openapi.json"}
+
+UNVERSIONED_PREFIXES = ("/subscriptions",)
+
+def data_version_tag(tickers: Optional[List[str]] = None) -> str:
+    """
+    Version token of the data behind a response
+    
+    Scoped to the given tickers' summary rows when provided, so an ingest
+    only invalidates the tickers it touched; otherwise covers the whole
+    price database plus the equity master and benchmark files.
+    """
+    if tickers:
+        parts = [f"{t}={ticker_stats_cache.version_of(t)}" for t in tickers]
+    else:
+        parts = [repr(db_manager.data_version())]
+        for path in (EQUITY_MASTER_PATH, BENCHMARK_DB_PATH):
+            try:
+                parts.append(str(path.stat().st_mtime_ns))
+            except FileNotFoundError:
+                parts.append("-")
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()[:16]
+
+def request_tickers(request: Request) -> Optional[List[str]]:
+    """Tickers a per-ticker GET reads, or None for universe-wide endpoints"""
+    if request.url.path not in PER_TICKER_PATHS:
+        return None
+    raw = request.query_params.get("ticker") or request.query_params.get("tickers")
+    try:
+        return validate_tickers(raw)
+    except ValueError:
+        return None
+
+@app.middleware("http")
+async def conditional_get(request: Request, call_next):
+    """
+    Attach ETag / X-Data-Version to GET responses and answer
+    If-None-Match with 304 before running the handler
+    """
+    if request.method != "GET" or request.url.path in UNVERSIONED_PATHS \
+            or request.url.path.startswith(UNVERSIONED_PREFIXES):
+        return await call_next(request)
+    
+    version = data_version_tag(request_tickers(request))
+    url_key = f"{request.url.path}?{request.url.query}"
+    etag = f'W/"{version}-{hashlib.sha1(url_key.encode()).hexdigest()[:12]}"'
+    headers = {"ETag": etag, "X-Data-Version": version}
+    
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    response = await call_next(request)
+    if response.status_code == 200:
+        response.headers.update(headers)
+    return response
+
 
 # ============================================================================
 # HEALTH & METADATA ENDPOINTS
@@ -356,7 +923,7 @@ async def health():
     Health check endpoint
     
     Returns:
-        Status, timestamp, and database connection status
+        Status, timestamp, database connection status and startup timings (seconds)
     """
     try:
         conn = db_manager.get_connection()
@@ -371,7 +938,8 @@ async def health():
     return HealthResponse(
         status="healthy",
         timestamp=datetime.utcnow().isoformat(),
-        database=db_status
+        database=db_status,
+        startup={name: round(seconds, 4) for name, seconds in STARTUP_TIMINGS.items()}
     )
 
 @app.get(
@@ -387,12 +955,11 @@ async def available_tickers():
         List of tickers and count
     """
     try:
-        query = "SELECT DISTINCT ticker FROM stock_prices ORDER BY ticker"
-        df = execute_query(query)
+        tickers = ticker_stats_cache.all_tickers()
         
         return {
-            "tickers": df["ticker"].tolist() if not df.empty else [],
-            "count": len(df)
+            "tickers": tickers,
+            "count": len(tickers)
         }
     except Exception as e:
         logger.error(f"Error getting tickers: {e}")
@@ -415,22 +982,12 @@ async def ticker_info(ticker: str ):
         ticker: Stock ticker symbol
         
     Returns:
-        Record count, date range, and average volume
+        Record count, date range, average volume and last close
     """
     try:
         tk = validate_ticker(ticker)
         
-        query = """
-        SELECT 
-            COUNT(*) as record_count,
-            MIN(date) as earliest_date,
-            MAX(date) as latest_date,
-            AVG(volume) as avg_volume
-        FROM stock_prices 
-        WHERE ticker = ?
-        """
-        
-        result = execute_query(query, [tk], fetch_one=True)
+        result = ticker_stats_cache.get(tk)
         
         if not result or result["record_count"] == 0:
             raise HTTPException(
@@ -443,9 +1000,12 @@ async def ticker_info(ticker: str ):
             record_count=int(result["record_count"]),
             earliest_date=result["earliest_date"],
             latest_date=result["latest_date"],
-            avg_volume=float(result["avg_volume"] or 0)
+            avg_volume=float(result["avg_volume"] or 0),
+            last_close=result["last_close"]
         )
     
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -458,6 +1018,63 @@ async def ticker_info(ticker: str ):
             detail="Failed to retrieve ticker information"
         )
 
+@app.get(
+    "/data-version",
+    tags=["Metadata"],
+    summary="Data version markers for client-side caching"
+)
+async def data_version(
+    tickers: Optional[str] = Query(None, description="Comma-separated tickers to report per-ticker versions for")
+):
+    """
+    Current data version, overall and per ticker
+    
+    Clients holding cached history compare these markers (or send the
+    ETag back as If-None-Match for a 304) before refetching anything.
+    
+    Args:
+        tickers: Optional comma-separated tickers
+        
+    Returns:
+        Overall version, change-log version (for /prices/delta) and latest
+        date, plus version, record count and date range per requested
+        ticker (null for unknown tickers)
+    """
+    try:
+        requested = validate_tickers(tickers) if tickers else []
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    try:
+        per_ticker = {}
+        for tk in requested:
+            row = ticker_stats_cache.get(tk)
+            per_ticker[tk] = None if row is None else {
+                "version": ticker_stats_cache.version_of(tk),
+                "record_count": int(row["record_count"]),
+                "earliest_date": row["earliest_date"],
+                "latest_date": row["latest_date"],
+            }
+        
+        change_version = execute_query(CHANGE_VERSION_QUERY, fetch_one=True)["version"]
+        
+        return {
+            "version": data_version_tag(),
+            "change_version": int(change_version),
+            "latest_date": ticker_stats_cache.latest_date(),
+            "tickers": per_ticker
+        }
+    
+    except Exception as e:
+        logger.error(f"Error in data_version: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to read data version"
+        )
+
 # ============================================================================
 # BASIC DATA ENDPOINTS
 # ============================================================================
@@ -507,19 +1124,10 @@ async def get_prices(
         results = {}
         
         for tk in tickers:
-            query = "SELECT * FROM stock_prices WHERE ticker = ?"
-            params = [tk]
-            
-            if start_date:
-                query += " AND date >= ?"
-                params.append(start_date)
-            if end_date:
-                query += " AND date <= ?"
-                params.append(end_date)
-            
-            query += " ORDER BY date DESC LIMIT ?"
-            params.append(limit)
-            
+            query, params = build_price_query(
+                tk, start_date, end_date,
+                columns="*", latest_first=True, limit=limit
+            )
             df = execute_query(query, params)
             
             if df.empty:
@@ -548,6 +1156,145 @@ async def get_prices(
 # RETURNS & VOLATILITY ENDPOINTS
 # ============================================================================
 
+@app.get(
+    "/prices/delta",
+    tags=["Market Data"],
+    summary="Bars added or changed since a data version or date"
+)
+async def get_price_delta(
+    ticker: Optional[str] = Query(None, description="Comma-separated tickers (default: all)"),
+    since_version: Optional[int] = Query(
+        None, ge=0, description="change_version from a previous delta or /data-version"
+    ),
+    since_date: Optional[str] = Query(
+        None,
+        pattern=r"^\d{4}-\d{2}-\d{2}$",
+        description="Return bars dated after this date (no change version yet)"
+    ),
+    window: int = Query(20, ge=2, le=500, description="Rolling volatility window in days"),
+    max_rows: int = Query(50000, ge=1, le=500000, description="Max bars per response")
+):
+    """
+    Only the bars a poller has not seen, plus the rolling values they move
+    
+    With since_version the price_changes log supplies every bar inserted
+    or updated after that version, so corrections are picked up too;
+    since_date returns bars dated after the date. Results are paged by
+    version: when `complete` is false, call again with the returned
+    `version`. Rolling statistics are recomputed from `window` warm-up
+    closes plus the changed tail, not the full history.
+    
+    Args:
+        ticker: Optional comma-separated tickers
+        since_version: Last change_version the client has applied
+        since_date: Last bar date the client has (alternative to since_version)
+        window: Rolling window for the updated volatility
+        max_rows: Page size in bars
+        
+    Returns:
+        version to send next time, bars per ticker (with change type) and
+        updated log returns / rolling volatility per ticker
+    """
+    try:
+        tickers = validate_tickers(ticker) if ticker else None
+        since_date = parse_date(since_date)
+        if (since_version is None) == (since_date is None):
+            raise ValueError("Provide exactly one of since_version or since_date")
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    try:
+        n_tickers = len(tickers) if tickers else None
+        # Read the version first: anything committed meanwhile is returned
+        # now and again next time, never skipped
+        version = int(execute_query(CHANGE_VERSION_QUERY, fetch_one=True)["version"])
+        complete = True
+        
+        if since_version is not None:
+            if since_version > version:
+                raise ValueError(
+                    f"since_version {since_version} is ahead of the current version {version}"
+                )
+            # One row past the page says whether there is more
+            keys = execute_query(
+                changed_keys_query(n_tickers),
+                (tickers or []) + [since_version, version, max_rows + 1]
+            )
+            if len(keys) > max_rows:
+                keys = keys.iloc[:max_rows]
+                version = int(keys["seq"].iloc[-1])
+                complete = False
+            # First change per bar wins: inserted-then-corrected is still new
+            keys = keys.drop_duplicates(["ticker", "date"])
+            
+            frames = []
+            for tk, group in keys.groupby("ticker"):
+                query, params = build_price_query(
+                    tk, group["date"].min(), group["date"].max(), columns="*"
+                )
+                bars = execute_query(query, params)
+                frames.append(bars.merge(group[["date", "change"]], on="date"))
+            rows = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        else:
+            rows = execute_query(
+                rows_after_date_query(n_tickers), [since_date] + (tickers or []) + [max_rows + 1]
+            )
+            if len(rows) > max_rows:
+                raise ValueError(
+                    f"More than {max_rows} bars after {since_date}; "
+                    "use a later since_date or /prices for the backfill"
+                )
+        
+        results = {}
+        if not rows.empty:
+            rows = rows.sort_values(["ticker", "date"]).reset_index(drop=True)
+            
+            for tk, bars in rows.groupby("ticker"):
+                first = bars["date"].iloc[0]
+                warmup = execute_query(CLOSES_BEFORE_QUERY, [tk, first, window]).iloc[::-1]
+                query, params = build_price_query(tk, first)
+                tail = execute_query(query, params)
+                closes = pd.concat([warmup, tail], ignore_index=True)
+                
+                results[tk] = {
+                    "rows": bars.to_dict(orient="records"),
+                    "count": len(bars),
+                    "rolling": {
+                        "window": window,
+                        **rolling_update(
+                            closes["date"].tolist(),
+                            closes["close"].to_numpy(),
+                            closes["date"].isin(bars["date"]).to_numpy(),
+                            window
+                        )
+                    }
+                }
+        
+        return {
+            "version": version,
+            "complete": complete,
+            "since": {"version": since_version} if since_version is not None else {"date": since_date},
+            "count": len(rows),
+            "tickers": results
+        }
+    
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Error in get_price_delta: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to compute price delta"
+        )
+
 @app.get(
     "/returns",
     tags=["Analytics"],
@@ -585,18 +1332,7 @@ async def get_returns(
         results = {}
         
         for tk in tickers:
-            query = "SELECT date, close FROM stock_prices WHERE ticker = ?"
-            params = [tk]
-            
-            if start_date:
-                query += " AND date >= ?"
-                params.append(start_date)
-            if end_date:
-                query += " AND date <= ?"
-                params.append(end_date)
-            
-            query += " ORDER BY date"
-            
+            query, params = build_price_query(tk, start_date, end_date)
             df = execute_query(query, params)
             
             if len(df) < 2:
@@ -606,24 +1342,12 @@ async def get_returns(
                 }
                 continue
             
-            # Calculate returns
-            if return_type == "log":
-                returns = np.log(df["close"] / df["close"].shift(1)).dropna()
-            else:
-                returns = df["close"].pct_change().dropna()
+            returns = period_returns(df["close"].to_numpy(), return_type)
+            statistics = return_statistics(returns)
             
             results[tk] = {
                 "returns": returns.tolist(),
-                "statistics": {
-                    "mean": float(returns.mean()),
-                    "std": float(returns.std()),
-                    "min": float(returns.min()),
-                    "max": float(returns.max()),
-                    "median": float(returns.median()),
-                    "skewness": float(returns.skew()),
-                    "kurtosis": float(returns.kurtosis()),
-                    "var_95": float(np.percentile(returns, 5))  # Value at Risk
-                },
+                "statistics": {name: float(value) for name, value in statistics.items()},
                 "count": len(returns),
                 "type": return_type
             }
@@ -674,18 +1398,7 @@ async def get_volatility(
         results = {}
         
         for tk in tickers:
-            query = "SELECT date, close FROM stock_prices WHERE ticker = ?"
-            params = [tk]
-            
-            if start_date:
-                query += " AND date >= ?"
-                params.append(start_date)
-            if end_date:
-                query += " AND date <= ?"
-                params.append(end_date)
-            
-            query += " ORDER BY date"
-            
+            query, params = build_price_query(tk, start_date, end_date)
             df = execute_query(query, params)
             
             if len(df) < window + 1:
@@ -694,18 +1407,18 @@ async def get_volatility(
                 }
                 continue
             
-            returns = np.log(df["close"] / df["close"].shift(1)).dropna()
-            rolling_vol = returns.rolling(window=window).std()
+            # Full windows only, so values line up with dates[window:]
+            rolling_vol = rolling_std(period_returns(df["close"].to_numpy(), "log"), window)
             
             results[tk] = {
                 "volatility": rolling_vol.tolist(),
                 "dates": df["date"].iloc[window:].tolist(),
                 "statistics": {
                     "mean_volatility": float(rolling_vol.mean()),
-                    "current_volatility": float(rolling_vol.iloc[-1]),
+                    "current_volatility": float(rolling_vol[-1]),
                     "min_volatility": float(rolling_vol.min()),
                     "max_volatility": float(rolling_vol.max()),
-                    "median_volatility": float(rolling_vol.median())
+                    "median_volatility": float(np.median(rolling_vol))
                 },
                 "window_days": window,
                 "count": len(rolling_vol)
@@ -761,18 +1474,7 @@ async def get_correlation(
         price_data = {}
         
         for tk in ticker_list:
-            query = "SELECT date, close FROM stock_prices WHERE ticker = ?"
-            params = [tk]
-            
-            if start_date:
-                query += " AND date >= ?"
-                params.append(start_date)
-            if end_date:
-                query += " AND date <= ?"
-                params.append(end_date)
-            
-            query += " ORDER BY date"
-            
+            query, params = build_price_query(tk, start_date, end_date)
             df = execute_query(query, params)
             price_data[tk] = df.set_index("date")["close"]
         
@@ -784,19 +1486,14 @@ async def get_correlation(
                 detail="Insufficient overlapping data for correlation"
             )
         
-        if return_type == "log":
-            returns_df = np.log(prices_df / prices_df.shift(1)).dropna()
-        else:
-            returns_df = prices_df.pct_change().dropna()
-        
-        corr_matrix = returns_df.corr()
-        cov_matrix = returns_df.cov()
+        returns = period_returns(prices_df.to_numpy(), return_type)
+        corr, cov = correlation_covariance(returns)
         
         return {
-            "correlation": corr_matrix.to_dict(),
-            "covariance": cov_matrix.to_dict(),
+            "correlation": pd.DataFrame(corr, index=prices_df.columns, columns=prices_df.columns).to_dict(),
+            "covariance": pd.DataFrame(cov, index=prices_df.columns, columns=prices_df.columns).to_dict(),
             "tickers": ticker_list,
-            "observations": len(returns_df),
+            "observations": len(returns),
             "date_range": {
                 "start": prices_df.index.min(),
                 "end": prices_df.index.max()
@@ -847,18 +1544,7 @@ async def get_drawdown(
         )
     
     try:
-        query = "SELECT date, close FROM stock_prices WHERE ticker = ?"
-        params = [tk]
-        
-        if start_date:
-            query += " AND date >= ?"
-            params.append(start_date)
-        if end_date:
-            query += " AND date <= ?"
-            params.append(end_date)
-        
-        query += " ORDER BY date"
-        
+        query, params = build_price_query(tk, start_date, end_date)
         df = execute_query(query, params)
         
         if df.empty:
@@ -867,30 +1553,17 @@ async def get_drawdown(
                 detail=f"No data found for ticker {tk}"
             )
         
-        # Calculate drawdown
-        running_max = df["close"].expanding().max()
-        drawdown = (df["close"] - running_max) / running_max
-        
-        max_drawdown = float(drawdown.min())
-        max_dd_idx = drawdown.idxmin()
-        max_dd_date = df.loc[max_dd_idx, "date"]
-        
-        # Find recovery date
-        recovery_date = None
-        recovery_idx = df[df.index > max_dd_idx]["close"][
-            df["close"] > running_max[max_dd_idx]
-        ]
-        
-        if not recovery_idx.empty:
-            recovery_date = df.loc[recovery_idx.index[0], "date"]
+        result = max_drawdown(df["close"].to_numpy())
+        depth = float(result["max_drawdown"])
+        recovery = int(result["recovery"])
         
         return {
             "ticker": tk,
-            "max_drawdown": max_drawdown,
-            "max_drawdown_percent": max_drawdown * 100,
-            "max_drawdown_date": max_dd_date,
-            "recovery_date": recovery_date,
-            "drawdown_series": drawdown.tolist(),
+            "max_drawdown": depth,
+            "max_drawdown_percent": depth * 100,
+            "max_drawdown_date": df["date"].iloc[int(result["trough"])],
+            "recovery_date": df["date"].iloc[recovery] if recovery >= 0 else None,
+            "drawdown_series": result["drawdown"].tolist(),
             "dates": df["date"].tolist(),
             "observation_count": len(df)
         }
@@ -947,9 +1620,8 @@ async def get_value_at_risk(
         )
     
     try:
-        query = "SELECT date, close FROM stock_prices WHERE ticker = ? ORDER BY date"
-        
-        df = execute_query(query, [tk])
+        query, params = build_price_query(tk)
+        df = execute_query(query, params)
         
         if df.empty:
             raise HTTPException(
@@ -960,19 +1632,12 @@ async def get_value_at_risk(
         if lookback_days:
             df = df.tail(lookback_days)
         
-        returns = np.log(df["close"] / df["close"].shift(1)).dropna()
-        
-        var_results = {}
-        
-        for conf in conf_levels:
-            if method == "historical":
-                var = np.percentile(returns, (1 - conf) * 100)
-            else:  # gaussian
-                mean = returns.mean()
-                std = returns.std()
-                var = stats.norm.ppf(1 - conf) * std + mean
-            
-            var_results[f"VaR_{int(conf*100)}"] = float(var)
+        returns = period_returns(df["close"].to_numpy(), "log")
+        estimate = historical_var if method == "historical" else gaussian_var
+        var_results = {
+            f"VaR_{int(conf*100)}": float(var)
+            for conf, var in zip(conf_levels, estimate(returns, conf_levels))
+        }
         
         return {
             "ticker": tk,
@@ -980,7 +1645,7 @@ async def get_value_at_risk(
             "lookback_days": len(returns),
             "var": var_results,
             "expected_return": float(returns.mean()),
-            "volatility": float(returns.std()),
+            "volatility": float(returns.std(ddof=1)),
             "confidence_levels": conf_levels
         }
     
@@ -1033,18 +1698,7 @@ async def get_portfolio_metrics(
         
         # Fetch price data for all tickers
         for ticker in holdings.keys():
-            query = "SELECT date, close FROM stock_prices WHERE ticker = ?"
-            params = [ticker]
-            
-            if start_date:
-                query += " AND date >= ?"
-                params.append(start_date)
-            if end_date:
-                query += " AND date <= ?"
-                params.append(end_date)
-            
-            query += " ORDER BY date"
-            
+            query, params = build_price_query(ticker, start_date, end_date)
             df = execute_query(query, params)
             if df.empty:
                 raise HTTPException(
@@ -1063,29 +1717,22 @@ async def get_portfolio_metrics(
                 detail="Insufficient overlapping data for portfolio analysis"
             )
         
-        # Calculate returns
-        returns_df = np.log(prices_df / prices_df.shift(1)).dropna()
-        
-        # Portfolio weights
-        weights = np.array([holdings[ticker] for ticker in holdings.keys()])
+        returns = period_returns(prices_df.to_numpy(), "log")
+        weights = np.array([holdings[ticker] for ticker in prices_df.columns])
+        moments = portfolio_moments(returns, weights)
         
-        # Portfolio metrics
-        portfolio_return = float((returns_df.mean() * weights).sum())
-        cov_matrix = returns_df.cov()
-        portfolio_variance = float(weights @ cov_matrix @ weights)
-        portfolio_volatility = float(np.sqrt(portfolio_variance))
-        
-        # Sharpe ratio
+        portfolio_return = float(moments["daily_return"])
+        portfolio_volatility = float(moments["daily_volatility"])
         annual_return = portfolio_return * 252  # Annualize
         annual_volatility = portfolio_volatility * np.sqrt(252)
-        annual_risk_free = portfolio.risk_free_rate
-        
-        sharpe_ratio = (
-            (annual_return - annual_risk_free) / annual_volatility
-            if annual_volatility > 0 else 0
+        sharpe_ratio = annualized_sharpe(
+            portfolio_return, portfolio_volatility, portfolio.risk_free_rate
         )
         
-        return {
+        def labelled(matrix):
+            return pd.DataFrame(matrix, index=prices_df.columns, columns=prices_df.columns).to_dict()
+        
+        result = {
             "holdings": holdings,
             "performance": {
                 "daily_return": portfolio_return,
@@ -1095,15 +1742,41 @@ async def get_portfolio_metrics(
                 "sharpe_ratio": float(sharpe_ratio),
                 "risk_free_rate": portfolio.risk_free_rate
             },
-            "correlation_matrix": returns_df.corr().to_dict(),
-            "covariance_matrix": cov_matrix.to_dict(),
-            "observations": len(returns_df),
+            "correlation_matrix": labelled(moments["correlation"]),
+            "covariance_matrix": labelled(moments["covariance"]),
+            "observations": len(returns),
             "date_range": {
                 "start": str(prices_df.index.min()),
                 "end": str(prices_df.index.max())
             }
         }
+        
+        if portfolio.benchmark:
+            report = compute_benchmark_report(
+                benchmark=portfolio.benchmark,
+                tickers=[],
+                portfolios={"portfolio": holdings},
+                start_date=start_date,
+                end_date=end_date,
+                risk_free_rate=portfolio.risk_free_rate,
+                window=portfolio.benchmark_window,
+                include_rolling=True
+            )
+            result["benchmark"] = {
+                "name": portfolio.benchmark,
+                "metrics": report["portfolios"]["portfolio"],
+                "observations": report["observations"],
+                "window_days": portfolio.benchmark_window,
+                "rolling": {
+                    "dates": report["rolling"]["dates"],
+                    **{k: v["portfolio"] for k, v in report["rolling"].items() if k != "dates"}
+                }
+            }
+        
+        return result
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in get_portfolio_metrics: {e}")
         raise HTTPException(
@@ -1111,6 +1784,1499 @@ async def get_portfolio_metrics(
             detail="Failed to calculate portfolio metrics"
         )
 
+@app.post(
+    "/stress-test",
+    tags=["Portfolio Analysis"],
+    summary="Portfolio metrics for many date windows at once"
+)
+async def stress_test(request: StressTestRequest):
+    """
+    Evaluate a portfolio over explicit regime windows and/or rolling windows
+    
+    Every window is computed from one aligned return series: mean,
+    volatility and Sharpe from prefix sums, drawdown and VaR from one
+    padded window matrix. Per-window numbers match /portfolio-metrics
+    for the same dates.
+    
+    Args:
+        request: Holdings, windows, optional rolling window/step
+        
+    Returns:
+        Per-window return, volatility, Sharpe, max drawdown and VaR, plus
+        the worst windows by return, drawdown and volatility
+    """
+    try:
+        holdings = {validate_ticker(t): w for t, w in request.holdings.items()}
+        if not request.windows and not request.rolling_window:
+            raise ValueError("Provide windows and/or rolling_window")
+        for w in request.windows:
+            if w.start_date > w.end_date:
+                raise ValueError(f"Window {w.name or w.start_date}: start_date after end_date")
+        
+        # One load covering every requested window
+        bounds = [(w.start_date, w.end_date) for w in request.windows]
+        span_start = parse_date(request.start_date)
+        span_end = parse_date(request.end_date)
+        if bounds and not request.rolling_window:
+            span_start = min(b[0] for b in bounds)
+            span_end = max(b[1] for b in bounds)
+        elif bounds:
+            span_start = min([b[0] for b in bounds] + [span_start]) if span_start else None
+            span_end = max([b[1] for b in bounds] + [span_end]) if span_end else None
+    
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    try:
+        price_data = {}
+        for ticker in holdings:
+            query, params = build_price_query(ticker, span_start, span_end)
+            df = execute_query(query, params)
+            if df.empty:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"No data found for ticker {ticker}"
+                )
+            price_data[ticker] = df.set_index("date")["close"]
+        
+        dates, returns = portfolio_log_returns(pd.DataFrame(price_data), holdings)
+        if len(returns) < 2:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Insufficient overlapping data for stress testing"
+            )
+        
+        names = []
+        starts, ends = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        
+        if request.windows:
+            starts, ends = date_windows(dates, bounds)
+            names = [w.name or f"{w.start_date}:{w.end_date}" for w in request.windows]
+        
+        if request.rolling_window:
+            lo = np.searchsorted(dates, request.start_date) if request.start_date else 0
+            hi = (
+                np.searchsorted(dates, request.end_date, side="right") - 1
+                if request.end_date else len(dates) - 1
+            )
+            r_starts, r_ends = rolling_windows(max(hi - lo, 0), request.rolling_window, request.step)
+            starts = np.concatenate([starts, r_starts + lo])
+            ends = np.concatenate([ends, r_ends + lo])
+            names += [f"rolling_{dates[e]}" for e in r_ends + lo]
+        
+        if len(starts) == 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Not enough data for a {request.rolling_window}-day rolling window"
+            )
+        
+        metrics = window_metrics(
+            returns, starts, ends, request.risk_free_rate, request.confidence
+        )
+        
+        windows = []
+        for i, name in enumerate(names):
+            row = {
+                "name": name,
+                "start": dates[starts[i]],
+                "end": dates[ends[i]],
+            }
+            for key, values in metrics.items():
+                row[key] = int(values[i]) if key == "observations" else _float_or_none(values[i])
+            windows.append(row)
+        
+        def worst(key, largest=False):
+            values = metrics[key]
+            if not np.isfinite(values).any():
+                return None
+            i = int(np.nanargmax(values) if largest else np.nanargmin(values))
+            return {"name": names[i], key: float(values[i])}
+        
+        return JSONResponse(content={
+            "holdings": holdings,
+            "confidence": request.confidence,
+            "risk_free_rate": request.risk_free_rate,
+            "window_count": len(windows),
+            "windows": windows,
+            "worst": {
+                "total_return": worst("total_return"),
+                "max_drawdown": worst("max_drawdown"),
+                "annualized_volatility": worst("annualized_volatility", largest=True),
+                "var_historical": worst("var_historical")
+            },
+            "date_range": {"start": dates[0], "end": dates[-1]}
+        })
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in stress_test: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to run stress test"
+        )
+
+# ============================================================================
+# BENCHMARK-RELATIVE ENDPOINTS
+# ============================================================================
+
+def _float_or_none(value) -> Optional[float]:
+    """JSON-safe float (NaN/inf -> None)"""
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+def compute_benchmark_report(
+    benchmark: str,
+    tickers: Optional[List[str]],
+    portfolios: Dict[str, Dict[str, float]],
+    start_date: Optional[str],
+    end_date: Optional[str],
+    risk_free_rate: float,
+    window: int,
+    include_rolling: bool
+) -> Dict:
+    """
+    Benchmark-relative metrics for tickers and portfolios in one pass
+    
+    Asset closes are joined to the benchmark in SQL (benchmark_data.db
+    attached to the same connection); every ticker and portfolio becomes a
+    column of one return matrix solved by relative_metrics.
+    
+    Args:
+        benchmark: Benchmark series name
+        tickers: Tickers to report; None (with no portfolios) means the whole universe
+        portfolios: Portfolio name -> {ticker: weight}
+        start_date: Optional start date
+        end_date: Optional end date
+        risk_free_rate: Annual risk-free rate for alpha
+        window: Rolling window in days
+        include_rolling: Include rolling series
+        
+    Returns:
+        Dict with per-ticker and per-portfolio metrics (and rolling series)
+        
+    Raises:
+        HTTPException: 404 if the benchmark or a holding has no overlapping data
+    """
+    universe = tickers is None and not portfolios
+    report_tickers = list(tickers or [])
+    needed = sorted(set(report_tickers).union(*[set(h) for h in portfolios.values()]))
+    
+    conn = db_manager.get_benchmark_connection()
+    try:
+        closes, bench_close = load_aligned_closes(
+            conn, benchmark, None if universe else needed, start_date, end_date
+        )
+    finally:
+        conn.close()
+    
+    if closes.empty:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No data overlapping benchmark {benchmark}"
+        )
+    
+    if universe:
+        report_tickers = list(closes.columns)
+    else:
+        missing = [t for t in needed if t not in closes.columns]
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"No data overlapping benchmark {benchmark} for: {', '.join(missing)}"
+            )
+    
+    asset_returns = (closes / closes.shift(1) - 1).iloc[1:]
+    bench_returns = (bench_close / bench_close.shift(1) - 1).iloc[1:]
+    
+    columns = asset_returns[report_tickers]
+    if portfolios:
+        columns = pd.concat([columns, portfolio_returns(asset_returns, portfolios)], axis=1)
+    
+    metrics = relative_metrics(
+        columns.to_numpy(),
+        bench_returns.to_numpy(),
+        risk_free_rate=risk_free_rate,
+        window=window if include_rolling else None
+    )
+    
+    names = list(report_tickers) + list(portfolios)
+    summary = {
+        name: {
+            key: _float_or_none(metrics[key][i])
+            for key in ("beta", "alpha", "tracking_error", "information_ratio",
+                        "up_capture", "down_capture")
+        } | {"observations": int(metrics["observations"][i])}
+        for i, name in enumerate(names)
+    }
+    
+    report = {
+        "benchmark": benchmark,
+        "tickers": {t: summary[t] for t in report_tickers},
+        "portfolios": {p: summary[p] for p in portfolios},
+        "observations": len(bench_returns),
+        "date_range": {
+            "start": str(closes.index.min()),
+            "end": str(closes.index.max())
+        },
+        "risk_free_rate": risk_free_rate
+    }
+    
+    if include_rolling:
+        rolling = {"dates": bench_returns.index.tolist()}
+        for key in ("rolling_beta", "rolling_alpha", "rolling_tracking_error",
+                    "rolling_information_ratio"):
+            if key in metrics:
+                frame = pd.DataFrame(metrics[key], index=bench_returns.index, columns=names)
+                rolling[key.replace("rolling_", "")] = frame_to_json(frame)
+        report["rolling"] = rolling
+        report["window_days"] = window
+    
+    return report
+
+@app.get(
+    "/benchmarks",
+    tags=["Benchmark Analytics"],
+    summary="List benchmark series"
+)
+async def list_benchmarks():
+    """
+    List the series available in benchmark_data.db
+    
+    Returns:
+        Benchmark names with record counts and date ranges
+    """
+    try:
+        conn = db_manager.get_benchmark_connection()
+        try:
+            rows = conn.execute("""
+                SELECT ticker, COUNT(*) AS record_count,
+                       MIN(date) AS earliest_date, MAX(date) AS latest_date
+                FROM bench.benchmark_data
+                GROUP BY ticker
+                ORDER BY ticker
+            """).fetchall()
+        finally:
+            conn.close()
+        
+        return {
+            "benchmarks": [dict(row) for row in rows],
+            "count": len(rows)
+        }
+    except FileNotFoundError as e:
+        logger.error(f"Error listing benchmarks: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Benchmark data not available"
+        )
+    except Exception as e:
+        logger.error(f"Error listing benchmarks: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to list benchmarks"
+        )
+
+@app.post(
+    "/benchmark-metrics",
+    tags=["Benchmark Analytics"],
+    summary="Benchmark-relative metrics for tickers and portfolios"
+)
+async def get_benchmark_metrics(request: BenchmarkRequest):
+    """
+    Beta, alpha, tracking error, information ratio and up/down capture
+    
+    Args:
+        request: Benchmark, tickers and/or portfolios, date range and window
+        
+    Returns:
+        Per-ticker and per-portfolio metrics, optional rolling series
+    """
+    try:
+        start_date = parse_date(request.start_date)
+        end_date = parse_date(request.end_date)
+        tickers = (
+            None if request.tickers is None
+            else [validate_ticker(t) for t in request.tickers]
+        )
+        portfolios = {
+            name: {validate_ticker(t): w for t, w in holdings.items()}
+            for name, holdings in request.portfolios.items()
+        }
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    try:
+        report = compute_benchmark_report(
+            benchmark=request.benchmark,
+            tickers=tickers,
+            portfolios=portfolios,
+            start_date=start_date,
+            end_date=end_date,
+            risk_free_rate=request.risk_free_rate,
+            window=request.window,
+            include_rolling=request.include_rolling
+        )
+        return JSONResponse(content=report)
+    
+    except HTTPException:
+        raise
+    except FileNotFoundError as e:
+        logger.error(f"Error in get_benchmark_metrics: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Benchmark data not available"
+        )
+    except Exception as e:
+        logger.error(f"Error in get_benchmark_metrics: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to calculate benchmark metrics"
+        )
+
+# ============================================================================
+# SECTOR & INDUSTRY ENDPOINTS
+# ============================================================================
+
+def compute_group_returns(
+    start_date: Optional[str],
+    end_date: Optional[str],
+    level: str,
+    weighting: str
+):
+    """
+    Group return matrix for a date range, cached with the price matrix
+    
+    Args:
+        start_date: Optional start date
+        end_date: Optional end date
+        level: 'sector', 'industry' or 'market' (whole universe)
+        weighting: 'equal' or 'market_cap'
+        
+    Returns:
+        (date x group returns, date x group constituent counts)
+    """
+    def compute():
+        master = get_equity_master()
+        returns_df = price_cache.returns(start_date, end_date, "simple")
+        labels = None if level == "market" else master[level]
+        weights = master["market_cap"] if weighting == "market_cap" else None
+        return aggregate_returns(returns_df, labels, weights)
+    
+    return price_cache.memo(
+        ("group_returns", start_date, end_date, level, weighting), compute
+    )
+
+def parse_date_range(start_date: Optional[str], end_date: Optional[str]):
+    """Validate an optional date range, raising HTTP 400 on bad input"""
+    try:
+        return parse_date(start_date), parse_date(end_date)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+@app.get(
+    "/sectors/returns",
+    tags=["Sector Analytics"],
+    summary="Sector or industry return series"
+)
+async def get_sector_returns(
+    start_date: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    end_date: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    level: str = Query("sector", enum=["sector", "industry"]),
+    weighting: str = Query("equal", enum=["equal", "market_cap"]),
+    include_series: bool = Query(True, description="Return daily series, not just statistics")
+):
+    """
+    Aggregate constituent returns by sector or industry (equity_master)
+    
+    Args:
+        start_date: Optional start date
+        end_date: Optional end date
+        level: Grouping level
+        weighting: 'equal' or 'market_cap' (current market cap) weights
+        include_series: Include daily return series per group
+        
+    Returns:
+        Per-group statistics, constituent counts and optional daily series
+    """
+    start_date, end_date = parse_date_range(start_date, end_date)
+    
+    try:
+        group_returns, counts = compute_group_returns(start_date, end_date, level, weighting)
+        
+        if group_returns.empty:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No price data in the requested range"
+            )
+        
+        stats_df = group_statistics(group_returns)
+        groups = {
+            name: {
+                "constituents": int(counts[name].iloc[-1]),
+                # Short ranges leave std/Sharpe undefined (NaN -> null)
+                "statistics": {k: _float_or_none(v) for k, v in row.items()}
+            }
+            for name, row in stats_df.iterrows()
+        }
+        
+        result = {
+            "level": level,
+            "weighting": weighting,
+            "groups": groups,
+            "observations": len(group_returns),
+            "date_range": {
+                "start": group_returns.index.min(),
+                "end": group_returns.index.max()
+            }
+        }
+        if include_series:
+            result["dates"] = group_returns.index.tolist()
+            result["returns"] = frame_to_json(group_returns)
+        
+        # Series payloads are already JSON-native; skip FastAPI's per-value encoder
+        return JSONResponse(content=result)
+    
+    except HTTPException:
+        raise
+    except FileNotFoundError as e:
+        logger.error(f"Error in get_sector_returns: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Equity master data not available"
+        )
+    except Exception as e:
+        logger.error(f"Error in get_sector_returns: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to calculate sector returns"
+        )
+
+@app.get(
+    "/sectors/index",
+    tags=["Sector Analytics"],
+    summary="Market-cap-weighted index series"
+)
+async def get_sector_index(
+    start_date: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    end_date: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    level: str = Query("sector", enum=["market", "sector", "industry"]),
+    weighting: str = Query("market_cap", enum=["equal", "market_cap"]),
+    base: float = Query(100.0, gt=0, description="Index level on the first date")
+):
+    """
+    Compound group returns into index level series
+    
+    Args:
+        start_date: Optional start date
+        end_date: Optional end date
+        level: 'market' for one universe index, or per sector/industry
+        weighting: 'market_cap' (default) or 'equal'
+        base: Starting index level
+        
+    Returns:
+        Dates and index levels per group
+    """
+    start_date, end_date = parse_date_range(start_date, end_date)
+    
+    try:
+        group_returns, _ = compute_group_returns(start_date, end_date, level, weighting)
+        
+        if group_returns.empty:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No price data in the requested range"
+            )
+        
+        levels = index_levels(group_returns, base)
+        
+        return JSONResponse(content={
+            "level": level,
+            "weighting": weighting,
+            "base": base,
+            "dates": levels.index.tolist(),
+            "index": frame_to_json(levels),
+            "final_level": {k: float(v) for k, v in levels.iloc[-1].items()}
+        })
+    
+    except HTTPException:
+        raise
+    except FileNotFoundError as e:
+        logger.error(f"Error in get_sector_index: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Equity master data not available"
+        )
+    except Exception as e:
+        logger.error(f"Error in get_sector_index: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to calculate index series"
+        )
+
+@app.get(
+    "/sectors/risk",
+    tags=["Sector Analytics"],
+    summary="Sector correlation and volatility"
+)
+async def get_sector_risk(
+    start_date: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    end_date: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    level: str = Query("sector", enum=["sector", "industry"]),
+    weighting: str = Query("equal", enum=["equal", "market_cap"]),
+    window: int = Query(20, ge=2, le=500, description="Rolling volatility window in days")
+):
+    """
+    Correlation, covariance and volatility between sector return series
+    
+    Args:
+        start_date: Optional start date
+        end_date: Optional end date
+        level: Grouping level
+        weighting: Constituent weighting
+        window: Rolling window for current volatility
+        
+    Returns:
+        Correlation/covariance matrices and per-group volatility statistics
+    """
+    start_date, end_date = parse_date_range(start_date, end_date)
+    
+    try:
+        group_returns, _ = compute_group_returns(start_date, end_date, level, weighting)
+        
+        if len(group_returns) < window + 1:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Insufficient data (need {window + 1} days, got {len(group_returns)})"
+            )
+        
+        rolling_vol = group_returns.rolling(window=window).std()
+        daily_vol = group_returns.std()
+        
+        # Groups with sparse history (e.g. an industry with one listed
+        # constituent early on) have undefined vol/correlation: NaN -> null
+        volatility = {
+            name: {
+                "daily_volatility": _float_or_none(daily_vol[name]),
+                "annualized_volatility": _float_or_none(daily_vol[name] * np.sqrt(252)),
+                "current_volatility": _float_or_none(rolling_vol[name].iloc[-1]),
+                "max_volatility": _float_or_none(rolling_vol[name].max())
+            }
+            for name in group_returns.columns
+        }
+        
+        def matrix_to_json(matrix: pd.DataFrame) -> Dict[str, Dict[str, Optional[float]]]:
+            rows = list(map(str, matrix.index))
+            return {col: dict(zip(rows, values)) for col, values in frame_to_json(matrix).items()}
+        
+        return JSONResponse(content={
+            "level": level,
+            "weighting": weighting,
+            "correlation": matrix_to_json(group_returns.corr()),
+            "covariance": matrix_to_json(group_returns.cov()),
+            "volatility": volatility,
+            "window_days": window,
+            "observations": len(group_returns),
+            "date_range": {
+                "start": group_returns.index.min(),
+                "end": group_returns.index.max()
+            }
+        })
+    
+    except HTTPException:
+        raise
+    except FileNotFoundError as e:
+        logger.error(f"Error in get_sector_risk: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Equity master data not available"
+        )
+    except Exception as e:
+        logger.error(f"Error in get_sector_risk: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to calculate sector risk"
+        )
+
+# ============================================================================
+# FACTOR EXPOSURE ENDPOINTS
+# ============================================================================
+
+def compute_factor_fit(
+    start_date: Optional[str],
+    end_date: Optional[str],
+    factor_groups: tuple,
+    min_observations: int
+) -> Dict:
+    """
+    Factor returns and full-sample exposures for the whole universe,
+    cached per date window until the next ingest
+    """
+    def compute():
+        master = get_equity_master()
+        returns_df = price_cache.returns(start_date, end_date, "simple")
+        factor_returns = build_factor_returns(returns_df, master, factor_groups)
+        fit = fit_exposures(returns_df, factor_returns, min_observations)
+        return {
+            "factor_returns": factor_returns,
+            "asset_returns": returns_df,
+            "fit": fit,
+            "tickers": list(returns_df.columns),
+        }
+    
+    return price_cache.memo(
+        ("factor_fit", start_date, end_date, factor_groups, min_observations), compute
+    )
+
+@app.get(
+    "/factor-exposures",
+    tags=["Factor Analytics"],
+    summary="Market, size and sector factor exposures"
+)
+async def get_factor_exposures(
+    tickers: Optional[str] = Query(None, description="Comma-separated tickers (default: whole universe)"),
+    start_date: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    end_date: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    factors: str = Query("market,size,sector", description="Comma-separated factor groups: market, size, sector"),
+    min_observations: int = Query(60, ge=10, le=10000),
+    rolling_window: Optional[int] = Query(None, ge=20, le=1000, description="Rolling OLS window in days"),
+    step: int = Query(21, ge=1, le=252, description="Days between rolling window ends")
+):
+    """
+    Batched OLS of every ticker on shared factor returns
+    
+    Args:
+        tickers: Optional ticker subset to report (the fit always covers the universe)
+        start_date: Optional start date
+        end_date: Optional end date
+        factors: Factor groups to include
+        min_observations: Minimum overlapping days for a ticker to be fitted
+        rolling_window: Optional rolling window for time-varying betas
+        step: Stride between rolling windows
+        
+    Returns:
+        Per-ticker alpha, betas, t-stats, R² and residual volatility,
+        factor statistics, and optional rolling betas
+    """
+    try:
+        start_date, end_date = parse_date_range(start_date, end_date)
+        ticker_list = validate_tickers(tickers) if tickers else None
+        factor_groups = tuple(
+            g for g in FACTOR_GROUPS
+            if g in {f.strip().lower() for f in factors.split(",")}
+        )
+        if not factor_groups:
+            raise ValueError(f"factors must include at least one of {', '.join(FACTOR_GROUPS)}")
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    try:
+        model = compute_factor_fit(start_date, end_date, factor_groups, min_observations)
+        factor_returns = model["factor_returns"]
+        factor_names = list(factor_returns.columns)
+        
+        if len(factor_returns) < min_observations:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Insufficient data (need {min_observations} days, got {len(factor_returns)})"
+            )
+        
+        all_tickers = model["tickers"]
+        report = ticker_list or all_tickers
+        unknown = [t for t in report if t not in all_tickers]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"No data found for ticker(s): {', '.join(unknown)}"
+            )
+        
+        idx = [all_tickers.index(t) for t in report]
+        fit = {key: value[..., idx] for key, value in model["fit"].items()}
+        
+        result = {
+            "factors": factor_names,
+            "exposures": exposure_table(fit, report, factor_names),
+            "factor_statistics": {
+                f: {
+                    "annualized_return": float(factor_returns[f].mean() * 252),
+                    "annualized_volatility": float(factor_returns[f].std() * np.sqrt(252))
+                }
+                for f in factor_names
+            },
+            "observations": len(factor_returns),
+            "date_range": {
+                "start": str(factor_returns.index.min()),
+                "end": str(factor_returns.index.max())
+            }
+        }
+        
+        if rolling_window:
+            def compute_rolling():
+                return rolling_exposures(
+                    model["asset_returns"], factor_returns, rolling_window, step
+                )
+            rolling = price_cache.memo(
+                ("factor_rolling", start_date, end_date, factor_groups, rolling_window, step),
+                compute_rolling
+            )
+            betas = rolling["betas"][:, 1:, :][..., idx]
+            result["rolling"] = {
+                "window_days": rolling_window,
+                "step": step,
+                "dates": [str(d) for d in rolling["dates"]],
+                "betas": {
+                    t: frame_to_json(pd.DataFrame(betas[:, :, j], columns=factor_names))
+                    for j, t in enumerate(report)
+                }
+            }
+        
+        return JSONResponse(content=result)
+    
+    except HTTPException:
+        raise
+    except FileNotFoundError as e:
+        logger.error(f"Error in get_factor_exposures: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Equity master data not available"
+        )
+    except Exception as e:
+        logger.error(f"Error in get_factor_exposures: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to calculate factor exposures"
+        )
+
+# ============================================================================
+# BACKTEST ENDPOINTS
+# ============================================================================
+
+# Up to this many tickers are loaded with per-ticker index seeks; wider
+# batches use the cached universe price matrix
+BACKTEST_SEEK_LIMIT = 50
+
+def backtest_payload(
+    request: BacktestRequest,
+    dates: List[str],
+    boundaries: np.ndarray,
+    rebalance: np.ndarray,
+    result: Dict
+) -> Dict:
+    """JSON-ready backtest result: stats, turnover and sampled equity curves"""
+    names = [strategy.name for strategy in request.strategies]
+    stats_by_key = performance_stats(
+        result["equity"], result["turnover"], result["costs"], rebalance,
+        request.risk_free_rate
+    )
+    
+    payload = {
+        "strategies": {
+            name: {
+                key: (int(values[j]) if key == "rebalances" else _float_or_none(values[j]))
+                for key, values in stats_by_key.items()
+            }
+            for j, name in enumerate(names)
+        },
+        "cost_bps": request.cost_bps,
+        "observations": len(dates),
+        "date_range": {"start": dates[0], "end": dates[-1]}
+    }
+    
+    if request.curve != "none":
+        rows = np.arange(len(dates))
+        if request.curve == "monthly":
+            # Last trading date of every month
+            month_start = period_starts(dates, "monthly")
+            rows = np.append(np.flatnonzero(month_start)[1:] - 1, len(dates) - 1)
+        curve = pd.DataFrame(result["equity"][rows], columns=names)
+        payload["equity_curve"] = {
+            "dates": [dates[i] for i in rows],
+            "values": frame_to_json(curve)
+        }
+        payload["turnover"] = {
+            "dates": [dates[i] for i in boundaries[1:]],
+            "values": frame_to_json(pd.DataFrame(result["turnover"][1:], columns=names))
+        }
+    
+    return payload
+
+@app.post(
+    "/backtest",
+    tags=["Portfolio Analysis"],
+    summary="Backtest periodically rebalanced strategies"
+)
+async def run_backtest_endpoint(request: BacktestRequest):
+    """
+    Simulate a batch of rebalancing strategies on the aligned return matrix
+    
+    All strategies run together; the simulation loops over rebalance
+    periods with one matrix product per period. With `stream`, progress
+    events are sent as NDJSON lines before the final result line.
+    
+    Args:
+        request: Strategies, date range, costs and output options
+        
+    Returns:
+        Per-strategy return/risk/turnover statistics, equity curves and
+        turnover per rebalance
+    """
+    try:
+        start_date = parse_date(request.start_date)
+        end_date = parse_date(request.end_date)
+        
+        strategies = []
+        for strategy in request.strategies:
+            if (strategy.weights is None) == (not strategy.schedule):
+                raise ValueError(f"Strategy {strategy.name}: provide exactly one of weights or schedule")
+            spec = {"rebalance": strategy.rebalance}
+            if strategy.weights is not None:
+                spec["weights"] = {validate_ticker(t): w for t, w in strategy.weights.items()}
+            else:
+                spec["schedule"] = [
+                    (e.date, {validate_ticker(t): w for t, w in e.weights.items()})
+                    for e in strategy.schedule
+                ]
+            strategies.append(spec)
+        
+        names = [strategy.name for strategy in request.strategies]
+        if len(set(names)) != len(names):
+            raise ValueError("Strategy names must be unique")
+    
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    try:
+        tickers = sorted({
+            t
+            for spec in strategies
+            for weights in ([spec["weights"]] if "weights" in spec else [w for _, w in spec["schedule"]])
+            for t in weights
+        })
+        
+        if len(tickers) > BACKTEST_SEEK_LIMIT:
+            # Wide batches read the cached universe matrix
+            closes = price_cache.closes(start_date, end_date)
+            closes = closes.reindex(columns=tickers)
+        else:
+            price_data = {}
+            for ticker in tickers:
+                query, params = build_price_query(ticker, start_date, end_date)
+                df = execute_query(query, params)
+                price_data[ticker] = df.set_index("date")["close"]
+            closes = pd.DataFrame(price_data, columns=tickers)
+        
+        missing = [t for t in tickers if closes[t].isna().all()]
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"No data found for ticker(s): {', '.join(missing)}"
+            )
+        
+        # Backtest runs on the dates every traded ticker has a close
+        closes = closes.dropna().sort_index()
+        returns_df = (closes / closes.shift(1) - 1).iloc[1:]
+        if len(returns_df) < 2:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Insufficient overlapping data for backtest"
+            )
+        
+        dates = [str(d) for d in returns_df.index]
+        boundaries, rebalance, targets = target_schedule(dates, tickers, strategies)
+        returns = returns_df.to_numpy()
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in run_backtest_endpoint: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to run backtest"
+        )
+    
+    if request.stream:
+        progress_every = max(1, len(boundaries) // 20)
+        
+        def events():
+            try:
+                for event in simulate(
+                    returns, boundaries, rebalance, targets, request.cost_bps, progress_every
+                ):
+                    if event["type"] == "result":
+                        event = {
+                            "type": "result",
+                            **backtest_payload(request, dates, boundaries, rebalance, event)
+                        }
+                    yield json.dumps(event) + "\n"
+            except Exception as e:
+                logger.error(f"Error in run_backtest_endpoint stream: {e}")
+                yield json.dumps({"type": "error", "detail": "Failed to run backtest"}) + "\n"
+        
+        return StreamingResponse(events(), media_type="application/x-ndjson")
+    
+    try:
+        result = run_backtest(returns, boundaries, rebalance, targets, request.cost_bps)
+        return JSONResponse(
+            content=backtest_payload(request, dates, boundaries, rebalance, result)
+        )
+    except Exception as e:
+        logger.error(f"Error in run_backtest_endpoint: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to run backtest"
+        )
+
+# ============================================================================
+# SCENARIO ENDPOINTS
+# ============================================================================
+
+def get_master_or_none() -> Optional[pd.DataFrame]:
+    """Equity master if available (scenario proxies degrade without it)"""
+    try:
+        return get_equity_master()
+    except FileNotFoundError:
+        logger.warning("Equity master not available - proxying with the market return")
+        return None
+
+def historical_scenario(start_date: str, end_date: str, proxy: bool) -> Tuple[pd.Series, pd.Series]:
+    """
+    Universe return vector for a historical window, cached until the next ingest
+    
+    Returns:
+        (ticker -> scenario return, ticker -> proxied flag)
+    """
+    def compute():
+        closes = price_cache.closes(start_date, end_date)
+        vector = scenario_vector(closes).reindex(ticker_stats_cache.all_tickers())
+        if proxy:
+            return proxy_missing(vector, get_master_or_none())
+        return vector, pd.Series(False, index=vector.index)
+    
+    return price_cache.memo(("scenario", start_date, end_date, proxy), compute)
+
+def factor_scenario(
+    shocks: Dict[str, float],
+    beta_start: str,
+    beta_end: str,
+    proxy: bool
+) -> Tuple[pd.Series, pd.Series]:
+    """
+    Universe return vector implied by a factor shock through cached betas
+    
+    Returns:
+        (ticker -> implied return, ticker -> proxied flag)
+    """
+    model = compute_factor_fit(beta_start, beta_end, FACTOR_GROUPS, 60)
+    factor_names = list(model["factor_returns"].columns)
+    betas = model["fit"]["coef"][1:]
+    
+    vector = pd.Series(
+        factor_shock_vector(betas, factor_names, shocks), index=model["tickers"]
+    ).reindex(ticker_stats_cache.all_tickers())
+    if proxy:
+        return proxy_missing(vector, get_master_or_none())
+    return vector, pd.Series(False, index=vector.index)
+
+@app.get(
+    "/portfolio-scenarios",
+    tags=["Portfolio Analysis"],
+    summary="Available stress scenarios"
+)
+async def list_scenarios():
+    """List built-in historical scenarios and the factors that can be shocked"""
+    return {
+        "historical": {
+            name: {"start_date": start, "end_date": end, "description": description}
+            for name, (start, end, description) in HISTORICAL_SCENARIOS.items()
+        },
+        "factors": ["market", "size", "sector_<name>"],
+        "note": "The largest sector by market cap is the reference and cannot be shocked directly"
+    }
+
+@app.post(
+    "/portfolio-scenarios",
+    tags=["Portfolio Analysis"],
+    summary="Replay historical and hypothetical scenarios on many portfolios"
+)
+async def run_scenarios(request: ScenarioRequest):
+    """
+    Reprice a batch of portfolios under historical windows and factor shocks
+    
+    Every scenario is a cached ticker -> return vector; all portfolios are
+    repriced at once as a weights @ scenarios matrix product.
+    
+    Args:
+        request: Portfolios, scenario selection and beta window
+        
+    Returns:
+        Portfolio x scenario returns, worst scenario per portfolio, proxied
+        holdings and optional per-holding contributions
+    """
+    try:
+        portfolios = {
+            name: {validate_ticker(t): w for t, w in holdings.items()}
+            for name, holdings in request.portfolios.items()
+        }
+        
+        names = request.scenarios if request.scenarios is not None else list(HISTORICAL_SCENARIOS)
+        unknown = [n for n in names if n not in HISTORICAL_SCENARIOS]
+        if unknown:
+            raise ValueError(
+                f"Unknown scenario(s): {', '.join(unknown)}. "
+                f"Available: {', '.join(HISTORICAL_SCENARIOS)}"
+            )
+        
+        windows = {n: HISTORICAL_SCENARIOS[n][:2] for n in names}
+        for w in request.custom_windows:
+            if w.start_date >= w.end_date:
+                raise ValueError(f"Window {w.name or w.start_date}: start_date must precede end_date")
+            windows[w.name or f"{w.start_date}:{w.end_date}"] = (w.start_date, w.end_date)
+        
+        if not windows and not request.factor_shocks:
+            raise ValueError("No scenarios selected")
+        
+        beta_end = parse_date(request.beta_end_date) or ticker_stats_cache.latest_date()
+        beta_start = parse_date(request.beta_start_date) or (
+            datetime.strptime(beta_end, "%Y-%m-%d") - timedelta(days=3 * 365)
+        ).strftime("%Y-%m-%d")
+    
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    try:
+        universe = set(ticker_stats_cache.all_tickers())
+        held = sorted(set().union(*[set(h) for h in portfolios.values()]))
+        missing = [t for t in held if t not in universe]
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"No data found for ticker(s): {', '.join(missing)}"
+            )
+        
+        columns, proxied, described = {}, {}, {}
+        
+        for name, (start, end) in windows.items():
+            vector, flags = historical_scenario(start, end, request.proxy_missing)
+            columns[name] = vector[held]
+            proxied[name] = [t for t in held if flags[t]]
+            described[name] = {"type": "historical", "start_date": start, "end_date": end}
+        
+        for shock in request.factor_shocks:
+            try:
+                vector, flags = factor_scenario(
+                    shock.shocks, beta_start, beta_end, request.proxy_missing
+                )
+            except ValueError as e:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Factor shock {shock.name}: {e}"
+                )
+            columns[shock.name] = vector[held]
+            proxied[shock.name] = [t for t in held if flags[t]]
+            described[shock.name] = {
+                "type": "factor",
+                "shocks": shock.shocks,
+                "beta_window": {"start": beta_start, "end": beta_end}
+            }
+        
+        scenario_matrix = pd.DataFrame(columns, index=held)
+        result = apply_scenarios(scenario_matrix, portfolios, request.include_contributions)
+        
+        pnl = result["pnl"]
+        values = pnl.to_numpy()
+        priced = np.isfinite(values).any(axis=1)
+        worst_idx = np.nanargmin(np.where(np.isfinite(values), values, np.inf), axis=1)
+        
+        response = {
+            "scenarios": described,
+            "pnl": dict(zip(pnl.index, (
+                dict(zip(pnl.columns, row))
+                for row in pnl.astype(object).where(pnl.notna(), None).to_numpy().tolist()
+            ))),
+            "worst": {
+                name: (
+                    {"scenario": pnl.columns[j], "return": float(values[i, j])}
+                    if priced[i] else None
+                )
+                for i, (name, j) in enumerate(zip(pnl.index, worst_idx))
+            },
+            "proxied_holdings": {k: v for k, v in proxied.items() if v}
+        }
+        
+        if request.include_contributions:
+            response["contributions"] = {
+                name: {
+                    ticker: {k: _float_or_none(v) for k, v in row.items()}
+                    for ticker, row in frame.iterrows()
+                }
+                for name, frame in result["contributions"].items()
+            }
+        
+        return JSONResponse(content=response)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in run_scenarios: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to run scenarios"
+        )
+
+# ============================================================================
+# SCREENER ENDPOINTS
+# ============================================================================
+
+def compute_screen_metrics(as_of: str) -> pd.DataFrame:
+    """Universe metric table as of a date, cached until the next ingest"""
+    def compute():
+        start = (datetime.strptime(as_of, "%Y-%m-%d") - timedelta(days=LOOKBACK_DAYS)).strftime("%Y-%m-%d")
+        closes = price_cache.closes(start, as_of)
+        if closes.empty:
+            raise ValueError(f"No price data on or before {as_of}")
+        volumes = price_cache.volumes(start, as_of)
+        try:
+            master = get_equity_master()
+        except FileNotFoundError:
+            logger.warning("Equity master not available - screening without sector fields")
+            master = None
+        return compute_metrics(closes, volumes, master)
+    
+    return price_cache.memo(("screen_metrics", as_of), compute)
+
+@app.get(
+    "/screen",
+    tags=["Screener"],
+    summary="Filter and rank the whole universe"
+)
+async def screen(
+    filter: Optional[str] = Query(
+        None,
+        max_length=500,
+        description="Boolean expression, e.g. vol_20d > 0.3 and max_drawdown_20d < -0.1"
+    ),
+    sort: Optional[str] = Query(
+        None,
+        max_length=200,
+        description="Numeric expression to rank by, e.g. ret_20d / vol_20d"
+    ),
+    order: str = Query("desc", enum=["asc", "desc"]),
+    as_of: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$", description="Screen date (default: latest)"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (default: all)"),
+    limit: int = Query(50, ge=1, le=1000),
+    offset: int = Query(0, ge=0)
+):
+    """
+    Evaluate a filter and ranking over per-ticker metrics in one pass
+    
+    Args:
+        filter: Boolean filter expression over metric fields
+        sort: Ranking expression over metric fields
+        order: Ranking direction
+        as_of: Date the metrics are computed as of
+        fields: Subset of fields per result row
+        limit: Page size
+        offset: Page start
+        
+    Returns:
+        Total match count and one page of ranked results
+    """
+    try:
+        as_of = parse_date(as_of) or ticker_stats_cache.latest_date()
+        table = compute_screen_metrics(as_of)
+        
+        field_list = list(table.columns)
+        if fields:
+            field_list = [f.strip() for f in fields.split(",") if f.strip()]
+            unknown = [f for f in field_list if f not in table.columns]
+            if unknown:
+                raise ValueError(
+                    f"Unknown field(s): {', '.join(unknown)}. "
+                    f"Available: {', '.join(table.columns)}"
+                )
+        
+        total, page, scores = run_screen(
+            table, filter, sort, descending=(order == "desc"),
+            offset=offset, limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Error in screen: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to run screen"
+        )
+    
+    rows = page[field_list].astype(object).where(page[field_list].notna(), None)
+    results = [
+        {"ticker": ticker, **values}
+        for ticker, values in zip(rows.index, rows.to_dict(orient="records"))
+    ]
+    if scores is not None:
+        for row, score in zip(results, scores):
+            row["score"] = _float_or_none(score)
+    
+    return JSONResponse(content={
+        "as_of": as_of,
+        "filter": filter,
+        "sort": sort,
+        "order": order,
+        "universe_size": len(table),
+        "total_matches": total,
+        "offset": offset,
+        "limit": limit,
+        "results": results
+    })
+
+@app.get(
+    "/screen/fields",
+    tags=["Screener"],
+    summary="Fields available to screen expressions"
+)
+async def screen_fields():
+    """List screenable metric fields with their types"""
+    try:
+        as_of = ticker_stats_cache.latest_date()
+        table = compute_screen_metrics(as_of)
+    except Exception as e:
+        logger.error(f"Error in screen_fields: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to load screen fields"
+        )
+    
+    return {
+        "fields": {
+            name: "text" if table[name].dtype == object else "number"
+            for name in table.columns
+        },
+        "functions": ["abs", "log", "sqrt"],
+        "operators": ["+", "-", "*", "/", "<", "<=", ">", ">=", "==", "!=",
+                      "and", "or", "not", "in", "not in"]
+    }
+
+# ============================================================================
+# PUSH SUBSCRIPTIONS (SERVER-SENT EVENTS)
+# ============================================================================
+
+# Seconds between checks for a finished ingest (a stat of the db files)
+PUSH_POLL_SECONDS = 5.0
+
+# Seconds between SSE keep-alive comments on an idle stream
+SSE_HEARTBEAT_SECONDS = 15.0
+
+def load_recent_closes(tickers: List[str], rows: int) -> Dict[str, pd.Series]:
+    """Last `rows` closes per ticker, one index seek each"""
+    closes = {}
+    for tk in tickers:
+        query, params = build_price_query(tk, latest_first=True, limit=rows)
+        df = execute_query(query, params)
+        if not df.empty:
+            closes[tk] = df.iloc[::-1].set_index("date")["close"]
+    return closes
+
+push_hub = SubscriptionHub(load_recent_closes)
+
+def current_change_version() -> int:
+    """Latest price_changes seq"""
+    return int(execute_query(CHANGE_VERSION_QUERY, fetch_one=True)["version"])
+
+def changed_tickers_since(version: int) -> Tuple[int, set]:
+    """(new change version, tickers with bars logged after `version`)"""
+    latest = current_change_version()
+    if latest <= version:
+        return latest, set()
+    changed = execute_query(CHANGED_TICKERS_QUERY, [version, latest])
+    return latest, set(changed["ticker"])
+
+async def watch_for_updates():
+    """
+    Background task: after each ingest, recompute what subscribers follow
+    once and push it to every subscriber
+    
+    The database file version is polled (two stats); the change log then
+    says which tickers moved, so only their metrics and the portfolios
+    holding them are recomputed.
+    """
+    seen = db_manager.data_version()
+    while True:
+        await asyncio.sleep(PUSH_POLL_SECONDS)
+        try:
+            push_hub.prune_idle()
+            version = db_manager.data_version()
+            if version == seen:
+                continue
+            seen = version
+            
+            latest, changed = await asyncio.to_thread(changed_tickers_since, push_hub.version or 0)
+            if not changed:
+                continue
+            deliveries = await asyncio.to_thread(push_hub.compute_update, latest, changed)
+            push_hub.deliver(deliveries)
+            if deliveries:
+                logger.info(
+                    f"Pushed update v{latest} ({len(changed)} changed tickers) "
+                    f"to {len(deliveries)} subscriber(s)"
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error in push update watcher: {e}")
+
+def sse_event(event: str, data: Dict, event_id: Optional[int] = None) -> str:
+    """Format one Server-Sent Event"""
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+@app.post(
+    "/subscriptions",
+    tags=["Push Updates"],
+    summary="Register tickers and portfolios for pushed updates"
+)
+async def create_subscription(request: SubscriptionRequest):
+    """
+    Register a ticker set and portfolios for end-of-day push updates
+    
+    Open the returned stream URL with an SSE client (e.g. EventSource). A
+    subscription with no stream attached expires after 10 minutes.
+    
+    Args:
+        request: Tickers, portfolios and metric settings
+        
+    Returns:
+        Subscription id and stream URL
+    """
+    if not request.tickers and not request.portfolios:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Subscribe to at least one ticker or portfolio"
+        )
+    
+    subscription = push_hub.subscribe(
+        tickers=request.tickers,
+        portfolios=request.portfolios,
+        window=request.window,
+        confidence_levels=tuple(request.confidence_levels),
+        lookback_days=request.lookback_days,
+        risk_free_rate=request.risk_free_rate
+    )
+    return {
+        "id": subscription.id,
+        "stream": f"/subscriptions/{subscription.id}/events",
+        "tickers": subscription.tickers,
+        "portfolios": list(subscription.portfolios)
+    }
+
+@app.get(
+    "/subscriptions/{subscription_id}/events",
+    tags=["Push Updates"],
+    summary="Server-Sent Events stream of a subscription"
+)
+async def subscription_events(subscription_id: str, request: Request):
+    """
+    Stream a subscription's updates as Server-Sent Events
+    
+    Sends one `snapshot` event with current metrics, then an `update`
+    event (id = change version) after each ingest that touches a
+    followed ticker, carrying only the tickers and portfolios that moved.
+    
+    Args:
+        subscription_id: Id from POST /subscriptions
+        
+    Returns:
+        text/event-stream response
+    """
+    subscription = push_hub.subscriptions.get(subscription_id)
+    if subscription is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown subscription {subscription_id}"
+        )
+    
+    async def stream():
+        subscription.connections += 1
+        try:
+            snapshot = await asyncio.to_thread(push_hub.snapshot, subscription)
+            yield sse_event("snapshot", snapshot, snapshot["version"])
+            
+            while subscription.id in push_hub.subscriptions:
+                if await request.is_disconnected():
+                    break
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.queue.get(), timeout=SSE_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield sse_event("update", event, event["version"])
+        except Exception as e:
+            logger.error(f"Error in subscription stream {subscription.id}: {e}")
+            yield sse_event("error", {"detail": "Failed to compute subscription update"})
+        finally:
+            subscription.connections -= 1
+            subscription.last_seen = time.monotonic()
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.delete(
+    "/subscriptions/{subscription_id}",
+    tags=["Push Updates"],
+    summary="Cancel a subscription"
+)
+async def delete_subscription(subscription_id: str):
+    """Cancel a subscription; its open stream ends"""
+    if not push_hub.unsubscribe(subscription_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown subscription {subscription_id}"
+        )
+    return {"id": subscription_id, "status": "cancelled"}
+
+@app.get(
+    "/subscriptions",
+    tags=["Push Updates"],
+    summary="Subscription counts"
+)
+async def list_subscriptions():
+    """Number of subscriptions, open streams and distinct followed tickers"""
+    subscriptions = list(push_hub.subscriptions.values())
+    return {
+        "subscriptions": len(subscriptions),
+        "open_streams": sum(s.connections for s in subscriptions),
+        "tickers": len({t for s in subscriptions for t in s.tickers}),
+        "portfolios": sum(len(s.portfolios) for s in subscriptions),
+        "version": push_hub.version
+    }
+
 # ============================================================================
 # APPLICATION ROOT
 # ============================================================================
@@ -1125,11 +3291,16 @@ async def root():
         "docs": "/docs",
         "endpoints": {
             "health": "/health",
-            "market_data": "/prices",
+            "market_data": ["/prices", "/prices/delta"],
             "analytics": ["/returns", "/volatility", "/correlation"],
             "risk": ["/drawdown", "/var"],
-            "portfolio": "/portfolio-metrics",
-            "metadata": ["/available-tickers", "/ticker-info/{ticker}"]
+            "portfolio": ["/portfolio-metrics", "/stress-test", "/portfolio-scenarios", "/backtest"],
+            "sectors": ["/sectors/returns", "/sectors/index", "/sectors/risk"],
+            "benchmarks": ["/benchmarks", "/benchmark-metrics"],
+            "factors": "/factor-exposures",
+            "screener": ["/screen", "/screen/fields"],
+            "push": ["/subscriptions", "/subscriptions/{id}/events"],
+            "metadata": ["/available-tickers", "/ticker-info/{ticker}", "/data-version"]
         }
     }
 
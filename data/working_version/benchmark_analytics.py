@@ -0,0 +1,186 @@
+"""
+Benchmark-relative analytics: beta, alpha, tracking error, information
+ratio and up/down capture against any series in benchmark_data.db
+All tickers and portfolios are solved together as columns of one matrix
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from queries import benchmark_join_query
+
+TRADING_DAYS = 252
+
+BENCHMARK_ALIAS = "bench"
+
+
+def attach_benchmarks(conn, benchmark_db_path) -> None:
+    """Attach benchmark_data.db to an open stock_prices connection"""
+    conn.execute(f"ATTACH DATABASE ? AS {BENCHMARK_ALIAS}", [str(benchmark_db_path)])
+
+
+def load_aligned_closes(
+    conn,
+    benchmark: str,
+    tickers: Optional[List[str]] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None
+) -> Tuple[pd.DataFrame, pd.Series]:
+    """
+    Join asset closes to a benchmark series on date in SQL
+
+    Args:
+        conn: Connection with benchmark_data.db attached
+        benchmark: Benchmark ticker (e.g. 'SP500', 'OVX_Oil')
+        tickers: Asset tickers; None loads the whole universe
+        start_date: Optional start date
+        end_date: Optional end date
+
+    Returns:
+        (date x ticker close matrix, benchmark close series) on the
+        benchmark's trading dates
+    """
+    query = benchmark_join_query(
+        None if tickers is None else len(tickers),
+        bool(start_date),
+        bool(end_date)
+    )
+    params = [benchmark] + list(tickers or []) + [d for d in (start_date, end_date) if d]
+
+    long_df = pd.read_sql(query, conn, params=params)
+    if long_df.empty:
+        return pd.DataFrame(), pd.Series(dtype=np.float64)
+
+    closes = long_df.pivot(index="date", columns="ticker", values="close").sort_index()
+    bench = long_df.groupby("date")["benchmark_close"].first().reindex(closes.index)
+    return closes.astype(np.float64), bench.astype(np.float64)
+
+
+def portfolio_returns(
+    asset_returns: pd.DataFrame,
+    portfolios: Dict[str, Dict[str, float]]
+) -> pd.DataFrame:
+    """
+    Returns of many portfolios as one matrix product
+
+    A portfolio's return is NaN on any date where one of its holdings has
+    no return; tickers it does not hold never affect it.
+
+    Args:
+        asset_returns: date x ticker returns
+        portfolios: name -> {ticker: weight}
+
+    Returns:
+        date x portfolio returns
+    """
+    names = list(portfolios)
+    weights = np.zeros((asset_returns.shape[1], len(names)))
+    col = {t: i for i, t in enumerate(asset_returns.columns)}
+
+    for j, name in enumerate(names):
+        for ticker, w in portfolios[name].items():
+            weights[col[ticker], j] = w
+
+    values = asset_returns.to_numpy()
+    missing = ~np.isfinite(values)
+    combined = np.where(missing, 0.0, values) @ weights
+    incomplete = (missing.astype(np.float64) @ (weights != 0)) > 0
+    combined[incomplete] = np.nan
+
+    return pd.DataFrame(combined, index=asset_returns.index, columns=names)
+
+
+def _rolling_sum(x: np.ndarray, window: int) -> np.ndarray:
+    """Trailing window sums along axis 0 via prefix sums (first window-1 rows NaN)"""
+    csum = np.cumsum(x, axis=0)
+    out = np.full(x.shape, np.nan)
+    out[window - 1] = csum[window - 1]
+    out[window:] = csum[window:] - csum[:-window]
+    return out
+
+
+def relative_metrics(
+    returns: np.ndarray,
+    bench: np.ndarray,
+    risk_free_rate: float = 0.0,
+    window: Optional[int] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Benchmark-relative statistics for every column of a return matrix
+
+    Each column uses only the dates where both it and the benchmark have a
+    return, so tickers with different histories share one pass.
+
+    Args:
+        returns: T x M simple returns (assets and/or portfolios)
+        bench: T benchmark simple returns
+        risk_free_rate: Annual risk-free rate used for alpha
+        window: Rolling window in days; None skips rolling series
+
+    Returns:
+        Dict of length-M arrays (beta, alpha, tracking_error,
+        information_ratio, up_capture, down_capture, observations) and,
+        with a window, T x M rolling_beta / rolling_alpha /
+        rolling_tracking_error / rolling_information_ratio arrays
+    """
+    rf = risk_free_rate / TRADING_DAYS
+    b = np.broadcast_to(bench[:, None], returns.shape)
+    valid = np.isfinite(returns) & np.isfinite(b)
+    m = valid.astype(np.float64)
+
+    y = np.where(valid, returns - rf, 0.0)
+    x = np.where(valid, b - rf, 0.0)
+    active = np.where(valid, returns - b, 0.0)
+
+    def moments(agg):
+        n = agg(m)
+        sx, sy = agg(x), agg(y)
+        sxx, sxy = agg(x * x), agg(x * y)
+        sa, saa = agg(active), agg(active * active)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mx, my = sx / n, sy / n
+            var_x = (sxx - n * mx * mx) / (n - 1)
+            cov_xy = (sxy - n * mx * my) / (n - 1)
+            beta = cov_xy / var_x
+            alpha = (my - beta * mx) * TRADING_DAYS
+            mean_active = sa / n
+            te = np.sqrt(np.maximum((saa - n * mean_active ** 2) / (n - 1), 0.0))
+            te *= np.sqrt(TRADING_DAYS)
+            ir = mean_active * TRADING_DAYS / te
+        return n, beta, alpha, te, ir
+
+    n, beta, alpha, te, ir = moments(lambda a: a.sum(axis=0))
+
+    up = valid & (b > 0)
+    down = valid & (b < 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        up_capture = (
+            np.where(up, returns, 0.0).sum(axis=0) / up.sum(axis=0)
+        ) / (np.where(up, b, 0.0).sum(axis=0) / up.sum(axis=0))
+        down_capture = (
+            np.where(down, returns, 0.0).sum(axis=0) / down.sum(axis=0)
+        ) / (np.where(down, b, 0.0).sum(axis=0) / down.sum(axis=0))
+
+    result = {
+        "beta": beta,
+        "alpha": alpha,
+        "tracking_error": te,
+        "information_ratio": ir,
+        "up_capture": up_capture,
+        "down_capture": down_capture,
+        "observations": n,
+    }
+
+    if window and returns.shape[0] >= window:
+        rn, rbeta, ralpha, rte, rir = moments(lambda a: _rolling_sum(a, window))
+        too_few = rn < window
+        for arr in (rbeta, ralpha, rte, rir):
+            arr[too_few] = np.nan
+        result["rolling_beta"] = rbeta
+        result["rolling_alpha"] = ralpha
+        result["rolling_tracking_error"] = rte
+        result["rolling_information_ratio"] = rir
+
+    return result
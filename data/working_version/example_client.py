@@ -3,11 +3,21 @@ Python client demonstrating portfolio risk analysis using the Flask API
 Shows typical workflows for quantitative professionals
 """
 
+import asyncio
+import os
+import random
+import time
 import requests
 import json
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import httpx  # only needed for AsyncQuantDataClient
+except ImportError:
+    httpx = None
 
 class QuantDataClient:
     """Client for consuming quantitative finance API"""
@@ -32,6 +42,56 @@ class QuantDataClient:
         resp.raise_for_status()
         return resp.json()
     
+    def get_delta(self, tickers: List[str] = None, since_version: int = None,
+                  since_date: str = None, window: int = 20) -> Dict:
+        """
+        Fetch only bars added or changed since a change version (or date)
+        
+        Pass the returned "version" as since_version on the next poll;
+        pages are followed until the delta is complete.
+        """
+        params = {"window": window}
+        if tickers:
+            params["ticker"] = ",".join(tickers)
+        if since_date and since_version is None:
+            params["since_date"] = since_date
+        else:
+            params["since_version"] = since_version or 0
+        
+        merged = None
+        while True:
+            resp = self.session.get(f"{self.base_url}/prices/delta", params=params)
+            resp.raise_for_status()
+            page = resp.json()
+            if merged is None:
+                merged = page
+            else:
+                merged["version"], merged["complete"] = page["version"], page["complete"]
+                for tk, body in page["tickers"].items():
+                    if tk not in merged["tickers"]:
+                        merged["tickers"][tk] = body
+                        continue
+                    # Later pages hold newer values for any repeated date
+                    target = merged["tickers"][tk]
+                    rows = {r["date"]: r for r in target["rows"] + body["rows"]}
+                    target["rows"] = [rows[d] for d in sorted(rows)]
+                    target["count"] = len(target["rows"])
+                    rolling = {}
+                    for part in (target["rolling"], body["rolling"]):
+                        for d, ret, vol in zip(part["dates"], part["returns"], part["volatility"]):
+                            rolling[d] = (ret, vol)
+                    dates = sorted(rolling)
+                    target["rolling"].update(
+                        dates=dates,
+                        returns=[rolling[d][0] for d in dates],
+                        volatility=[rolling[d][1] for d in dates]
+                    )
+            if page["complete"]:
+                merged["count"] = sum(body["count"] for body in merged["tickers"].values())
+                return merged
+            params.pop("since_date", None)
+            params["since_version"] = page["version"]
+    
     def get_returns(self, tickers: List[str], return_type: str = "log",
                    start_date: str = None, end_date: str = None) -> Dict:
         """Fetch returns and statistics"""
@@ -124,11 +184,501 @@ class QuantDataClient:
         resp.raise_for_status()
         return resp.json()
     
+    def stress_test(self, holdings: Dict[str, float],
+                    windows: List[Tuple[str, str, str]] = None,
+                    rolling_window: int = None, step: int = 21,
+                    confidence: float = 0.95) -> Dict:
+        """Portfolio metrics for many (name, start, end) windows in one request"""
+        payload = {
+            "holdings": holdings,
+            "windows": [
+                {"name": name, "start_date": start, "end_date": end}
+                for name, start, end in (windows or [])
+            ],
+            "step": step,
+            "confidence": confidence
+        }
+        if rolling_window:
+            payload["rolling_window"] = rolling_window
+        
+        resp = self.session.post(f"{self.base_url}/stress-test", json=payload)
+        resp.raise_for_status()
+        return resp.json()
+    
     def get_available_tickers(self) -> List[str]:
         """Get all available tickers"""
         resp = self.session.get(f"{self.base_url}/available-tickers")
         resp.raise_for_status()
         return resp.json()["tickers"]
+    
+    def subscribe(self, tickers: List[str] = None,
+                  portfolios: Dict[str, Dict[str, float]] = None, **settings):
+        """
+        Register for pushed end-of-day updates and iterate over them
+        
+        Yields (event, data) pairs: one "snapshot", then an "update" after
+        every ingest touching the subscription. Stop iterating to
+        disconnect; the subscription is cancelled on exit.
+        """
+        payload = {"tickers": tickers or [], "portfolios": portfolios or {}, **settings}
+        resp = self.session.post(f"{self.base_url}/subscriptions", json=payload)
+        resp.raise_for_status()
+        subscription = resp.json()
+        
+        try:
+            with self.session.get(f"{self.base_url}{subscription['stream']}", stream=True) as stream:
+                stream.raise_for_status()
+                event = None
+                for line in stream.iter_lines(decode_unicode=True):
+                    if line.startswith("event:"):
+                        event = line[6:].strip()
+                    elif line.startswith("data:"):
+                        yield event, json.loads(line[5:])
+        finally:
+            self.session.delete(f"{self.base_url}/subscriptions/{subscription['id']}")
+
+
+class CachedQuantDataClient(QuantDataClient):
+    """
+    QuantDataClient with a local on-disk cache of per-ticker OHLCV history
+    
+    - History is stored per ticker in columnar form (.npz, one array per
+      column) next to a JSON sidecar with the covered date range and the
+      server's per-ticker data version
+    - One /data-version call per batch (a conditional GET answered with
+      304 when nothing changed) tells which cached tickers are current
+    - Extending a cached range fetches only the missing head/tail dates;
+      a ticker whose version changed fetches only bars after its cached
+      end, since ingest only appends
+    - get_returns is computed locally from cached closes with the same
+      formulas as /returns, so repeated analysis needs no price transfer
+    
+    Usage:
+        client = CachedQuantDataClient(cache_dir="~/.cache/quant_api")
+        history = client.get_history(["AAPL", "MSFT"], start_date="2015-01-01")
+    """
+    
+    MAX_ROWS = 100000  # /prices limit ceiling, far above one ticker's history
+    
+    def __init__(self, base_url="http://localhost:5000",
+                 cache_dir: str = "~/.cache/quant_api", version_ttl: float = 30.0):
+        super().__init__(base_url)
+        self.cache_dir = Path(cache_dir).expanduser() / "prices"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.version_ttl = version_ttl
+        # /data-version URL -> (etag, payload, fetched_at)
+        self._versions: Dict[str, Tuple[str, Dict, float]] = {}
+    
+    # ------------------------------------------------------------------
+    # Server versions
+    # ------------------------------------------------------------------
+    
+    def _ticker_versions(self, tickers: List[str]) -> Dict[str, Optional[Dict]]:
+        """Per-ticker version rows, revalidated at most every version_ttl seconds"""
+        key = ",".join(sorted(tickers))
+        cached = self._versions.get(key)
+        if cached and time.monotonic() - cached[2] < self.version_ttl:
+            return cached[1]["tickers"]
+        
+        headers = {"If-None-Match": cached[0]} if cached else {}
+        resp = self.session.get(
+            f"{self.base_url}/data-version", params={"tickers": key}, headers=headers
+        )
+        if resp.status_code == 304:
+            payload = cached[1]
+        else:
+            resp.raise_for_status()
+            payload = resp.json()
+        self._versions[key] = (resp.headers.get("ETag", ""), payload, time.monotonic())
+        return payload["tickers"]
+    
+    # ------------------------------------------------------------------
+    # Disk cache
+    # ------------------------------------------------------------------
+    
+    def _paths(self, ticker: str) -> Tuple[Path, Path]:
+        return self.cache_dir / f"{ticker}.npz", self.cache_dir / f"{ticker}.json"
+    
+    def _load(self, ticker: str) -> Tuple[Optional[pd.DataFrame], Optional[Dict]]:
+        data_path, meta_path = self._paths(ticker)
+        if not (data_path.exists() and meta_path.exists()):
+            return None, None
+        with np.load(data_path, allow_pickle=False) as arrays:
+            frame = pd.DataFrame({col: arrays[col] for col in arrays.files})
+        return frame, json.loads(meta_path.read_text())
+    
+    def _store(self, ticker: str, frame: pd.DataFrame, meta: Dict):
+        """Write data then metadata, each atomically"""
+        data_path, meta_path = self._paths(ticker)
+        columns = {
+            col: frame[col].to_numpy() if pd.api.types.is_numeric_dtype(frame[col])
+            else frame[col].astype(str).to_numpy(dtype=str)
+            for col in frame.columns
+        }
+        tmp = data_path.with_suffix(".npz.tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, **columns)
+        os.replace(tmp, data_path)
+        
+        tmp = meta_path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, meta_path)
+    
+    def clear_cache(self, tickers: List[str] = None):
+        """Delete cached history (all tickers by default)"""
+        targets = tickers or [p.stem for p in self.cache_dir.glob("*.npz")]
+        for ticker in targets:
+            for path in self._paths(ticker):
+                path.unlink(missing_ok=True)
+        self._versions.clear()
+    
+    # ------------------------------------------------------------------
+    # Fetching
+    # ------------------------------------------------------------------
+    
+    def _fetch(self, tickers: List[str], start_date: Optional[str],
+               end_date: Optional[str]) -> Dict[str, pd.DataFrame]:
+        """Full history of tickers over one inclusive date range"""
+        params = {"ticker": ",".join(tickers), "limit": self.MAX_ROWS}
+        if start_date:
+            params["start_date"] = start_date
+        if end_date:
+            params["end_date"] = end_date
+        resp = self.session.get(f"{self.base_url}/prices", params=params)
+        resp.raise_for_status()
+        return {tk: pd.DataFrame(body["data"]) for tk, body in resp.json().items()}
+    
+    def get_history(self, tickers: List[str], start_date: str = None,
+                    end_date: str = None) -> Dict[str, pd.DataFrame]:
+        """
+        OHLCV history per ticker, served from the cache where possible
+        
+        Args:
+            tickers: Ticker symbols
+            start_date: Optional start date (default: full history)
+            end_date: Optional end date (default: latest)
+            
+        Returns:
+            ticker -> DataFrame sorted by date (empty for unknown tickers)
+        """
+        versions = self._ticker_versions(tickers)
+        frames, metas = {}, {}
+        # (start, end) segment -> tickers missing it; tickers sharing a
+        # segment (e.g. a cold cache) share one request
+        segments: Dict[Tuple, List[str]] = {}
+        stale = set()
+        
+        for tk in tickers:
+            info = versions.get(tk)
+            if info is None:
+                continue
+            want_end = min(end_date or info["latest_date"], info["latest_date"])
+            frame, meta = self._load(tk)
+            
+            if frame is None:
+                segments.setdefault((start_date, want_end), []).append(tk)
+                meta = {"start": start_date, "end": want_end}
+            else:
+                # start None means the cache holds history from the first bar
+                if meta["start"] is not None and (start_date is None or start_date < meta["start"]):
+                    segments.setdefault((start_date, meta["start"]), []).append(tk)
+                    meta["start"] = start_date
+                if want_end > meta["end"]:
+                    segments.setdefault((meta["end"], want_end), []).append(tk)
+                    meta["end"] = want_end
+            
+            if meta.get("version") != info["version"]:
+                stale.add(tk)
+            meta["version"] = info["version"]
+            frames[tk], metas[tk] = frame, meta
+        
+        for (seg_start, seg_end), group in segments.items():
+            for i in range(0, len(group), 50):
+                chunk = group[i:i + 50]
+                for tk, fetched in self._fetch(chunk, seg_start, seg_end).items():
+                    if frames[tk] is not None:
+                        fetched = pd.concat([frames[tk], fetched], ignore_index=True)
+                    frames[tk] = fetched
+        
+        results = {}
+        for tk in tickers:
+            frame = frames.get(tk)
+            if frame is None or frame.empty:
+                results[tk] = pd.DataFrame()
+                continue
+            if tk in stale or any(tk in group for group in segments.values()):
+                frame = (
+                    frame.drop_duplicates("date", keep="last")
+                    .sort_values("date")
+                    .reset_index(drop=True)
+                )
+                meta, info = metas[tk], versions[tk]
+                # Full-history entries can be checked against the server's
+                # row count; a mismatch means history was rewritten, not
+                # appended, so the entry is rebuilt
+                if tk in stale and meta["start"] is None \
+                        and meta["end"] == info["latest_date"] \
+                        and len(frame) != info["record_count"]:
+                    frame = self._fetch([tk], None, meta["end"])[tk]
+                self._store(tk, frame, meta)
+            
+            mask = np.ones(len(frame), dtype=bool)
+            if start_date:
+                mask &= frame["date"].to_numpy() >= start_date
+            if end_date:
+                mask &= frame["date"].to_numpy() <= end_date
+            results[tk] = frame[mask].reset_index(drop=True)
+        
+        return results
+    
+    # ------------------------------------------------------------------
+    # Cached counterparts of the endpoint methods
+    # ------------------------------------------------------------------
+    
+    def get_prices(self, tickers: List[str], start_date: str = None,
+                   end_date: str = None, limit: int = 1000) -> Dict:
+        """Same payload as /prices, built from cached history"""
+        results = {}
+        for tk, frame in self.get_history(tickers, start_date, end_date).items():
+            if frame.empty:
+                results[tk] = {"data": [], "count": 0}
+                continue
+            frame = frame.tail(limit)
+            results[tk] = {
+                "data": frame.to_dict(orient="records"),
+                "count": len(frame),
+                "date_range": {"start": frame["date"].iloc[0], "end": frame["date"].iloc[-1]}
+            }
+        return results
+    
+    def get_returns(self, tickers: List[str], return_type: str = "log",
+                   start_date: str = None, end_date: str = None) -> Dict:
+        """Same payload as /returns, computed locally from cached closes"""
+        results = {}
+        for tk, frame in self.get_history(tickers, start_date, end_date).items():
+            if len(frame) < 2:
+                results[tk] = {"error": "Insufficient data", "count": len(frame)}
+                continue
+            
+            close = frame["close"].astype(float)
+            if return_type == "log":
+                returns = np.log(close / close.shift(1)).dropna()
+            else:
+                returns = close.pct_change().dropna()
+            
+            results[tk] = {
+                "returns": returns.tolist(),
+                "statistics": {
+                    "mean": float(returns.mean()),
+                    "std": float(returns.std()),
+                    "min": float(returns.min()),
+                    "max": float(returns.max()),
+                    "median": float(returns.median()),
+                    "skewness": float(returns.skew()),
+                    "kurtosis": float(returns.kurtosis()),
+                    "var_95": float(np.percentile(returns, 5))
+                },
+                "count": len(returns),
+                "type": return_type
+            }
+        return results
+
+
+class AsyncQuantDataClient:
+    """
+    Async client for monitoring sweeps over many tickers
+    
+    - One pooled keep-alive connection set (httpx.AsyncClient)
+    - At most `max_concurrency` requests in flight
+    - Per-ticker calls on multi-ticker endpoints (/prices, /returns,
+      /volatility) are merged into requests of up to `batch_size` tickers
+    - Connection errors, 429 and 5xx responses are retried with
+      exponential backoff and jitter
+    
+    Usage:
+        async with AsyncQuantDataClient() as client:
+            vols = await client.get_volatility(tickers)
+    """
+    
+    RETRY_STATUS = {429, 500, 502, 503, 504}
+    
+    def __init__(self, base_url="http://localhost:5000", max_concurrency: int = 8,
+                 batch_size: int = 25, max_retries: int = 3, backoff: float = 0.5,
+                 timeout: float = 30.0):
+        if httpx is None:
+            raise ImportError("AsyncQuantDataClient requires httpx (pip install httpx)")
+        
+        self.base_url = base_url
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency
+            )
+        )
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc):
+        await self.close()
+    
+    async def close(self):
+        """Close pooled connections"""
+        await self.client.aclose()
+    
+    async def _request(self, method: str, path: str, **kwargs) -> Dict:
+        """Send one request with bounded concurrency and retry/backoff"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore:
+                    resp = await self.client.request(method, path, **kwargs)
+                if resp.status_code not in self.RETRY_STATUS or attempt == self.max_retries:
+                    resp.raise_for_status()
+                    return resp.json()
+            except httpx.TransportError:
+                if attempt == self.max_retries:
+                    raise
+            
+            delay = self.backoff * (2 ** attempt)
+            await asyncio.sleep(delay + random.uniform(0, delay))
+    
+    async def _batched(self, path: str, tickers: List[str], params: Dict) -> Dict:
+        """
+        Split tickers into multi-ticker requests, run them concurrently, merge
+        
+        A failed request marks each of its tickers {"error": ...} instead of
+        failing the whole call, like per-ticker errors from the server.
+        """
+        chunks = [
+            tickers[i:i + self.batch_size]
+            for i in range(0, len(tickers), self.batch_size)
+        ]
+        results = await asyncio.gather(*[
+            self._request("GET", path, params={"ticker": ",".join(chunk), **params})
+            for chunk in chunks
+        ], return_exceptions=True)
+        merged = {}
+        for chunk, result in zip(chunks, results):
+            if isinstance(result, Exception):
+                merged.update({t: {"error": str(result)} for t in chunk})
+            else:
+                merged.update(result)
+        return merged
+    
+    async def _fan_out(self, fetch, tickers: List[str], **kwargs) -> Dict[str, Dict]:
+        """One request per ticker, concurrently; failures become {"error": ...}"""
+        results = await asyncio.gather(
+            *[fetch(t, **kwargs) for t in tickers], return_exceptions=True
+        )
+        return {
+            t: {"error": str(r)} if isinstance(r, Exception) else r
+            for t, r in zip(tickers, results)
+        }
+    
+    @staticmethod
+    def _dates(start_date: str = None, end_date: str = None) -> Dict:
+        params = {}
+        if start_date:
+            params["start_date"] = start_date
+        if end_date:
+            params["end_date"] = end_date
+        return params
+    
+    async def get_prices(self, tickers: List[str], start_date: str = None,
+                         end_date: str = None, limit: int = 1000) -> Dict:
+        """Fetch OHLCV data (batched)"""
+        return await self._batched(
+            "/prices", tickers, {"limit": limit, **self._dates(start_date, end_date)}
+        )
+    
+    async def get_returns(self, tickers: List[str], return_type: str = "log",
+                          start_date: str = None, end_date: str = None) -> Dict:
+        """Fetch returns and statistics (batched)"""
+        return await self._batched(
+            "/returns", tickers,
+            {"return_type": return_type, **self._dates(start_date, end_date)}
+        )
+    
+    async def get_volatility(self, tickers: List[str], window: int = 20,
+                             start_date: str = None, end_date: str = None) -> Dict:
+        """Fetch rolling volatility (batched)"""
+        return await self._batched(
+            "/volatility", tickers, {"window": window, **self._dates(start_date, end_date)}
+        )
+    
+    async def get_correlation(self, tickers: List[str], return_type: str = "log",
+                              start_date: str = None, end_date: str = None) -> Dict:
+        """Fetch correlation and covariance"""
+        params = {"tickers": ",".join(tickers), "return_type": return_type,
+                  **self._dates(start_date, end_date)}
+        return await self._request("GET", "/correlation", params=params)
+    
+    async def get_drawdown(self, ticker: str, start_date: str = None,
+                           end_date: str = None) -> Dict:
+        """Fetch maximum drawdown"""
+        params = {"ticker": ticker, **self._dates(start_date, end_date)}
+        return await self._request("GET", "/drawdown", params=params)
+    
+    async def get_var(self, ticker: str, confidence_levels: List[float] = None,
+                      method: str = "historical", lookback_days: int = None) -> Dict:
+        """Fetch Value at Risk"""
+        params = {"ticker": ticker, "method": method}
+        if confidence_levels:
+            params["confidence_levels"] = ",".join(str(c) for c in confidence_levels)
+        if lookback_days:
+            params["lookback_days"] = lookback_days
+        return await self._request("GET", "/var", params=params)
+    
+    async def get_drawdowns(self, tickers: List[str], **kwargs) -> Dict[str, Dict]:
+        """Drawdown for many tickers, fanned out concurrently"""
+        return await self._fan_out(self.get_drawdown, tickers, **kwargs)
+    
+    async def get_vars(self, tickers: List[str], **kwargs) -> Dict[str, Dict]:
+        """VaR for many tickers, fanned out concurrently"""
+        return await self._fan_out(self.get_var, tickers, **kwargs)
+    
+    async def get_portfolio_metrics(self, holdings: Dict[str, float],
+                                    start_date: str = None, end_date: str = None) -> Dict:
+        """Calculate portfolio metrics"""
+        weight_sum = sum(holdings.values())
+        if not (0.99 <= weight_sum <= 1.01):
+            raise ValueError(f"Weights must sum to 1.0, got {weight_sum}")
+        payload = {"holdings": holdings, **self._dates(start_date, end_date)}
+        return await self._request("POST", "/portfolio-metrics", json=payload)
+    
+    async def get_available_tickers(self) -> List[str]:
+        """Get all available tickers"""
+        return (await self._request("GET", "/available-tickers"))["tickers"]
+    
+    async def risk_sweep(self, tickers: List[str], window: int = 20,
+                         confidence: float = 0.99) -> Dict[str, Dict]:
+        """
+        Volatility, drawdown and VaR for every ticker in one concurrent sweep
+        
+        Returns:
+            ticker -> {"volatility", "drawdown", "var"} raw endpoint payloads;
+            a part that failed for a ticker is {"error": ...} instead
+        """
+        parts = await asyncio.gather(
+            self.get_volatility(tickers, window=window),
+            self.get_drawdowns(tickers),
+            self.get_vars(tickers, confidence_levels=[confidence]),
+            return_exceptions=True
+        )
+        vols, drawdowns, vars_ = [
+            {t: {"error": str(part)} for t in tickers} if isinstance(part, Exception) else part
+            for part in parts
+        ]
+        return {
+            t: {"volatility": vols.get(t), "drawdown": drawdowns[t], "var": vars_[t]}
+            for t in tickers
+        }
 
 
 # ============================================================================
@@ -309,29 +859,71 @@ def workflow_5_stress_testing():
     client = QuantDataClient()
     portfolio = {"AAPL": 0.5, "GOOGL": 0.5}
     
-    # Test portfolio in different volatility regimes
+    # Test portfolio in different volatility regimes (one request for all windows)
     print(f"\nPortfolio: {portfolio}")
     print("\nPerformance Under Different Volatility Regimes:")
-    print(f"{'Regime':<15} {'Daily Vol':<12} {'Annual Vol':<12} {'Sharpe':<8}")
-    print("-" * 47)
+    print(f"{'Regime':<15} {'Daily Vol':<12} {'Annual Vol':<12} {'Sharpe':<8} {'Max DD':<8}")
+    print("-" * 57)
     
     vol_periods = [
         ("Low Vol Period", "2024-01-01", "2024-01-31"),
         ("High Vol Period", "2024-02-01", "2024-02-21"),
     ]
     
-    for regime_name, start, end in vol_periods:
-        try:
-            metrics = client.get_portfolio_metrics(portfolio, start_date=start, end_date=end)
-            perf = metrics["performance"]
-            
-            daily_vol = perf["volatility"]
-            annual_vol = daily_vol * np.sqrt(252)
-            sharpe = perf["sharpe_ratio"] * np.sqrt(252)
-            
-            print(f"{regime_name:<15} {daily_vol:>10.2%}  {annual_vol:>10.2%}  {sharpe:>6.3f}")
-        except Exception as e:
-            print(f"{regime_name:<15} Data not available: {str(e)}")
+    try:
+        result = client.stress_test(portfolio, windows=vol_periods, rolling_window=63)
+    except Exception as e:
+        print(f"Stress test not available: {str(e)}")
+        return
+    
+    regimes = [w for w in result["windows"] if not w["name"].startswith("rolling_")]
+    for w in regimes:
+        if w["daily_volatility"] is None:
+            print(f"{w['name']:<15} Data not available")
+            continue
+        print(f"{w['name']:<15} {w['daily_volatility']:>10.2%}  "
+              f"{w['annualized_volatility']:>10.2%}  {w['sharpe_ratio']:>6.3f}  "
+              f"{w['max_drawdown']:>7.2%}")
+    
+    # Worst window across the regimes and every rolling quarter
+    worst = result["worst"]
+    print("\nWorst windows (regimes and rolling 63-day):")
+    for key in ("total_return", "max_drawdown", "var_historical"):
+        if worst[key]:
+            print(f"  {key:<16} {worst[key][key]:>8.2%}  ({worst[key]['name']})")
+
+
+def workflow_6_async_risk_sweep(max_tickers: int = 50):
+    """Workflow 6: Concurrent risk sweep across the universe (async client)"""
+    print("\n" + "="*70)
+    print("WORKFLOW 6: Async Risk Sweep")
+    print("="*70)
+    
+    if httpx is None:
+        print("\nSkipped: install httpx for the async client")
+        return
+    
+    async def sweep():
+        async with AsyncQuantDataClient(max_concurrency=8) as client:
+            tickers = (await client.get_available_tickers())[:max_tickers]
+            started = time.perf_counter()
+            results = await client.risk_sweep(tickers)
+            return tickers, results, time.perf_counter() - started
+    
+    tickers, results, elapsed = asyncio.run(sweep())
+    
+    print(f"\nSwept {len(tickers)} tickers in {elapsed:.2f}s")
+    print(f"{'Ticker':<8} {'Max DD':<10} {'99% VaR':<10}")
+    print("-" * 30)
+    failed = [t for t in tickers if "error" in results[t]["drawdown"] or "error" in results[t]["var"]]
+    ok = [t for t in tickers if t not in failed]
+    worst = sorted(ok, key=lambda t: results[t]["drawdown"]["max_drawdown"])[:10]
+    for ticker in worst:
+        max_dd = results[ticker]["drawdown"]["max_drawdown"]
+        var_99 = results[ticker]["var"]["var"]["VaR_99"]
+        print(f"{ticker:<8} {max_dd:>8.2%}  {var_99:>8.2%}")
+    if failed:
+        print(f"\nFailed for {len(failed)} tickers: {', '.join(failed[:10])}")
 
 
 # ============================================================================
@@ -350,6 +942,7 @@ if __name__ == "__main__":
         workflow_3_portfolio_optimization()
         workflow_4_risk_monitoring()
         workflow_5_stress_testing()
+        workflow_6_async_risk_sweep()
         
         print("\n" + "="*70)
         print("✓ All workflows completed successfully!")
@@ -0,0 +1,246 @@
+"""
+Multi-factor exposure engine (market, size, sector) over the price universe
+Every ticker is regressed on one shared factor design matrix; a single QR
+factorization per sample solves all tickers at once
+"""
+
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from sector_analytics import aggregate_returns
+
+TRADING_DAYS = 252
+
+FACTOR_GROUPS = ("market", "size", "sector")
+
+
+def build_factor_returns(
+    returns: pd.DataFrame,
+    master: pd.DataFrame,
+    factor_groups: Sequence[str] = FACTOR_GROUPS
+) -> pd.DataFrame:
+    """
+    Daily factor return series from the universe return matrix
+
+    - market: market-cap-weighted universe return
+    - size: equal-weighted bottom-tercile minus top-tercile by market cap (SMB)
+    - sector_<name>: cap-weighted sector return minus market. Cap-weighted
+      spreads sum to zero across sectors, so the largest sector is the
+      reference and gets no column.
+
+    Args:
+        returns: date x ticker simple returns
+        master: equity_master frame indexed by ticker
+        factor_groups: Subset of FACTOR_GROUPS to build
+
+    Returns:
+        date x factor returns (dates where every factor is defined)
+    """
+    caps = master["market_cap"]
+    factors = {}
+
+    market, _ = aggregate_returns(returns, None, caps)
+    market = market.iloc[:, 0]
+    if "market" in factor_groups:
+        factors["market"] = market
+
+    if "size" in factor_groups:
+        known_caps = caps.reindex(returns.columns).dropna()
+        terciles = pd.qcut(known_caps, 3, labels=["small", "mid", "big"])
+        size_returns, _ = aggregate_returns(returns, terciles.astype(str))
+        factors["size"] = size_returns["small"] - size_returns["big"]
+
+    if "sector" in factor_groups:
+        sectors = master["sector"]
+        sector_returns, _ = aggregate_returns(returns, sectors, caps)
+        sector_caps = caps.groupby(sectors).sum()
+        reference = sector_caps.reindex(sector_returns.columns).idxmax()
+        for name in sector_returns.columns:
+            if name != reference:
+                factors[f"sector_{name}"] = sector_returns[name] - market
+
+    return pd.DataFrame(factors).dropna()
+
+
+def _design(factor_values: np.ndarray) -> np.ndarray:
+    """Prepend an intercept column"""
+    return np.column_stack([np.ones(len(factor_values)), factor_values])
+
+
+def _solve(X: np.ndarray, Y: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    OLS of every column of Y on X via one QR factorization
+
+    Returns:
+        coefficients (k x m), standard errors (k x m), r_squared (m),
+        residual_vol (m, daily)
+    """
+    n, k = X.shape
+    Q, R = np.linalg.qr(X)
+
+    diag = np.abs(np.diag(R))
+    if diag.min() <= 1e-10 * diag.max():
+        raise ValueError("Factor design matrix is rank deficient")
+
+    coef = np.linalg.solve(R, Q.T @ Y)
+    resid = Y - X @ coef
+    dof = max(n - k, 1)
+    sigma2 = (resid ** 2).sum(axis=0) / dof
+
+    # diag((X'X)^-1) = squared row norms of R^-1
+    r_inv = np.linalg.inv(R)
+    xtx_inv_diag = (r_inv ** 2).sum(axis=1)
+    stderr = np.sqrt(np.outer(xtx_inv_diag, sigma2))
+
+    centered = Y - Y.mean(axis=0)
+    tss = (centered ** 2).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r_squared = 1.0 - (resid ** 2).sum(axis=0) / tss
+
+    return {
+        "coef": coef,
+        "stderr": stderr,
+        "r_squared": r_squared,
+        "residual_vol": np.sqrt(sigma2),
+    }
+
+
+def fit_exposures(
+    asset_returns: pd.DataFrame,
+    factor_returns: pd.DataFrame,
+    min_observations: int = 60
+) -> Dict[str, np.ndarray]:
+    """
+    Full-sample factor exposures for every ticker
+
+    Tickers sharing the same set of valid dates (almost always: full
+    coverage) share one QR factorization. Tickers with fewer than
+    min_observations valid dates get NaN.
+
+    Args:
+        asset_returns: date x ticker simple returns
+        factor_returns: date x factor returns
+        min_observations: Minimum overlapping dates per ticker
+
+    Returns:
+        Dict of arrays: coef / stderr (k x m, intercept first), r_squared,
+        residual_vol, observations (m)
+    """
+    dates = asset_returns.index.intersection(factor_returns.index)
+    Y = asset_returns.loc[dates].to_numpy()
+    F = factor_returns.loc[dates].to_numpy()
+    X = _design(F)
+
+    m = Y.shape[1]
+    k = X.shape[1]
+    out = {
+        "coef": np.full((k, m), np.nan),
+        "stderr": np.full((k, m), np.nan),
+        "r_squared": np.full(m, np.nan),
+        "residual_vol": np.full(m, np.nan),
+        "observations": np.isfinite(Y).sum(axis=0),
+    }
+
+    valid = np.isfinite(Y)
+    patterns, group_of = np.unique(valid, axis=1, return_inverse=True)
+    group_of = np.asarray(group_of).ravel()
+
+    for g in range(patterns.shape[1]):
+        rows = patterns[:, g]
+        if rows.sum() < max(min_observations, k + 1):
+            continue
+        cols = np.flatnonzero(group_of == g)
+        try:
+            fit = _solve(X[rows], Y[np.ix_(rows, cols)])
+        except ValueError:
+            continue
+        out["coef"][:, cols] = fit["coef"]
+        out["stderr"][:, cols] = fit["stderr"]
+        out["r_squared"][cols] = fit["r_squared"]
+        out["residual_vol"][cols] = fit["residual_vol"]
+
+    return out
+
+
+def rolling_exposures(
+    asset_returns: pd.DataFrame,
+    factor_returns: pd.DataFrame,
+    window: int,
+    step: int = 1
+) -> Dict[str, object]:
+    """
+    Rolling-window factor betas for every ticker
+
+    Each window is one QR of the shared design solved for all tickers with
+    complete data in that window; the others are NaN for that window.
+
+    Args:
+        asset_returns: date x ticker simple returns
+        factor_returns: date x factor returns
+        window: Window length in days
+        step: Days between window ends
+
+    Returns:
+        {"dates": window end dates, "betas": array (n_windows, k, m)}
+    """
+    dates = asset_returns.index.intersection(factor_returns.index)
+    Y = asset_returns.loc[dates].to_numpy()
+    X = _design(factor_returns.loc[dates].to_numpy())
+
+    n, m = Y.shape
+    k = X.shape[1]
+    ends = list(range(window, n + 1, step))
+    betas = np.full((len(ends), k, m), np.nan)
+
+    complete = np.isfinite(Y).astype(np.int64)
+    csum = np.vstack([np.zeros((1, m), dtype=np.int64), np.cumsum(complete, axis=0)])
+
+    for i, end in enumerate(ends):
+        start = end - window
+        cols = np.flatnonzero(csum[end] - csum[start] == window)
+        if cols.size == 0:
+            continue
+        try:
+            fit = _solve(X[start:end], Y[start:end, cols])
+        except ValueError:
+            continue
+        betas[i][:, cols] = fit["coef"]
+
+    return {"dates": [dates[e - 1] for e in ends], "betas": betas}
+
+
+def exposure_table(
+    fit: Dict[str, np.ndarray],
+    tickers: List[str],
+    factor_names: List[str]
+) -> Dict[str, Dict]:
+    """
+    Per-ticker JSON-ready exposure summary
+
+    Returns:
+        ticker -> {alpha (annualized), betas, t_stats, r_squared,
+        residual_vol (annualized), observations}
+    """
+    def clean(v):
+        v = float(v)
+        return v if np.isfinite(v) else None
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t_stats = fit["coef"] / fit["stderr"]
+
+    table = {}
+    for j, ticker in enumerate(tickers):
+        table[ticker] = {
+            "alpha": clean(fit["coef"][0, j] * TRADING_DAYS),
+            "betas": {f: clean(fit["coef"][i + 1, j]) for i, f in enumerate(factor_names)},
+            "t_stats": {
+                "alpha": clean(t_stats[0, j]),
+                **{f: clean(t_stats[i + 1, j]) for i, f in enumerate(factor_names)}
+            },
+            "r_squared": clean(fit["r_squared"][j]),
+            "residual_vol": clean(fit["residual_vol"][j] * np.sqrt(TRADING_DAYS)),
+            "observations": int(fit["observations"][j]),
+        }
+    return table
@@ -0,0 +1,31 @@
+"""
+gunicorn settings for the Flask service (app.py)
+
+    gunicorn -c gunicorn_app.py app:app
+
+The app is imported once in the master (preload_app) and its ticker series
+cache warmed there before forking, so workers start with every series in
+memory and share those pages copy-on-write until an ingest invalidates them.
+"""
+
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get("QUANT_FLASK_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+threads = int(os.environ.get("QUANT_FLASK_THREADS", 1))
+preload_app = True
+timeout = 120
+
+
+def on_starting(server):
+    """Warm the preloaded app's series cache in the master"""
+    import app
+    if os.environ.get("QUANT_FLASK_WARM", "1") == "1":
+        app.series_cache.warm()
+    # Workers open their own connections; don't hand them the master's
+    app.db_pool.close_all()
+    # Keep the warmed objects out of the collector so its passes don't
+    # write to (and un-share) their pages in every worker
+    gc.freeze()
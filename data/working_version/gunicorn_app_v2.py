@@ -0,0 +1,25 @@
+"""
+gunicorn settings for app_v2 under several uvicorn workers that share one
+copy of the universe price/volume/return matrices (see shared_matrix.py)
+
+    gunicorn -c gunicorn_app_v2.py app_v2:app
+"""
+
+import multiprocessing
+import os
+
+from shared_matrix import default_root
+
+# Workers inherit the environment, so they all attach to the same directory
+os.environ.setdefault("QUANT_SHARED_MATRIX_DIR", str(default_root()))
+
+bind = os.environ.get("QUANT_API_BIND", "0.0.0.0:5001")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = 120
+
+
+def on_starting(server):
+    """Publish the matrices once in the master so every worker starts warm"""
+    import app_v2
+    app_v2.publish_shared_matrices()
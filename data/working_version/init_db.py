@@ -3,11 +3,18 @@ Initialize SQLite database with sample market data
 Run this script to set up the database for the Flask API
 """
 
+import sys
+import argparse
 import sqlite3
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 
+from queries import (
+    query_shapes, benchmark_query_shapes, refresh_ticker_stats_query, TICKER_STATS_DDL,
+    CHANGE_LOG_DDL
+)
+
 def create_database(db_path="market_data.db"):
     """Create SQLite database with schema"""
     conn = sqlite3.connect(db_path)
@@ -27,15 +34,125 @@ def create_database(db_path="market_data.db"):
     )
     """)
     
-    # Create indexes for fast queries
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ticker ON stock_prices(ticker)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_date ON stock_prices(date)")
+    cursor.execute(TICKER_STATS_DDL)
+    ensure_indexes(conn)
+    ensure_change_log(conn)
     
     conn.commit()
     print(f"✓ Database schema created at {db_path}")
     return conn
 
 
+def ensure_indexes(conn):
+    """
+    Create the (ticker, date) covering index and drop the redundant ones
+    
+    Every API query is `WHERE ticker = ? [AND date ...] ORDER BY date`, so a
+    (ticker, date, close, volume) index serves the filter, the sort and the
+    selected columns without touching the table. The old single-column
+    indexes are prefixes of this one (idx_ticker) or of the primary key
+    (idx_date) and only cost write time. Safe to run on existing databases.
+    
+    Returns:
+        True if the index had to be created
+    """
+    cursor = conn.cursor()
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_ticker_date'"
+    ).fetchone()
+    
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_ticker_date "
+        "ON stock_prices(ticker, date, close, volume)"
+    )
+    cursor.execute("DROP INDEX IF EXISTS idx_ticker")
+    cursor.execute("DROP INDEX IF EXISTS idx_date")
+    
+    if not exists:
+        cursor.execute("ANALYZE stock_prices")
+    conn.commit()
+    return not exists
+
+
+def ensure_change_log(conn):
+    """
+    Create the price_changes log and the triggers that fill it
+    
+    Bars present before the log existed are not in it; clients catch up
+    on those with a since_date delta (or a full load) once, then follow
+    change versions. Safe to run on existing databases.
+    
+    Returns:
+        True if the log had to be created
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'price_changes'"
+    ).fetchone()
+    for statement in CHANGE_LOG_DDL:
+        conn.execute(statement)
+    conn.commit()
+    return not exists
+
+
+def refresh_ticker_stats(conn, tickers=None):
+    """
+    Recompute ticker_stats rows after an ingest
+    
+    Args:
+        conn: SQLite connection
+        tickers: Tickers touched by the ingest; None rebuilds the whole table
+    """
+    conn.execute(TICKER_STATS_DDL)
+    
+    if tickers is None:
+        conn.execute(refresh_ticker_stats_query())
+    else:
+        tickers = list(tickers)
+        conn.execute(refresh_ticker_stats_query(len(tickers)), tickers)
+    
+    conn.commit()
+
+
+def check_query_plans(conn, verbose=True, benchmark_db=None):
+    """
+    Run EXPLAIN QUERY PLAN for every query shape the API issues
+    
+    A shape fails if SQLite scans a table (with or without an index) or
+    builds a temp B-tree to sort.
+    
+    Args:
+        conn: SQLite connection to the market data database
+        verbose: Print each shape's plan
+        benchmark_db: Optional benchmark_data.db path; when given it is
+            attached and the benchmark join shapes are checked too
+    
+    Returns:
+        List of (shape_name, plan_detail) failures; empty if all shapes pass
+    """
+    failures = []
+    shapes = query_shapes()
+    
+    if benchmark_db:
+        conn.execute("ATTACH DATABASE ? AS bench", [str(benchmark_db)])
+        shapes.update(benchmark_query_shapes())
+    
+    for name, (query, params) in shapes.items():
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+        details = [row[-1] for row in plan]
+        
+        bad = [
+            d for d in details
+            if d.startswith("SCAN ") or "USE TEMP B-TREE" in d
+        ]
+        failures.extend((name, d) for d in bad)
+        
+        if verbose:
+            mark = "✗" if bad else "✓"
+            print(f"{mark} {name}: {' | '.join(details)}")
+    
+    return failures
+
+
 def generate_synthetic_data(ticker, start_date, num_days=252, initial_price=100):
     """Generate realistic synthetic OHLCV data"""
     dates = []
@@ -106,6 +223,7 @@ def populate_sample_data(conn):
         insert_data(conn, df)
     
     conn.commit()
+    refresh_ticker_stats(conn, tickers)
 
 
 def verify_database(conn):
@@ -134,10 +252,40 @@ def verify_database(conn):
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Market data database setup")
+    parser.add_argument("--db", default="market_data.db", help="SQLite database path")
+    parser.add_argument(
+        "--check-plans",
+        action="store_true",
+        help="Add missing tables/indexes to an existing database and verify query plans"
+    )
+    parser.add_argument(
+        "--benchmark-db",
+        help="benchmark_data.db path; also checks the benchmark join shapes"
+    )
+    args = parser.parse_args()
+    
+    if args.check_plans:
+        conn = sqlite3.connect(args.db)
+        conn.execute(TICKER_STATS_DDL)
+        ensure_indexes(conn)
+        ensure_change_log(conn)
+        failures = check_query_plans(conn, benchmark_db=args.benchmark_db)
+        conn.close()
+        
+        if failures:
+            print(f"\n✗ {len(failures)} query shape(s) scan or sort:")
+            for name, detail in failures:
+                print(f"  {name}: {detail}")
+            sys.exit(1)
+        
+        print("\n✓ All query shapes use the (ticker, date) index")
+        sys.exit(0)
+    
     print("=== Market Data Database Setup ===\n")
     
     # Create database
-    conn = create_database()
+    conn = create_database(args.db)
     
     # Populate with sample data
     populate_sample_data(conn)
@@ -145,5 +293,9 @@ if __name__ == "__main__":
     # Verify
     verify_database(conn)
     
+    print("\nQuery plans:")
+    if check_query_plans(conn):
+        print("\n✗ Some query shapes fall back to a scan or sort")
+    
     conn.close()
     print("\n✓ Database setup complete! Ready to run Flask app.")
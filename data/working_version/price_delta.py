@@ -0,0 +1,68 @@
+"""
+Incremental updates of rolling statistics for changed price bars
+A changed close only moves the rolling values whose window contains it,
+so a delta needs `window` warm-up closes before the first change plus the
+changed tail, never the full history
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def affected_rows(changed: np.ndarray, window: int) -> np.ndarray:
+    """
+    Rows whose rolling window of closes contains a changed close
+
+    Row i's return uses closes i-1..i and its rolling volatility uses
+    returns i-window+1..i, i.e. closes i-window..i.
+
+    Args:
+        changed: Boolean mask of changed rows
+        window: Rolling window in returns
+
+    Returns:
+        Boolean mask of rows whose return or volatility moved
+    """
+    counts = np.concatenate([[0], np.cumsum(changed)])
+    idx = np.arange(len(changed))
+    return counts[idx + 1] - counts[np.maximum(idx - window, 0)] > 0
+
+
+def rolling_update(
+    dates: List[str],
+    closes: np.ndarray,
+    changed: np.ndarray,
+    window: int
+) -> Dict[str, List[Optional[float]]]:
+    """
+    Log returns and rolling volatility at every row a change affected
+
+    Same convention as /volatility: daily standard deviation (ddof=1) of
+    the last `window` log returns. Values needing history before the
+    loaded closes are None.
+
+    Args:
+        dates: Sorted dates, starting with up to `window` warm-up rows
+        closes: Close per date
+        changed: Boolean mask of changed rows
+        window: Rolling window in returns
+
+    Returns:
+        {"dates", "returns", "volatility"} aligned lists
+    """
+    closes = pd.Series(np.asarray(closes, dtype=np.float64))
+    returns = np.log(closes / closes.shift(1))
+    volatility = returns.rolling(window=window).std()
+
+    rows = np.flatnonzero(affected_rows(np.asarray(changed, dtype=bool), window))
+
+    def clean(values):
+        return [float(v) if np.isfinite(v) else None for v in values]
+
+    return {
+        "dates": [dates[i] for i in rows],
+        "returns": clean(returns.to_numpy()[rows]),
+        "volatility": clean(volatility.to_numpy()[rows]),
+    }
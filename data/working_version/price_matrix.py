@@ -0,0 +1,214 @@
+"""
+Aligned date x ticker price and return matrices for universe-wide analytics
+Loaded with one query per date range and cached until the database changes;
+optionally backed by full-history matrices in shared memory (shared_matrix)
+so several worker processes hold a single copy
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional
+
+import numpy as np
+import pandas as pd
+
+from queries import universe_close_query
+from shared_matrix import SharedMatrixStore, build_matrices
+
+logger = logging.getLogger(__name__)
+
+
+class PriceMatrixCache:
+    """
+    Date x ticker close matrices keyed by date range
+
+    Every entry is tagged with the database data version at load time; a
+    new ingest changes the version and the next lookup reloads. Derived
+    results (sector aggregates, factor fits, ...) can be memoized through
+    `memo` and are invalidated together with the matrices.
+
+    With a SharedMatrixStore, closes/volumes/returns for any date range
+    are slices of the shared full-history matrices instead of per-range
+    queries, and the matrices are read-only views of shared pages.
+    """
+
+    def __init__(self, db_manager, max_entries: int = 16,
+                 shared: Optional[SharedMatrixStore] = None):
+        self.db_manager = db_manager
+        self.max_entries = max_entries
+        self.shared = shared
+        self._entries: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _check_version(self):
+        """Drop every cached entry if the database changed"""
+        version = self.db_manager.data_version()
+        if version != self._version:
+            if self._entries:
+                logger.info("Database changed - clearing price matrix cache")
+            self._entries.clear()
+            self._version = version
+
+    def memo(self, key: Hashable, compute: Callable[[], object]):
+        """
+        Return the cached value for key, computing it on a miss
+
+        Args:
+            key: Hashable cache key (include every input that changes the result)
+            compute: Zero-argument function producing the value
+
+        Returns:
+            Cached or freshly computed value
+        """
+        with self._lock:
+            self._check_version()
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        value = compute()
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def closes(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        Date x ticker close matrix (NaN where a ticker has no bar)
+
+        Args:
+            start_date: Optional start date (YYYY-MM-DD)
+            end_date: Optional end date (YYYY-MM-DD)
+
+        Returns:
+            DataFrame indexed by date string, one column per ticker
+        """
+        if self.shared is not None:
+            return self.memo(
+                ("closes", start_date, end_date),
+                lambda: self._shared_slice("close", start_date, end_date)
+            )
+        return self.memo(
+            ("closes", start_date, end_date),
+            lambda: self._load_matrix("close", start_date, end_date)
+        )
+
+    def volumes(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> pd.DataFrame:
+        """Date x ticker volume matrix, aligned like `closes`"""
+        if self.shared is not None:
+            return self.memo(
+                ("volumes", start_date, end_date),
+                lambda: self._shared_slice("volume", start_date, end_date)
+            )
+        return self.memo(
+            ("volumes", start_date, end_date),
+            lambda: self._load_matrix("volume", start_date, end_date)
+        )
+
+    def returns(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        return_type: str = "simple"
+    ) -> pd.DataFrame:
+        """
+        Date x ticker return matrix derived from the cached closes
+
+        Returns are only computed between consecutive bars of the same
+        ticker; dates before listing or after delisting stay NaN.
+
+        Args:
+            start_date: Optional start date
+            end_date: Optional end date
+            return_type: 'simple' or 'log'
+
+        Returns:
+            DataFrame of returns, first date dropped
+        """
+        def compute():
+            if self.shared is not None:
+                return self._shared_slice(
+                    f"returns_{'log' if return_type == 'log' else 'simple'}",
+                    start_date, end_date
+                ).iloc[1:]
+            closes = self.closes(start_date, end_date)
+            if return_type == "log":
+                rets = np.log(closes / closes.shift(1))
+            else:
+                rets = closes / closes.shift(1) - 1
+            return rets.iloc[1:]
+
+        return self.memo(("returns", start_date, end_date, return_type), compute)
+
+    def shared_matrices(self) -> Dict[str, pd.DataFrame]:
+        """
+        Full-history matrices mapped from shared memory for the current
+        database version, published by this process if no other has
+        """
+        def attach():
+            with self._lock:
+                version = self._version
+            return self.shared.get_or_publish(
+                version,
+                lambda: build_matrices(
+                    self._load_matrix("close", None, None),
+                    self._load_matrix("volume", None, None)
+                )
+            )
+
+        return self.memo(("shared",), attach)
+
+    def _shared_slice(self, name, start_date, end_date) -> pd.DataFrame:
+        """
+        Date range of a shared matrix, shaped like a per-range query
+
+        Rows between the dates are a view of the shared pages; tickers
+        without a bar in the range are dropped (which copies, as a range
+        query would not return them).
+        """
+        matrices = self.shared_matrices()
+        frame = matrices[name].loc[start_date:end_date]
+        traded = matrices["close"].loc[start_date:end_date].notna().any().to_numpy()
+        if not traded.all():
+            frame = frame.loc[:, traded]
+        return frame
+
+    def _load_matrix(self, column, start_date, end_date) -> pd.DataFrame:
+        """Single query for the whole universe, pivoted to date x ticker"""
+        query = universe_close_query(bool(start_date), bool(end_date), column)
+        params = [d for d in (start_date, end_date) if d]
+
+        conn = self.db_manager.get_connection()
+        try:
+            long_df = pd.read_sql(query, conn, params=params)
+        finally:
+            conn.close()
+
+        matrix = long_df.pivot(index="date", columns="ticker", values=column)
+        matrix = matrix.sort_index().astype(np.float64)
+        logger.info(
+            f"Loaded {column} matrix {matrix.shape[0]} dates x {matrix.shape[1]} tickers "
+            f"({start_date or 'start'} to {end_date or 'end'})"
+        )
+        return matrix
+
+
+def frame_to_json(df: pd.DataFrame) -> Dict[str, list]:
+    """Column -> list mapping with NaN/inf replaced by None (JSON safe)"""
+    values = df.to_numpy(dtype=np.float64).T
+    cells = values.astype(object)
+    cells[~np.isfinite(values)] = None
+    return dict(zip(map(str, df.columns), cells.tolist()))
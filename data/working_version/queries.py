@@ -0,0 +1,328 @@
+"""
+SQL query shapes issued by the Quant Finance API
+Kept in one module so init_db can EXPLAIN QUERY PLAN every shape app_v2 runs
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+# ============================================================================
+# PRICE SERIES QUERIES
+# ============================================================================
+
+def price_series_query(
+    columns: str = "date, close",
+    has_start: bool = False,
+    has_end: bool = False,
+    latest_first: bool = False,
+    has_limit: bool = False
+) -> str:
+    """
+    Build the per-ticker price query used by the data and analytics endpoints
+
+    Args:
+        columns: Column list to select
+        has_start: Add a `date >= ?` bound
+        has_end: Add a `date <= ?` bound
+        latest_first: Order newest first (used with LIMIT for /prices)
+        has_limit: Add a `LIMIT ?` clause
+
+    Returns:
+        SQL string served by the (ticker, date) covering index
+    """
+    query = f"SELECT {columns} FROM stock_prices WHERE ticker = ?"
+
+    if has_start:
+        query += " AND date >= ?"
+    if has_end:
+        query += " AND date <= ?"
+
+    query += " ORDER BY date DESC" if latest_first else " ORDER BY date"
+
+    if has_limit:
+        query += " LIMIT ?"
+
+    return query
+
+
+def build_price_query(
+    ticker: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    columns: str = "date, close",
+    latest_first: bool = False,
+    limit: Optional[int] = None
+) -> Tuple[str, List]:
+    """
+    Build a price query together with its parameters
+
+    Returns:
+        (query, params) tuple ready for execute_query
+    """
+    query = price_series_query(
+        columns=columns,
+        has_start=bool(start_date),
+        has_end=bool(end_date),
+        latest_first=latest_first,
+        has_limit=limit is not None
+    )
+    params = [ticker] + [d for d in (start_date, end_date) if d]
+    if limit is not None:
+        params.append(limit)
+    return query, params
+
+def universe_close_query(
+    has_start: bool = False,
+    has_end: bool = False,
+    column: str = "close"
+) -> str:
+    """
+    Build the whole-universe query used to assemble date x ticker matrices
+
+    Bounded by date it is a range seek on the (date, ticker) primary key;
+    the unbounded form is a deliberate single pass whose result is cached.
+    `column` selects the value column (close or volume).
+    """
+    query = f"SELECT date, ticker, {column} FROM stock_prices"
+
+    bounds = []
+    if has_start:
+        bounds.append("date >= ?")
+    if has_end:
+        bounds.append("date <= ?")
+    if bounds:
+        query += " WHERE " + " AND ".join(bounds)
+
+    return query
+
+def benchmark_join_query(
+    n_tickers: Optional[int] = None,
+    has_start: bool = False,
+    has_end: bool = False
+) -> str:
+    """
+    Build the asset/benchmark close join (benchmark_data.db attached as `bench`)
+
+    Args:
+        n_tickers: Number of `?` ticker placeholders; None joins every ticker
+        has_start: Add a `date >= ?` bound
+        has_end: Add a `date <= ?` bound
+
+    Returns:
+        SQL string; params are benchmark, tickers..., start, end
+    """
+    query = """
+    SELECT p.date, p.ticker, p.close, b.close AS benchmark_close
+    FROM bench.benchmark_data b
+    JOIN stock_prices p ON p.date = b.date
+    WHERE b.ticker = ?"""
+
+    if n_tickers is not None:
+        query += f" AND p.ticker IN ({', '.join('?' * n_tickers)})"
+    if has_start:
+        query += " AND b.date >= ?"
+    if has_end:
+        query += " AND b.date <= ?"
+
+    return query
+
+# ============================================================================
+# METADATA QUERIES
+# ============================================================================
+
+# Per-ticker summary maintained by ingest; /available-tickers and
+# /ticker-info are served from an in-memory copy of this table
+TICKER_STATS_DDL = """
+CREATE TABLE IF NOT EXISTS ticker_stats (
+    ticker TEXT PRIMARY KEY,
+    record_count INTEGER NOT NULL,
+    earliest_date TEXT NOT NULL,
+    latest_date TEXT NOT NULL,
+    avg_volume REAL,
+    last_close REAL,
+    updated_at TEXT NOT NULL
+)
+"""
+
+LOAD_TICKER_STATS_QUERY = """
+SELECT ticker, record_count, earliest_date, latest_date, avg_volume, last_close
+FROM ticker_stats
+ORDER BY ticker
+"""
+
+
+def refresh_ticker_stats_query(n_tickers: Optional[int] = None) -> str:
+    """
+    Build the upsert that recomputes ticker_stats rows from stock_prices
+
+    Args:
+        n_tickers: Number of `?` ticker placeholders; None rebuilds every ticker
+
+    Returns:
+        SQL string; one index seek per ticker, or one covering-index pass
+        for a full rebuild
+    """
+    where = ""
+    if n_tickers is not None:
+        where = f"WHERE s.ticker IN ({', '.join('?' * n_tickers)})"
+
+    return f"""
+    INSERT OR REPLACE INTO ticker_stats (
+        ticker, record_count, earliest_date, latest_date,
+        avg_volume, last_close, updated_at
+    )
+    SELECT
+        s.ticker,
+        COUNT(*),
+        MIN(s.date),
+        MAX(s.date),
+        AVG(s.volume),
+        (SELECT p.close FROM stock_prices p
+         WHERE p.ticker = s.ticker ORDER BY p.date DESC LIMIT 1),
+        datetime('now')
+    FROM stock_prices s
+    {where}
+    GROUP BY s.ticker
+    """
+
+# ============================================================================
+# CHANGE LOG
+# ============================================================================
+
+# One row per inserted or updated (ticker, date) bar, written by triggers so
+# every writer (CSV ingest, init_db, manual fixes) is captured. seq is the
+# data version handed to delta clients.
+CHANGE_LOG_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS price_changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        ticker TEXT NOT NULL,
+        date TEXT NOT NULL,
+        change TEXT NOT NULL,
+        changed_at TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_price_changes_ticker ON price_changes(ticker, seq)",
+    """
+    CREATE TRIGGER IF NOT EXISTS log_price_insert AFTER INSERT ON stock_prices
+    BEGIN
+        INSERT INTO price_changes (ticker, date, change, changed_at)
+        VALUES (NEW.ticker, NEW.date, 'insert', datetime('now'));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS log_price_update AFTER UPDATE ON stock_prices
+    BEGIN
+        INSERT INTO price_changes (ticker, date, change, changed_at)
+        VALUES (NEW.ticker, NEW.date, 'update', datetime('now'));
+    END
+    """,
+]
+
+CHANGE_VERSION_QUERY = "SELECT COALESCE(MAX(seq), 0) AS version FROM price_changes"
+
+
+def changed_keys_query(n_tickers: Optional[int] = None) -> str:
+    """
+    One page of (ticker, date, change) entries logged in a version range
+
+    Args:
+        n_tickers: Number of `?` ticker placeholders; None covers every ticker
+
+    Returns:
+        SQL taking (since_version, until_version, limit) or
+        (*tickers, since_version, until_version, limit), oldest first; a seq
+        range on the log's primary key, or an idx_price_changes_ticker seek
+        per ticker. The changed bars are then read with per-ticker range seeks.
+    """
+    where = "seq > ? AND seq <= ?"
+    if n_tickers is not None:
+        where = f"ticker IN ({', '.join('?' * n_tickers)}) AND {where}"
+    return (
+        f"SELECT seq, ticker, date, change FROM price_changes WHERE {where} "
+        "ORDER BY seq LIMIT ?"
+    )
+
+
+# Tickers with bars logged in a version range (since_version, until_version)
+CHANGED_TICKERS_QUERY = "SELECT DISTINCT ticker FROM price_changes WHERE seq > ? AND seq <= ?"
+
+
+def rows_after_date_query(n_tickers: Optional[int] = None) -> str:
+    """
+    Bars dated after a given date, for clients without a change version
+
+    Returns:
+        SQL taking (since_date, *tickers, limit); a (ticker, date) index seek
+        per ticker, or a range seek on the (date, ticker) primary key for
+        every ticker. Unordered: callers sort the (small) result.
+    """
+    query = "SELECT *, 'insert' AS change FROM stock_prices WHERE date > ?"
+    if n_tickers is not None:
+        query += f" AND ticker IN ({', '.join('?' * n_tickers)})"
+    return query + " LIMIT ?"
+
+
+# Warm-up closes preceding the first changed bar, newest first
+CLOSES_BEFORE_QUERY = """
+SELECT date, close FROM stock_prices
+WHERE ticker = ? AND date < ?
+ORDER BY date DESC
+LIMIT ?
+"""
+
+# ============================================================================
+# QUERY SHAPE CATALOGUE
+# ============================================================================
+
+def benchmark_query_shapes() -> Dict[str, Tuple[str, List]]:
+    """
+    Query shapes that need benchmark_data.db attached as `bench`
+
+    Returns:
+        Mapping of shape name -> (query, params)
+    """
+    return {
+        "benchmark_join_tickers": (
+            benchmark_join_query(2, True, True),
+            ["SP500", "AAPL", "MSFT", "2022-01-01", "2022-12-31"]
+        ),
+        "benchmark_join_universe": (
+            benchmark_join_query(None, True, True),
+            ["SP500", "2022-01-01", "2022-12-31"]
+        ),
+    }
+
+
+def query_shapes() -> Dict[str, Tuple[str, List]]:
+    """
+    Every query shape app_v2 and ingest issue against stock_prices, with
+    sample params
+
+    Unbounded universe loads are intentional full passes (cached by
+    PriceMatrixCache), so only their date-bounded form is catalogued.
+
+    Returns:
+        Mapping of shape name -> (query, params)
+    """
+    shapes = {
+        "refresh_ticker_stats": (refresh_ticker_stats_query(2), ["AAPL", "MSFT"]),
+        "universe_closes_start_end": (
+            universe_close_query(True, True), ["2020-01-01", "2020-12-31"]
+        ),
+        "delta_since_version": (changed_keys_query(2), ["AAPL", "MSFT", 0, 10**9, 50001]),
+        "delta_since_version_all": (changed_keys_query(), [0, 10**9, 50001]),
+        "delta_changed_tickers": (CHANGED_TICKERS_QUERY, [0, 10**9]),
+        "delta_since_date": (rows_after_date_query(2), ["2024-01-01", "AAPL", "MSFT", 50001]),
+        "delta_since_date_all": (rows_after_date_query(), ["2024-01-01", 50001]),
+        "delta_warmup_closes": (CLOSES_BEFORE_QUERY, ["AAPL", "2024-01-01", 21]),
+    }
+
+    for start in (None, "2020-01-01"):
+        for end in (None, "2020-12-31"):
+            suffix = f"{'start' if start else 'nostart'}_{'end' if end else 'noend'}"
+            shapes[f"prices_{suffix}"] = build_price_query(
+                "AAPL", start, end, columns="*", latest_first=True, limit=1000
+            )
+            shapes[f"close_series_{suffix}"] = build_price_query("AAPL", start, end)
+
+    return shapes
@@ -0,0 +1,175 @@
+"""
+Historical scenario replay and hypothetical factor shocks
+Each scenario is a ticker -> return vector computed once and cached; a
+batch of portfolios is repriced against every scenario with one
+(portfolios x tickers) @ (tickers x scenarios) matrix product
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Named stress windows replayed from stock_prices (peak-to-trough dates)
+HISTORICAL_SCENARIOS = {
+    "dotcom_2000": ("2000-03-24", "2002-10-09", "Dot-com bust"),
+    "gfc_2008": ("2008-09-12", "2009-03-09", "Lehman collapse to the 2009 low"),
+    "flash_crash_2010": ("2010-04-23", "2010-07-02", "Flash crash and euro crisis"),
+    "us_downgrade_2011": ("2011-07-22", "2011-10-03", "US downgrade sell-off"),
+    "volmageddon_2018": ("2018-01-26", "2018-02-08", "Volatility spike"),
+    "q4_2018": ("2018-09-20", "2018-12-24", "Q4 2018 tightening sell-off"),
+    "covid_2020": ("2020-02-19", "2020-03-23", "COVID-19 crash"),
+    "rates_2022": ("2022-01-03", "2022-10-12", "2022 rate-hike bear market"),
+}
+
+
+def scenario_vector(closes: pd.DataFrame) -> pd.Series:
+    """
+    Per-ticker simple return between the first and last date of a window
+
+    Tickers without a close on both dates get NaN (see proxy_missing).
+
+    Args:
+        closes: date x ticker closes restricted to the scenario window
+
+    Returns:
+        ticker -> scenario return
+    """
+    if len(closes) < 2:
+        return pd.Series(np.nan, index=closes.columns)
+    return closes.iloc[-1] / closes.iloc[0] - 1.0
+
+
+def proxy_missing(
+    shocks: pd.Series,
+    master: Optional[pd.DataFrame] = None
+) -> Tuple[pd.Series, pd.Series]:
+    """
+    Fill tickers without their own scenario return with a proxy
+
+    The proxy is the market-cap-weighted return of the ticker's sector,
+    falling back to the cap-weighted (or equal-weighted without a master)
+    return of every ticker that has one.
+
+    Args:
+        shocks: ticker -> scenario return (NaN where missing)
+        master: equity_master frame indexed by ticker
+
+    Returns:
+        (filled shocks, boolean mask of proxied tickers)
+    """
+    missing = shocks.isna()
+    if not missing.any():
+        return shocks, missing
+
+    known = shocks[~missing]
+    if known.empty:
+        return shocks, pd.Series(False, index=shocks.index)
+
+    if master is None:
+        return shocks.fillna(known.mean()), missing
+
+    caps = master["market_cap"].reindex(shocks.index).fillna(0.0)
+    sectors = master["sector"].reindex(shocks.index)
+
+    weighted = (known * caps[known.index]).groupby(sectors[known.index]).sum()
+    mass = caps[known.index].groupby(sectors[known.index]).sum()
+    sector_shock = (weighted / mass.where(mass > 0)).dropna()
+
+    total = caps[known.index].sum()
+    market = float((known * caps[known.index]).sum() / total) if total > 0 else float(known.mean())
+
+    fill = sectors[missing].map(sector_shock).fillna(market)
+    filled = shocks.copy()
+    filled[missing] = fill
+    return filled, missing
+
+
+def factor_shock_vector(
+    betas: np.ndarray,
+    factor_names: List[str],
+    shocks: Dict[str, float]
+) -> np.ndarray:
+    """
+    Ticker returns implied by a hypothetical factor shock
+
+    Args:
+        betas: factor x ticker exposures (no intercept row)
+        factor_names: Row labels of betas
+        shocks: factor -> shocked factor return (e.g. {"market": -0.2})
+
+    Returns:
+        Per-ticker implied return (NaN where betas are unknown)
+
+    Raises:
+        ValueError: If a shocked factor is not in the model
+    """
+    unknown = [f for f in shocks if f not in factor_names]
+    if unknown:
+        raise ValueError(
+            f"Unknown factor(s): {', '.join(unknown)}. Available: {', '.join(factor_names)}"
+        )
+    shock = np.array([shocks.get(f, 0.0) for f in factor_names])
+    return shock @ betas
+
+
+def weight_matrix(
+    tickers: pd.Index,
+    portfolios: Dict[str, Dict[str, float]]
+) -> np.ndarray:
+    """
+    Dense portfolios x tickers weight matrix
+
+    Args:
+        tickers: Column order of the scenario matrix
+        portfolios: name -> {ticker: weight}
+
+    Returns:
+        Array of shape (n_portfolios, n_tickers)
+    """
+    col = {t: i for i, t in enumerate(tickers)}
+    weights = np.zeros((len(portfolios), len(tickers)))
+    for i, holdings in enumerate(portfolios.values()):
+        for ticker, w in holdings.items():
+            weights[i, col[ticker]] = w
+    return weights
+
+
+def apply_scenarios(
+    scenario_matrix: pd.DataFrame,
+    portfolios: Dict[str, Dict[str, float]],
+    include_contributions: bool = False
+) -> Dict[str, object]:
+    """
+    Reprice every portfolio under every scenario
+
+    A portfolio holding a ticker with no return in a scenario (NaN) gets
+    NaN for that scenario rather than a silently understated loss.
+
+    Args:
+        scenario_matrix: ticker x scenario returns
+        portfolios: name -> {ticker: weight}
+        include_contributions: Also return per-holding contributions
+
+    Returns:
+        {"pnl": portfolio x scenario DataFrame,
+         "contributions": {portfolio: ticker x scenario DataFrame}} (optional)
+    """
+    weights = weight_matrix(scenario_matrix.index, portfolios)
+    values = scenario_matrix.to_numpy()
+    missing = np.isnan(values)
+    pnl = weights @ np.where(missing, 0.0, values)
+    pnl[((weights != 0).astype(np.float64) @ missing) > 0] = np.nan
+    result = {
+        "pnl": pd.DataFrame(pnl, index=list(portfolios), columns=scenario_matrix.columns)
+    }
+
+    if include_contributions:
+        result["contributions"] = {
+            name: scenario_matrix.loc[list(holdings)].mul(
+                pd.Series(holdings), axis=0
+            )
+            for name, holdings in portfolios.items()
+        }
+
+    return result
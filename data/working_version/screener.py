@@ -0,0 +1,335 @@
+"""
+Cross-sectional screener over per-ticker metric arrays
+Metrics for the whole universe are computed once per as-of date from the
+cached price/volume matrices; filter and rank expressions are evaluated as
+whole-array NumPy operations, never per ticker
+"""
+
+import ast
+import operator
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+
+RETURN_WINDOWS = (1, 5, 20, 60, 252)
+VOL_WINDOWS = (20, 60)
+DRAWDOWN_WINDOWS = (20, 60, 252)
+
+# Calendar days of history loaded to cover the longest window
+LOOKBACK_DAYS = 380
+
+TEXT_FIELDS = ("sector", "industry", "exchange")
+
+
+def compute_metrics(
+    closes: pd.DataFrame,
+    volumes: pd.DataFrame,
+    master: Optional[pd.DataFrame] = None
+) -> pd.DataFrame:
+    """
+    Per-ticker screening metrics as of the last date of the matrices
+
+    Only tickers with a close on the last date are included. Windows are
+    counted in trading rows of the matrix; metrics needing more history
+    than a ticker has are NaN.
+
+    Args:
+        closes: date x ticker closes (ending at the as-of date)
+        volumes: date x ticker volumes aligned with closes
+        master: equity_master frame indexed by ticker (optional)
+
+    Returns:
+        DataFrame indexed by ticker: last_close, ret_<n>d, vol_<n>d
+        (annualized), max_drawdown_<n>d, drawdown_from_high, avg_volume_20d,
+        dollar_volume_20d, market_cap, sector, industry, exchange
+    """
+    current = closes.iloc[-1].notna().to_numpy()
+    closes = closes.loc[:, current]
+    volumes = volumes.reindex(index=closes.index, columns=closes.columns)
+
+    prices = closes.to_numpy()
+    n_rows = prices.shape[0]
+    last = prices[-1]
+    filled = closes.ffill().to_numpy()
+    metrics: Dict[str, np.ndarray] = {"last_close": last}
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for n in RETURN_WINDOWS:
+            if n < n_rows:
+                metrics[f"ret_{n}d"] = last / filled[-1 - n] - 1.0
+            else:
+                metrics[f"ret_{n}d"] = np.full(last.shape, np.nan)
+
+        daily = prices[1:] / filled[:-1] - 1.0
+        for n in VOL_WINDOWS:
+            window = daily[-n:]
+            count = np.isfinite(window).sum(axis=0)
+            mean = np.nansum(window, axis=0) / count
+            ss = np.nansum((window - mean) ** 2, axis=0)
+            vol = np.sqrt(ss / (count - 1)) * np.sqrt(TRADING_DAYS)
+            vol[count < max(2, n // 2)] = np.nan
+            metrics[f"vol_{n}d"] = vol
+
+        for n in DRAWDOWN_WINDOWS:
+            window = filled[-n:]
+            peaks = np.fmax.accumulate(window, axis=0)
+            metrics[f"max_drawdown_{n}d"] = np.nanmin(window / peaks - 1.0, axis=0)
+
+        metrics["drawdown_from_high"] = last / np.nanmax(filled[-TRADING_DAYS:], axis=0) - 1.0
+
+        recent_volume = volumes.to_numpy()[-20:]
+        metrics["avg_volume_20d"] = np.nanmean(recent_volume, axis=0)
+        metrics["dollar_volume_20d"] = np.nanmean(recent_volume * prices[-20:], axis=0)
+
+    table = pd.DataFrame(metrics, index=closes.columns)
+    table.index.name = "ticker"
+
+    if master is not None:
+        aligned = master.reindex(table.index)
+        table["market_cap"] = aligned["market_cap"].astype(np.float64)
+        for field in TEXT_FIELDS:
+            table[field] = aligned[field]
+
+    return table
+
+
+# ============================================================================
+# EXPRESSION EVALUATION
+# ============================================================================
+
+_BINARY_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+}
+
+_COMPARE_OPS = {
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+}
+
+_FUNCTIONS = {
+    "abs": np.abs,
+    "log": np.log,
+    "sqrt": np.sqrt,
+}
+
+
+class ScreenExpression:
+    """
+    Parsed filter or rank expression over metric columns
+
+    Supported syntax: metric names, numbers and quoted strings; + - * /;
+    comparisons (chained comparisons allowed); `and`, `or`, `not`;
+    `in` / `not in` against a list of literals; abs(), log(), sqrt().
+    Anything else (attribute access, arbitrary calls, ...) is rejected
+    at parse time.
+
+    Example:
+        vol_20d > 0.3 and max_drawdown_20d < -0.1 and sector in ['Technology']
+    """
+
+    def __init__(self, source: str, fields: List[str]):
+        self.source = source
+        self.fields = set(fields)
+        try:
+            self.tree = ast.parse(source.strip(), mode="eval").body
+        except SyntaxError as e:
+            raise ValueError(f"Invalid expression '{source}': {e.msg}")
+        self._check(self.tree)
+
+    def _check(self, node):
+        """Reject any node outside the supported subset"""
+        if isinstance(node, (ast.BoolOp, ast.Compare)):
+            pass
+        elif isinstance(node, ast.BinOp):
+            if type(node.op) not in _BINARY_OPS:
+                raise ValueError(f"Unsupported operator in '{self.source}'")
+        elif isinstance(node, ast.UnaryOp):
+            if not isinstance(node.op, (ast.Not, ast.USub, ast.UAdd)):
+                raise ValueError(f"Unsupported operator in '{self.source}'")
+        elif isinstance(node, ast.Call):
+            if not (isinstance(node.func, ast.Name) and node.func.id in _FUNCTIONS) \
+                    or len(node.args) != 1 or node.keywords:
+                raise ValueError(
+                    f"Only {', '.join(_FUNCTIONS)} with one argument are supported"
+                )
+            self._check(node.args[0])
+            return
+        elif isinstance(node, ast.Name):
+            if node.id not in self.fields:
+                raise ValueError(
+                    f"Unknown field '{node.id}'. Available: {', '.join(sorted(self.fields))}"
+                )
+            return
+        elif isinstance(node, (ast.List, ast.Tuple)):
+            if not all(isinstance(e, ast.Constant) for e in node.elts):
+                raise ValueError("Lists may only contain literals")
+            return
+        elif isinstance(node, ast.Constant):
+            if not isinstance(node.value, (int, float, str)) or isinstance(node.value, bool):
+                raise ValueError(f"Unsupported literal {node.value!r}")
+            return
+        else:
+            raise ValueError(f"Unsupported syntax in '{self.source}'")
+
+        for op in getattr(node, "ops", []):
+            if type(op) not in _COMPARE_OPS and not isinstance(op, (ast.In, ast.NotIn)):
+                raise ValueError(f"Unsupported comparison in '{self.source}'")
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.operator, ast.unaryop, ast.cmpop, ast.boolop)):
+                continue
+            self._check(child)
+
+    def evaluate(self, columns: Dict[str, np.ndarray]):
+        """Evaluate against whole metric arrays"""
+        return self._eval(self.tree, columns)
+
+    def _eval(self, node, columns):
+        if isinstance(node, ast.Name):
+            return columns[node.id]
+        if isinstance(node, ast.Constant):
+            return node.value
+        if isinstance(node, (ast.List, ast.Tuple)):
+            return [e.value for e in node.elts]
+        if isinstance(node, ast.Call):
+            with np.errstate(invalid="ignore", divide="ignore"):
+                return _FUNCTIONS[node.func.id](self._numeric(node.args[0], columns))
+        if isinstance(node, ast.UnaryOp):
+            if isinstance(node.op, ast.Not):
+                return ~self._mask(node.operand, columns)
+            value = self._numeric(node.operand, columns)
+            return -value if isinstance(node.op, ast.USub) else value
+        if isinstance(node, ast.BinOp):
+            with np.errstate(invalid="ignore", divide="ignore"):
+                return _BINARY_OPS[type(node.op)](
+                    self._numeric(node.left, columns),
+                    self._numeric(node.right, columns)
+                )
+        if isinstance(node, ast.BoolOp):
+            masks = [self._mask(v, columns) for v in node.values]
+            combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            return combine.reduce(masks)
+        if isinstance(node, ast.Compare):
+            result = None
+            left = self._eval(node.left, columns)
+            for op, comparator in zip(node.ops, node.comparators):
+                right = self._eval(comparator, columns)
+                if isinstance(op, (ast.In, ast.NotIn)):
+                    if not isinstance(right, list):
+                        raise ValueError("'in' needs a list, e.g. sector in ['Energy']")
+                    mask = pd.Series(np.asarray(left, dtype=object)).isin(right).to_numpy()
+                    if isinstance(op, ast.NotIn):
+                        mask = ~mask
+                elif isinstance(op, (ast.Eq, ast.NotEq)):
+                    with np.errstate(invalid="ignore"):
+                        mask = np.asarray(_COMPARE_OPS[type(op)](left, right), dtype=bool)
+                else:
+                    mask = self._order(op, left, right)
+                result = mask if result is None else result & mask
+                left = right
+            return result
+        raise ValueError(f"Unsupported syntax in '{self.source}'")
+
+    @staticmethod
+    def _is_text(value) -> bool:
+        return isinstance(value, str) or (isinstance(value, np.ndarray) and value.dtype == object)
+
+    def _order(self, op, left, right):
+        """<, <=, >, >= between two numeric or two text operands"""
+        compare = _COMPARE_OPS[type(op)]
+        if self._is_text(left) != self._is_text(right):
+            raise ValueError(f"Cannot order-compare a text field with a number in '{self.source}'")
+        if not self._is_text(left):
+            with np.errstate(invalid="ignore"):
+                return np.asarray(compare(left, right), dtype=bool)
+
+        # Text ordering; missing values (None/NaN) never match
+        lefts, rights = np.broadcast_arrays(np.asarray(left, dtype=object),
+                                            np.asarray(right, dtype=object))
+        return np.array([
+            isinstance(a, str) and isinstance(b, str) and compare(a, b)
+            for a, b in zip(lefts.ravel(), rights.ravel())
+        ], dtype=bool).reshape(lefts.shape)
+
+    def _numeric(self, node, columns):
+        value = self._eval(node, columns)
+        if self._is_text(value):
+            raise ValueError(f"Arithmetic on text field in '{self.source}'")
+        return value
+
+    def _mask(self, node, columns):
+        value = self._eval(node, columns)
+        if not isinstance(value, np.ndarray) or value.dtype != bool:
+            raise ValueError(f"'{self.source}' must combine comparisons with and/or/not")
+        return value
+
+
+def run_screen(
+    table: pd.DataFrame,
+    filter_expr: Optional[str] = None,
+    sort_expr: Optional[str] = None,
+    descending: bool = True,
+    offset: int = 0,
+    limit: int = 50
+) -> Tuple[int, pd.DataFrame, Optional[np.ndarray]]:
+    """
+    Filter, rank and paginate the metric table
+
+    Args:
+        table: Output of compute_metrics
+        filter_expr: Boolean expression; None keeps every ticker
+        sort_expr: Numeric expression to rank by; None keeps ticker order
+        descending: Rank largest first
+        offset: Rows to skip after ranking
+        limit: Page size
+
+    Returns:
+        (total matches, page of the table, page of sort scores or None)
+    """
+    fields = list(table.columns)
+    columns = {
+        name: table[name].to_numpy(
+            dtype=object if name in TEXT_FIELDS else np.float64
+        )
+        for name in fields
+    }
+
+    selected = np.arange(len(table))
+    if filter_expr:
+        mask = ScreenExpression(filter_expr, fields).evaluate(columns)
+        if not isinstance(mask, np.ndarray) or mask.dtype != bool:
+            raise ValueError("filter must be a comparison, e.g. vol_20d > 0.3")
+        # Constant expressions (e.g. 1 < 2) give one value, not one per ticker
+        if mask.shape != (len(table),):
+            raise ValueError("filter must reference at least one field")
+        selected = np.flatnonzero(mask)
+
+    scores = None
+    if sort_expr:
+        values = ScreenExpression(sort_expr, fields).evaluate(columns)
+        if not isinstance(values, np.ndarray) or values.shape != (len(table),):
+            raise ValueError("sort must reference at least one field")
+        if values.dtype == object:
+            raise ValueError("sort must be numeric, e.g. ret_20d / vol_20d")
+        values = np.asarray(values, dtype=np.float64)[selected]
+        # NaN scores always rank last
+        key = np.where(np.isfinite(values), -values if descending else values, np.inf)
+        order = np.argsort(key, kind="stable")
+        selected = selected[order]
+        scores = values[order]
+
+    page = slice(offset, offset + limit)
+    return (
+        len(selected),
+        table.iloc[selected[page]],
+        None if scores is None else scores[page],
+    )
@@ -0,0 +1,140 @@
+"""
+Sector and industry aggregates over the date x ticker return matrix
+Group membership comes from equity_master; every aggregate is one matrix
+product against a ticker x group one-hot matrix, not a loop over tickers
+"""
+
+import sqlite3
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+
+MARKET_GROUP = "Market"
+
+
+def load_equity_master(db_path: Path) -> pd.DataFrame:
+    """
+    Load ticker metadata from equity_master.db
+
+    Args:
+        db_path: Path to equity_master.db
+
+    Returns:
+        DataFrame indexed by ticker with sector, industry, market_cap, exchange
+    """
+    if not db_path.exists():
+        raise FileNotFoundError(f"Equity master not found at {db_path}")
+
+    conn = sqlite3.connect(str(db_path))
+    try:
+        master = pd.read_sql(
+            "SELECT ticker, sector, industry, market_cap, exchange FROM equity_master",
+            conn
+        )
+    finally:
+        conn.close()
+
+    master["ticker"] = master["ticker"].str.upper()
+    return master.set_index("ticker")
+
+
+def group_membership(
+    tickers: pd.Index,
+    labels: pd.Series
+) -> Tuple[List[str], np.ndarray]:
+    """
+    Build a ticker x group one-hot membership matrix
+
+    Args:
+        tickers: Column order of the return matrix
+        labels: ticker -> group label (tickers without a label belong to no group)
+
+    Returns:
+        (group names, membership matrix of shape (n_tickers, n_groups))
+    """
+    aligned = labels.reindex(tickers)
+    codes, groups = pd.factorize(aligned, sort=True)
+
+    membership = np.zeros((len(tickers), len(groups)))
+    known = codes >= 0
+    membership[np.flatnonzero(known), codes[known]] = 1.0
+
+    return list(groups), membership
+
+
+def aggregate_returns(
+    returns: pd.DataFrame,
+    labels: Optional[pd.Series] = None,
+    weights: Optional[pd.Series] = None
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Weighted average return per group and date
+
+    Only tickers with a return on a given date enter that date's average,
+    so listings and delistings re-normalize the weights automatically.
+
+    Args:
+        returns: date x ticker simple returns
+        labels: ticker -> group label; None aggregates the whole universe
+        weights: ticker -> weight (e.g. market cap); None for equal weight
+
+    Returns:
+        (date x group returns, date x group constituent counts)
+    """
+    if labels is None:
+        labels = pd.Series(MARKET_GROUP, index=returns.columns)
+
+    groups, membership = group_membership(returns.columns, labels)
+
+    values = returns.to_numpy()
+    present = np.isfinite(values)
+
+    w = np.ones(values.shape[1])
+    if weights is not None:
+        w = weights.reindex(returns.columns).fillna(0).to_numpy(dtype=np.float64)
+
+    weighted = np.where(present, values, 0.0) * w
+    weight_mass = present * w
+
+    numerator = weighted @ membership
+    denominator = weight_mass @ membership
+    counts = present.astype(np.float64) @ membership
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        group_returns = np.where(denominator > 0, numerator / denominator, np.nan)
+
+    return (
+        pd.DataFrame(group_returns, index=returns.index, columns=groups),
+        pd.DataFrame(counts.astype(int), index=returns.index, columns=groups),
+    )
+
+
+def index_levels(group_returns: pd.DataFrame, base: float = 100.0) -> pd.DataFrame:
+    """Compound group returns into index levels starting at base"""
+    return base * (1.0 + group_returns.fillna(0.0)).cumprod()
+
+
+def group_statistics(group_returns: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per-group return and risk summary
+
+    Returns:
+        DataFrame indexed by group with daily/annualized mean and volatility,
+        cumulative return and observation count
+    """
+    mean = group_returns.mean()
+    std = group_returns.std()
+    cumulative = (1.0 + group_returns.fillna(0.0)).prod() - 1.0
+
+    return pd.DataFrame({
+        "daily_return": mean,
+        "daily_volatility": std,
+        "annualized_return": mean * TRADING_DAYS,
+        "annualized_volatility": std * np.sqrt(TRADING_DAYS),
+        "cumulative_return": cumulative,
+        "observations": group_returns.notna().sum(),
+    })
@@ -0,0 +1,191 @@
+"""
+Per-process SQLite connection pool and per-ticker price series cache for
+the Flask service (app.py)
+Series are loaded once per ticker with the full history and sliced by date
+in memory; every entry is tied to the database file version, so an ingest
+invalidates the cache on the next lookup. Under gunicorn with preload_app
+the master warms the cache before forking and workers inherit it
+copy-on-write (see gunicorn_app.py)
+"""
+
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import pandas as pd
+
+from queries import price_series_query
+
+logger = logging.getLogger(__name__)
+
+SERIES_COLUMNS = "date, ticker, open, high, low, close, volume"
+
+
+def file_version(db_path: Path) -> tuple:
+    """
+    Cheap change marker for a SQLite database
+
+    Ingest commits touch the WAL (or the main file once checkpointed), so
+    (mtime, size) of both changes whenever new data lands.
+    """
+    version = []
+    for path in (Path(db_path), Path(f"{db_path}-wal")):
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            version.append(None)
+            continue
+        # Readers create an empty WAL and the last close deletes it;
+        # neither is a data change
+        version.append((st.st_mtime_ns, st.st_size) if st.st_size else None)
+    return tuple(version)
+
+
+class ConnectionPool:
+    """
+    Reusable SQLite connections for one process
+
+    Connections never cross a fork: the pool remembers the pid that opened
+    them and starts empty in a child, so a preloaded master's connections
+    are not shared with workers. Each connection is used by one thread at
+    a time.
+
+    Args:
+        db_path: SQLite database path
+        max_size: Idle connections kept open
+    """
+
+    def __init__(self, db_path: Path, max_size: int = 8):
+        self.db_path = Path(db_path)
+        self.max_size = max_size
+        self._pid = os.getpid()
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+
+    def _open(self) -> sqlite3.Connection:
+        if not self.db_path.exists():
+            raise FileNotFoundError(f"Database not found at {self.db_path}")
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _reset_after_fork(self):
+        if os.getpid() != self._pid:
+            # Inherited handles belong to the parent; drop without closing
+            self._idle = queue.LifoQueue()
+            self._pid = os.getpid()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection, returning it to the pool afterwards"""
+        self._reset_after_fork()
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._open()
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            if self._idle.qsize() < self.max_size:
+                self._idle.put(conn)
+            else:
+                conn.close()
+
+    def close_all(self):
+        """Close every idle connection (e.g. in the master before forking)"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class TickerSeriesCache:
+    """
+    Full-history OHLCV frames per ticker, LRU-bounded
+
+    Args:
+        pool: Connection pool for loads
+        max_tickers: Tickers kept in memory
+    """
+
+    def __init__(self, pool: ConnectionPool, max_tickers: int = 1024):
+        self.pool = pool
+        self.max_tickers = max_tickers
+        self._entries: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _check_version(self):
+        """Drop every cached series if the database changed"""
+        version = file_version(self.pool.db_path)
+        if version != self._version:
+            if self._entries:
+                logger.info("Database changed - clearing ticker series cache")
+            self._entries.clear()
+            self._version = version
+
+    def _load(self, ticker: str) -> pd.DataFrame:
+        with self.pool.connection() as conn:
+            return pd.read_sql(price_series_query(columns=SERIES_COLUMNS), conn, params=[ticker])
+
+    def get(self, ticker: str) -> pd.DataFrame:
+        """Full history of one ticker, oldest first (empty if unknown)"""
+        with self._lock:
+            self._check_version()
+            if ticker in self._entries:
+                self._entries.move_to_end(ticker)
+                return self._entries[ticker]
+
+        frame = self._load(ticker)
+
+        with self._lock:
+            self._entries[ticker] = frame
+            self._entries.move_to_end(ticker)
+            while len(self._entries) > self.max_tickers:
+                self._entries.popitem(last=False)
+        return frame
+
+    def series(
+        self,
+        ticker: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        One ticker's rows between two dates (inclusive), oldest first
+
+        Dates are ISO strings, so the sorted date column is binary-searched
+        instead of scanned.
+        """
+        frame = self.get(ticker)
+        dates = frame["date"]
+        lo = dates.searchsorted(start_date, side="left") if start_date else 0
+        hi = dates.searchsorted(end_date, side="right") if end_date else len(dates)
+        return frame.iloc[lo:hi].reset_index(drop=True)
+
+    def warm(self, tickers: Optional[List[str]] = None) -> int:
+        """
+        Load every ticker (or the given ones) into the cache
+
+        Returns:
+            Number of tickers loaded
+        """
+        if tickers is None:
+            with self.pool.connection() as conn:
+                tickers = [row["ticker"] for row in conn.execute(
+                    "SELECT DISTINCT ticker FROM stock_prices ORDER BY ticker"
+                )]
+        for ticker in tickers[:self.max_tickers]:
+            self.get(ticker)
+        logger.info(f"Warmed ticker series cache with {min(len(tickers), self.max_tickers)} tickers")
+        return min(len(tickers), self.max_tickers)
@@ -0,0 +1,170 @@
+"""
+Universe matrices shared across worker processes through memory-mapped files
+One process writes the close, volume and return matrices as .npy files into
+a directory named after the database version (under /dev/shm, i.e. POSIX
+shared memory, when available); every worker maps them read-only, so the
+pages exist once in RAM however many workers attach
+
+Publish ahead of the workers (app_v2.publish_shared_matrices from the
+gunicorn `on_starting` hook, see gunicorn_app_v2.py) so they start warm;
+otherwise the first worker to need the matrices publishes them under a
+file lock while the others wait and then attach.
+"""
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+MATRIX_NAMES = ("close", "volume", "returns_simple", "returns_log")
+
+
+def default_root() -> Path:
+    """/dev/shm/quant_api when the host has POSIX shared memory, else the temp dir"""
+    shm = Path("/dev/shm")
+    base = shm if shm.is_dir() and os.access(shm, os.W_OK) else Path(tempfile.gettempdir())
+    return base / "quant_api"
+
+
+def version_key(data_version) -> str:
+    """Directory name for a database data version"""
+    return hashlib.sha1(repr(data_version).encode()).hexdigest()[:16]
+
+
+def build_matrices(closes: pd.DataFrame, volumes: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """
+    Every shared matrix from the full-history close and volume matrices
+
+    Returns follow PriceMatrixCache.returns: consecutive rows of the
+    matrix, NaN where a ticker has no bar; the first row is NaN.
+    """
+    volumes = volumes.reindex(index=closes.index, columns=closes.columns)
+    return {
+        "close": closes,
+        "volume": volumes,
+        "returns_simple": closes / closes.shift(1) - 1,
+        "returns_log": np.log(closes / closes.shift(1)),
+    }
+
+
+class SharedMatrixStore:
+    """
+    Versioned, read-only memory-mapped copies of the universe matrices
+
+    Args:
+        root: Directory holding one subdirectory per published version
+    """
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root) if root else default_root()
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    @contextmanager
+    def _publish_lock(self):
+        """Exclusive cross-process lock held while a version is written"""
+        with open(self.root / ".lock", "w") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def attach(self, data_version) -> Optional[Dict[str, pd.DataFrame]]:
+        """
+        Map a published version read-only
+
+        Returns:
+            name -> DataFrame backed by the shared pages (no copy), or None
+            if the version has not been published
+        """
+        directory = self.root / version_key(data_version)
+        if not (directory / "meta.json").exists():
+            return None
+
+        dates = np.load(directory / "dates.npy").astype(str)
+        tickers = np.load(directory / "tickers.npy").astype(str)
+        matrices = {}
+        for name in MATRIX_NAMES:
+            values = np.load(directory / f"{name}.npy", mmap_mode="r")
+            frame = pd.DataFrame(values, index=pd.Index(dates, name="date"),
+                                 columns=pd.Index(tickers, name="ticker"), copy=False)
+            matrices[name] = frame
+        return matrices
+
+    def publish(self, data_version, matrices: Dict[str, pd.DataFrame]) -> Path:
+        """
+        Write a version atomically and remove older ones
+
+        Files are written to a scratch directory and renamed into place, so
+        readers never see a partial version. Workers still mapping a removed
+        version keep their pages until they re-attach.
+
+        Returns:
+            Directory of the published version
+        """
+        key = version_key(data_version)
+        target = self.root / key
+        scratch = Path(tempfile.mkdtemp(prefix=f".{key}-", dir=self.root))
+
+        close = matrices["close"]
+        np.save(scratch / "dates.npy", close.index.to_numpy(dtype=str))
+        np.save(scratch / "tickers.npy", close.columns.to_numpy(dtype=str))
+        for name in MATRIX_NAMES:
+            values = np.ascontiguousarray(matrices[name].to_numpy(dtype=np.float64))
+            np.save(scratch / f"{name}.npy", values)
+        (scratch / "meta.json").write_text(json.dumps({
+            "data_version": repr(data_version),
+            "shape": list(close.shape),
+            "matrices": list(MATRIX_NAMES),
+        }))
+
+        if target.exists():
+            shutil.rmtree(scratch)
+        else:
+            os.rename(scratch, target)
+
+        for old in self.root.iterdir():
+            if old.is_dir() and old.name != key and not old.name.startswith("."):
+                shutil.rmtree(old, ignore_errors=True)
+
+        logger.info(f"Published shared matrices {close.shape} at {target}")
+        return target
+
+    def get_or_publish(
+        self,
+        data_version,
+        build: Callable[[], Dict[str, pd.DataFrame]]
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Attach to a version, publishing it first if no process has yet
+
+        Args:
+            data_version: Database version the matrices must match
+            build: Loads the matrices from the database (runs in at most
+                one process per version)
+
+        Returns:
+            name -> read-only DataFrame over shared memory
+        """
+        matrices = self.attach(data_version)
+        if matrices is not None:
+            return matrices
+
+        with self._publish_lock():
+            matrices = self.attach(data_version)
+            if matrices is None:
+                self.publish(data_version, build())
+                matrices = self.attach(data_version)
+        return matrices
+
@@ -0,0 +1,199 @@
+"""
+Window-by-window portfolio stress testing over one aligned return series
+Mean, volatility, Sharpe and total return for every window come from
+prefix sums; drawdown and historical VaR from one padded window matrix,
+so many windows cost little more than one
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from analytics import gaussian_z
+
+TRADING_DAYS = 252
+
+# Upper bound on cells in one padded window block (windows x window length)
+MAX_BLOCK_CELLS = 4_000_000
+
+
+def date_windows(
+    dates: Sequence[str],
+    windows: List[Tuple[str, str]]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Map (start_date, end_date) windows onto return-row bounds
+
+    Return row j is the return from dates[j] to dates[j + 1]. A window
+    covers the returns between its first and last price date, matching
+    what /portfolio-metrics computes for the same dates.
+
+    Args:
+        dates: Sorted price dates of the aligned series
+        windows: (start_date, end_date) pairs, inclusive
+
+    Returns:
+        (starts, ends) return-row bounds, end exclusive
+    """
+    dates = np.asarray(dates)
+    n_returns = max(len(dates) - 1, 0)
+    first = np.searchsorted(dates, [w[0] for w in windows], side="left")
+    last = np.searchsorted(dates, [w[1] for w in windows], side="right") - 1
+    first = np.minimum(first, n_returns)
+    ends = np.clip(last, first, n_returns)
+    return first.astype(np.int64), ends.astype(np.int64)
+
+
+def rolling_windows(
+    n_returns: int,
+    window: int,
+    step: int = 1
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Trailing windows of `window` returns every `step` rows
+
+    Returns:
+        (starts, ends) return-row bounds, end exclusive
+    """
+    ends = np.arange(window, n_returns + 1, step, dtype=np.int64)
+    return ends - window, ends
+
+
+def _window_blocks(starts: np.ndarray, ends: np.ndarray):
+    """Yield index slices of windows whose padded matrix fits MAX_BLOCK_CELLS"""
+    width = int((ends - starts).max(initial=0)) + 1
+    per_block = max(1, MAX_BLOCK_CELLS // width)
+    for i in range(0, len(starts), per_block):
+        yield slice(i, i + per_block), width
+
+
+def window_metrics(
+    returns: np.ndarray,
+    starts: np.ndarray,
+    ends: np.ndarray,
+    risk_free_rate: float = 0.0,
+    confidence: float = 0.95
+) -> Dict[str, np.ndarray]:
+    """
+    Risk and return statistics of a daily log-return series per window
+
+    Args:
+        returns: 1-D daily log returns (no NaN)
+        starts: Window start rows (inclusive)
+        ends: Window end rows (exclusive)
+        risk_free_rate: Annual risk-free rate for Sharpe
+        confidence: VaR confidence level
+
+    Returns:
+        Dict of per-window arrays: observations, total_return,
+        daily_return, annualized_return, daily_volatility,
+        annualized_volatility, sharpe_ratio, max_drawdown, var_historical,
+        cvar_historical, var_gaussian. Windows with fewer than two
+        returns are NaN.
+    """
+    n = (ends - starts).astype(np.float64)
+
+    # Centre before squaring so the variance difference keeps its precision
+    center = returns.mean() if len(returns) else 0.0
+    shifted = returns - center
+    c1 = np.concatenate([[0.0], np.cumsum(shifted)])
+    c2 = np.concatenate([[0.0], np.cumsum(shifted ** 2)])
+    log_wealth = np.concatenate([[0.0], np.cumsum(returns)])
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        s1 = c1[ends] - c1[starts]
+        mean_shifted = s1 / n
+        var = (c2[ends] - c2[starts] - n * mean_shifted ** 2) / (n - 1)
+        daily_vol = np.sqrt(np.maximum(var, 0.0))
+        daily_mean = mean_shifted + center
+
+        annual_return = daily_mean * TRADING_DAYS
+        annual_vol = daily_vol * np.sqrt(TRADING_DAYS)
+        sharpe = np.where(annual_vol > 0, (annual_return - risk_free_rate) / annual_vol, 0.0)
+
+    total_return = np.expm1(log_wealth[ends] - log_wealth[starts])
+    var_gaussian = gaussian_z([confidence])[0] * daily_vol + daily_mean
+
+    max_drawdown = np.full(len(starts), np.nan)
+    var_hist = np.full(len(starts), np.nan)
+    cvar_hist = np.full(len(starts), np.nan)
+    padded_returns = np.append(returns, np.inf)
+
+    for block, width in _window_blocks(starts, ends):
+        s, e = starts[block], ends[block]
+        offsets = np.arange(width)
+
+        # Wealth path includes the level at the window start
+        idx = s[:, None] + offsets
+        in_path = idx <= e[:, None]
+        path = np.where(in_path, log_wealth[np.minimum(idx, len(log_wealth) - 1)], -np.inf)
+        peaks = np.maximum.accumulate(path, axis=1)
+        drawdown = np.where(in_path, path - peaks, 0.0).min(axis=1)
+        max_drawdown[block] = np.expm1(drawdown)
+
+        # Window returns padded with +inf so a row sort leaves padding last
+        in_window = idx < e[:, None]
+        window_returns = np.where(
+            in_window, padded_returns[np.minimum(idx, len(returns))], np.inf
+        )
+        window_returns.sort(axis=1)
+
+        count = in_window.sum(axis=1)
+        pos = np.maximum(count - 1, 0) * (1 - confidence)
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.minimum(lo + 1, np.maximum(count - 1, 0))
+        low_val = np.take_along_axis(window_returns, lo[:, None], axis=1)[:, 0]
+        high_val = np.take_along_axis(window_returns, hi[:, None], axis=1)[:, 0]
+        with np.errstate(invalid="ignore"):
+            var_block = low_val + (pos - lo) * (high_val - low_val)
+            tail = in_window & (window_returns <= var_block[:, None])
+            cvar_block = np.where(tail, window_returns, 0.0).sum(axis=1) / tail.sum(axis=1)
+        var_hist[block] = var_block
+        cvar_hist[block] = cvar_block
+
+    result = {
+        "observations": (ends - starts).astype(np.int64),
+        "total_return": total_return,
+        "daily_return": daily_mean,
+        "annualized_return": annual_return,
+        "daily_volatility": daily_vol,
+        "annualized_volatility": annual_vol,
+        "sharpe_ratio": sharpe,
+        "max_drawdown": max_drawdown,
+        "var_historical": var_hist,
+        "cvar_historical": cvar_hist,
+        "var_gaussian": var_gaussian,
+    }
+
+    too_short = (ends - starts) < 2
+    for key, values in result.items():
+        if key != "observations" and too_short.any():
+            values[too_short] = np.nan
+
+    return result
+
+
+def portfolio_log_returns(
+    closes: pd.DataFrame,
+    holdings: Dict[str, float]
+) -> Tuple[List[str], np.ndarray]:
+    """
+    Daily weighted log return of a portfolio on dates every holding trades
+
+    Same convention as /portfolio-metrics: weights applied to per-asset
+    log returns over the commonly available dates.
+
+    Args:
+        closes: date x ticker closes covering every holding
+        holdings: ticker -> weight
+
+    Returns:
+        (price dates, returns) where returns[j] runs from dates[j] to dates[j + 1]
+    """
+    tickers = list(holdings)
+    aligned = closes[tickers].dropna()
+    prices = aligned.to_numpy()
+    log_returns = np.log(prices[1:] / prices[:-1])
+    weights = np.array([holdings[t] for t in tickers])
+    return [str(d) for d in aligned.index], log_returns @ weights
@@ -0,0 +1,319 @@
+"""
+Push subscriptions for end-of-day analytics
+Subscribers register ticker sets and portfolios; after an ingest every
+affected ticker and distinct portfolio is computed once, however many
+subscribers share it, and the results are fanned out to each subscriber's
+event queue
+"""
+
+import asyncio
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+
+
+def _clean(value) -> Optional[float]:
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+
+def _var_levels(returns: np.ndarray, confidence_levels: Iterable[float]) -> Dict[str, float]:
+    """Historical VaR per confidence level, as in /var"""
+    return {
+        f"VaR_{int(conf * 100)}": float(np.percentile(returns, (1 - conf) * 100))
+        for conf in confidence_levels
+    }
+
+
+def ticker_metrics(
+    closes: pd.Series,
+    window: int,
+    confidence_levels: Tuple[float, ...]
+) -> Dict:
+    """
+    Latest return, rolling volatility and VaR of one ticker
+
+    Same conventions as /volatility (daily std of `window` log returns)
+    and /var (historical percentiles of log returns over the series).
+
+    Args:
+        closes: Date-indexed closes, oldest first (the lookback)
+        window: Rolling volatility window
+        confidence_levels: VaR confidence levels
+
+    Returns:
+        JSON-ready metrics
+    """
+    returns = np.log(closes / closes.shift(1)).dropna()
+    if len(returns) < 2:
+        return {"error": "Insufficient data", "count": len(returns)}
+
+    volatility = returns.iloc[-window:].std() if len(returns) >= window else np.nan
+    return {
+        "as_of": str(closes.index[-1]),
+        "close": float(closes.iloc[-1]),
+        "return": float(returns.iloc[-1]),
+        "volatility": _clean(volatility),
+        "annualized_volatility": _clean(volatility * np.sqrt(TRADING_DAYS)),
+        "expected_return": float(returns.mean()),
+        "var": _var_levels(returns.to_numpy(), confidence_levels),
+        "observations": len(returns),
+    }
+
+
+def portfolio_metrics(
+    closes: Dict[str, pd.Series],
+    holdings: Dict[str, float],
+    confidence_levels: Tuple[float, ...],
+    risk_free_rate: float = 0.0
+) -> Dict:
+    """
+    Performance and VaR of one portfolio over its holdings' common dates
+
+    Return, volatility and Sharpe follow /portfolio-metrics; VaR is the
+    historical percentile of the weighted daily log return.
+
+    Args:
+        closes: ticker -> date-indexed closes covering every holding
+        holdings: ticker -> weight
+        confidence_levels: VaR confidence levels
+        risk_free_rate: Annual risk-free rate for Sharpe
+
+    Returns:
+        JSON-ready metrics
+    """
+    tickers = list(holdings)
+    prices = pd.DataFrame({t: closes.get(t, pd.Series(dtype=float)) for t in tickers}).dropna()
+    if len(prices) < 3:
+        return {"error": "Insufficient overlapping data", "count": len(prices)}
+
+    returns = np.log(prices / prices.shift(1)).dropna()
+    weights = np.array([holdings[t] for t in tickers])
+    daily = returns.to_numpy() @ weights
+
+    daily_return = float((returns.mean() * weights).sum())
+    daily_vol = float(np.sqrt(weights @ returns.cov().to_numpy() @ weights))
+    annual_return = daily_return * TRADING_DAYS
+    annual_vol = daily_vol * np.sqrt(TRADING_DAYS)
+
+    return {
+        "as_of": str(prices.index[-1]),
+        "return": float(daily[-1]),
+        "daily_return": daily_return,
+        "annualized_return": annual_return,
+        "daily_volatility": daily_vol,
+        "annualized_volatility": annual_vol,
+        "sharpe_ratio": (annual_return - risk_free_rate) / annual_vol if annual_vol > 0 else 0.0,
+        "var": _var_levels(daily, confidence_levels),
+        "observations": len(returns),
+    }
+
+
+# ============================================================================
+# SUBSCRIPTIONS
+# ============================================================================
+
+class Subscription:
+    """One client's ticker set, portfolios, settings and event queue"""
+
+    def __init__(
+        self,
+        tickers: List[str],
+        portfolios: Dict[str, Dict[str, float]],
+        window: int,
+        confidence_levels: Tuple[float, ...],
+        lookback_days: int,
+        risk_free_rate: float,
+        queue_size: int
+    ):
+        self.id = uuid.uuid4().hex
+        self.tickers = tickers
+        self.portfolios = portfolios
+        self.window = window
+        self.confidence_levels = confidence_levels
+        self.lookback_days = lookback_days
+        self.risk_free_rate = risk_free_rate
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.connections = 0
+        self.last_seen = time.monotonic()
+
+    def ticker_key(self, ticker: str) -> Tuple:
+        return ("ticker", ticker, self.window, self.confidence_levels, self.lookback_days)
+
+    def portfolio_key(self, holdings: Dict[str, float]) -> Tuple:
+        return (
+            "portfolio", tuple(sorted(holdings.items())), self.confidence_levels,
+            self.lookback_days, self.risk_free_rate
+        )
+
+    def keys(self) -> Dict[Tuple, List[Tuple[str, str]]]:
+        """
+        Result key -> (section, name) targets for everything this subscriber
+        follows; portfolios with identical holdings share one key
+        """
+        keys = {self.ticker_key(t): [("tickers", t)] for t in self.tickers}
+        for name, holdings in self.portfolios.items():
+            keys.setdefault(self.portfolio_key(holdings), []).append(("portfolios", name))
+        return keys
+
+    def push(self, event: Dict):
+        """
+        Enqueue an event (event-loop thread only)
+
+        A slow consumer loses its oldest queued event rather than blocking
+        the fan-out; each event carries full metrics for what it covers.
+        """
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+
+class SubscriptionHub:
+    """
+    Registry of subscriptions plus one shared result per distinct metric
+
+    Results are keyed by (ticker or holdings, settings), so subscribers
+    with overlapping interests share computations. compute_update and
+    snapshot do the work and are safe to run in a worker thread;
+    subscribe, deliver and prune_idle touch queues and must run on the
+    event loop.
+
+    Args:
+        load_closes: (tickers, rows) -> ticker -> date-indexed closes
+            holding the last `rows` bars
+        queue_size: Events buffered per subscriber
+        idle_timeout: Seconds a subscription survives with no stream attached
+    """
+
+    def __init__(
+        self,
+        load_closes: Callable[[List[str], int], Dict[str, pd.Series]],
+        queue_size: int = 16,
+        idle_timeout: float = 600.0
+    ):
+        self.load_closes = load_closes
+        self.queue_size = queue_size
+        self.idle_timeout = idle_timeout
+        self.subscriptions: Dict[str, Subscription] = {}
+        self.version: Optional[int] = None
+        self._results: Dict[Hashable, Dict] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, **spec) -> Subscription:
+        subscription = Subscription(queue_size=self.queue_size, **spec)
+        self.subscriptions[subscription.id] = subscription
+        return subscription
+
+    def unsubscribe(self, subscription_id: str) -> bool:
+        return self.subscriptions.pop(subscription_id, None) is not None
+
+    def prune_idle(self) -> int:
+        """Drop subscriptions with no stream attached for idle_timeout seconds"""
+        now = time.monotonic()
+        idle = [
+            sid for sid, sub in self.subscriptions.items()
+            if sub.connections == 0 and now - sub.last_seen > self.idle_timeout
+        ]
+        for sid in idle:
+            del self.subscriptions[sid]
+        return len(idle)
+
+    def _compute(self, keys: Set[Tuple]) -> Dict[Tuple, Dict]:
+        """Compute result keys, loading each lookback's closes in one batch"""
+        by_lookback: Dict[int, List[Tuple]] = {}
+        for key in keys:
+            lookback = key[3] if key[0] == "portfolio" else key[4]
+            by_lookback.setdefault(lookback, []).append(key)
+
+        results = {}
+        for lookback, group in by_lookback.items():
+            tickers = set()
+            for key in group:
+                if key[0] == "ticker":
+                    tickers.add(key[1])
+                else:
+                    tickers.update(t for t, _ in key[1])
+            closes = self.load_closes(sorted(tickers), lookback + 1)
+
+            for key in group:
+                if key[0] == "ticker":
+                    _, ticker, window, levels, _ = key
+                    series = closes.get(ticker)
+                    results[key] = (
+                        {"error": f"No data found for ticker {ticker}"}
+                        if series is None or series.empty
+                        else ticker_metrics(series, window, levels)
+                    )
+                else:
+                    _, holdings, levels, _, rf = key
+                    results[key] = portfolio_metrics(closes, dict(holdings), levels, rf)
+        return results
+
+    def _payload(self, subscription: Subscription, keys: Iterable[Tuple]) -> Dict:
+        keys = set(keys)
+        payload = {"version": self.version, "tickers": {}, "portfolios": {}}
+        for key, targets in subscription.keys().items():
+            if key in keys:
+                for section, name in targets:
+                    payload[section][name] = self._results[key]
+        return payload
+
+    def snapshot(self, subscription: Subscription) -> Dict:
+        """Current metrics for everything one subscriber follows"""
+        keys = set(subscription.keys())
+        with self._lock:
+            missing = keys - set(self._results)
+            if missing:
+                self._results.update(self._compute(missing))
+            return self._payload(subscription, keys)
+
+    def compute_update(
+        self,
+        version: int,
+        changed_tickers: Optional[Set[str]] = None
+    ) -> List[Tuple[Subscription, Dict]]:
+        """
+        Recompute every followed metric touched by an ingest, once
+
+        Args:
+            version: Change version after the ingest
+            changed_tickers: Tickers with new or corrected bars (None: all)
+
+        Returns:
+            (subscription, event) pairs for deliver()
+        """
+        def touched(key):
+            if changed_tickers is None:
+                return True
+            if key[0] == "ticker":
+                return key[1] in changed_tickers
+            return any(t in changed_tickers for t, _ in key[1])
+
+        with self._lock:
+            self.version = version
+            self._results = {k: v for k, v in self._results.items() if not touched(k)}
+
+            subscriptions = list(self.subscriptions.values())
+            followed = {k for sub in subscriptions for k in sub.keys()}
+            stale = {k for k in followed if touched(k)}
+            if not stale:
+                return []
+            self._results.update(self._compute(stale))
+
+            deliveries = []
+            for sub in subscriptions:
+                payload = self._payload(sub, stale)
+                if payload["tickers"] or payload["portfolios"]:
+                    deliveries.append((sub, payload))
+            return deliveries
+
+    def deliver(self, deliveries: List[Tuple[Subscription, Dict]]):
+        for subscription, event in deliveries:
+            if subscription.id in self.subscriptions:
+                subscription.push(event)
@@ -0,0 +1,363 @@
+"""
+Percentile ranks of scores, exact or streaming
+Exact ranks sort the scores once and read every rank off run boundaries
+in the sorted order, optionally within groups (e.g. per merchant category
+or per day), replacing per-row scipy.stats.percentileofscore calls which
+rescan the whole column for each row. Tables that do not fit in memory
+are ranked approximately in two chunked passes through a t-digest per
+group: one pass builds the digests, the second ranks each chunk against
+them.
+
+Every rank follows percentileofscore's `kind` definitions:
+    strict: % of scores below the score
+    weak:   % of scores at or below it
+    mean:   average of strict and weak
+    rank:   average percentage ranking of the tied scores (the default)
+
+Usage:
+    python percentile_rank.py scores.csv --score-col risk_score --by merchant_category
+    python percentile_rank.py scores.csv --score-col risk_score --approximate --output ranked.csv
+"""
+
+import argparse
+import time
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+KINDS = ("rank", "weak", "strict", "mean")
+
+
+def _check_kind(kind: str):
+    if kind not in KINDS:
+        raise ValueError(f"Unknown kind {kind!r}; expected one of {KINDS}")
+
+
+def _ranks_from_counts(below: np.ndarray, at_or_below: np.ndarray, n: np.ndarray, kind: str) -> np.ndarray:
+    """percentileofscore from per-score counts (below, at or below, total)"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if kind == "strict":
+            return 100.0 * below / n
+        if kind == "weak":
+            return 100.0 * at_or_below / n
+        if kind == "mean":
+            return 50.0 * (below + at_or_below) / n
+        return 50.0 * (below + at_or_below + (at_or_below > below)) / n
+
+
+def _group_codes(groups, n: int) -> np.ndarray:
+    """Integer code per row for one or several group key arrays (-1: missing key)"""
+    if groups is None:
+        return np.zeros(n, dtype=np.int64)
+    if not isinstance(groups, (list, tuple)):
+        return np.asarray(pd.factorize(np.asarray(groups))[0], dtype=np.int64)
+
+    # Composite key: one code per part, combined; -1 if any part is missing
+    codes = np.zeros(n, dtype=np.int64)
+    missing = np.zeros(n, dtype=bool)
+    for keys in groups:
+        part, uniques = pd.factorize(np.asarray(keys))
+        missing |= part < 0
+        codes = pd.factorize(codes * (len(uniques) + 1) + part)[0].astype(np.int64)
+    codes[missing] = -1
+    return codes
+
+
+def percentile_ranks(
+    scores: Sequence[float],
+    groups: Optional[Union[Sequence, List[Sequence]]] = None,
+    kind: str = "rank"
+) -> np.ndarray:
+    """
+    Exact percentile rank of every score within its group
+
+    Equal to percentileofscore(group_scores, score, kind) per row, in one
+    O(n log n) sort. Missing scores, and rows with a missing group key,
+    get NaN and are not counted in anyone's group.
+
+    Args:
+        scores: Score per row
+        groups: Group key per row, or a list of key arrays for composite
+            groups (e.g. [category, day]); None ranks over all rows
+        kind: One of KINDS
+
+    Returns:
+        Percentile rank (0-100) per row, in input order
+    """
+    _check_kind(kind)
+    values = np.asarray(scores, dtype=np.float64)
+    n = len(values)
+    codes = _group_codes(groups, n)
+    valid = ~np.isnan(values) & (codes >= 0)
+
+    ranks = np.full(n, np.nan)
+    rows = np.flatnonzero(valid)
+    if not len(rows):
+        return ranks
+
+    order = rows[np.lexsort((values[rows], codes[rows]))]
+    sorted_codes = codes[order]
+    sorted_values = values[order]
+
+    # Runs of equal (group, score); each row's counts are its run bounds
+    # relative to the start of its group
+    new_group = np.r_[True, sorted_codes[1:] != sorted_codes[:-1]]
+    new_run = new_group | np.r_[True, sorted_values[1:] != sorted_values[:-1]]
+    positions = np.arange(len(order))
+    group_start = np.maximum.accumulate(np.where(new_group, positions, 0))
+    run_start = np.maximum.accumulate(np.where(new_run, positions, 0))
+    run_end = np.r_[np.flatnonzero(new_run)[1:], len(order)][np.cumsum(new_run) - 1]
+    group_end = np.r_[np.flatnonzero(new_group)[1:], len(order)][np.cumsum(new_group) - 1]
+
+    ranks[order] = _ranks_from_counts(
+        run_start - group_start, run_end - group_start, group_end - group_start, kind
+    )
+    return ranks
+
+
+def percentile_ranks_of(reference: Sequence[float], scores: Sequence[float], kind: str = "rank") -> np.ndarray:
+    """
+    Exact percentile rank of each score within a fixed reference distribution
+
+    percentileofscore(reference, score, kind) for every score, by binary
+    search on the sorted reference (e.g. today's scores against history).
+    """
+    _check_kind(kind)
+    reference = np.sort(np.asarray(reference, dtype=np.float64))
+    reference = reference[~np.isnan(reference)]
+    scores = np.asarray(scores, dtype=np.float64)
+    ranks = _ranks_from_counts(
+        np.searchsorted(reference, scores, side="left"),
+        np.searchsorted(reference, scores, side="right"),
+        np.full(len(scores), len(reference)),
+        kind
+    )
+    ranks[np.isnan(scores)] = np.nan
+    return ranks
+
+
+def percentile_rank_column(
+    df: pd.DataFrame,
+    score_col: str,
+    by: Optional[Union[str, List[str]]] = None,
+    kind: str = "rank"
+) -> pd.Series:
+    """
+    percentile_ranks over DataFrame columns
+
+    Args:
+        df: Scores table
+        score_col: Score column
+        by: Group column or columns (None ranks over the whole table)
+        kind: One of KINDS
+
+    Returns:
+        Series on df's index named "<score_col>_percentile"
+    """
+    if by is None:
+        groups = None
+    elif isinstance(by, str):
+        groups = df[by].to_numpy()
+    else:
+        groups = [df[column].to_numpy() for column in by]
+    return pd.Series(percentile_ranks(df[score_col].to_numpy(), groups, kind),
+                     index=df.index, name=f"{score_col}_percentile")
+
+
+# ============================================================================
+# STREAMING (APPROXIMATE)
+# ============================================================================
+
+class TDigest:
+    """
+    Mergeable sketch of a score distribution for approximate ranks
+
+    A merging t-digest: scores are buffered, then folded into weighted
+    centroids whose size follows the arcsine scale function, so
+    centroids stay small (and ranks sharp) in the tails and memory stays
+    around `compression` centroids whatever the data size. Digests built
+    on separate chunks or workers combine with merge().
+
+    Args:
+        compression: Scale parameter; larger is more accurate and bigger
+        buffer_size: Scores buffered before each fold (default 10x compression)
+    """
+
+    def __init__(self, compression: float = 200, buffer_size: Optional[int] = None):
+        self.compression = compression
+        self.buffer_size = buffer_size or int(10 * compression)
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self._buffer: List[np.ndarray] = []
+        self._buffered = 0
+
+    def _scale(self, q: np.ndarray) -> np.ndarray:
+        return self.compression / (2 * np.pi) * np.arcsin(2 * q - 1)
+
+    def _fold(self, means: np.ndarray, weights: np.ndarray):
+        """Compress centroids plus new points into a new centroid set"""
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        q_left = (np.cumsum(weights) - weights) / total
+        bucket = np.floor(self._scale(q_left) - self._scale(np.zeros(1))).astype(np.int64)
+        bucket = np.unique(bucket, return_inverse=True)[1]
+        self.weights = np.bincount(bucket, weights)
+        self.means = np.bincount(bucket, means * weights) / self.weights
+
+    def _flush(self):
+        if self._buffer:
+            points = np.concatenate(self._buffer)
+            self._buffer, self._buffered = [], 0
+            self._fold(np.r_[self.means, points], np.r_[self.weights, np.ones(len(points))])
+
+    def update(self, scores: Iterable[float]):
+        """Add scores (missing values are ignored)"""
+        scores = np.asarray(scores, dtype=np.float64).ravel()
+        scores = scores[~np.isnan(scores)]
+        if not len(scores):
+            return
+        self.count += len(scores)
+        self.min = min(self.min, scores.min())
+        self.max = max(self.max, scores.max())
+        for lo in range(0, len(scores), self.buffer_size):
+            chunk = scores[lo:lo + self.buffer_size]
+            self._buffer.append(chunk)
+            self._buffered += len(chunk)
+            if self._buffered >= self.buffer_size:
+                self._flush()
+
+    def merge(self, other: "TDigest") -> "TDigest":
+        """Fold another digest's centroids into this one"""
+        self._flush()
+        other._flush()
+        if other.count:
+            self.count += other.count
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+            self._fold(np.r_[self.means, other.means], np.r_[self.weights, other.weights])
+        return self
+
+    def percentile_ranks(self, scores: Sequence[float], kind: str = "rank") -> np.ndarray:
+        """
+        Approximate percentileofscore against everything added so far
+
+        Centroids sharing a mean (tied scores) are pooled so a tied score
+        gets the exact midpoint of its run; between centroids the
+        cumulative weight is interpolated linearly.
+        """
+        _check_kind(kind)
+        self._flush()
+        scores = np.asarray(scores, dtype=np.float64)
+        if not self.count:
+            return np.full(len(scores), np.nan)
+
+        means, inverse = np.unique(self.means, return_inverse=True)
+        weights = np.bincount(inverse, self.weights)
+        centers = np.cumsum(weights) - weights / 2
+        mid = np.interp(scores, np.r_[self.min, means, self.max], np.r_[0, centers, self.count])
+
+        # Exact ties with a centroid mean span that centroid's weight
+        slot = np.clip(np.searchsorted(means, scores), 0, len(means) - 1)
+        tied = np.where(means[slot] == scores, weights[slot], 0.0)
+        ranks = _ranks_from_counts(mid - tied / 2, mid + tied / 2, np.full(len(scores), self.count), kind)
+        ranks[np.isnan(scores)] = np.nan
+        return ranks
+
+
+def _chunk_groups(chunk: pd.DataFrame, by: Optional[List[str]]) -> Dict[Hashable, pd.Index]:
+    """Group key -> row labels of a chunk (one None group without grouping)"""
+    if not by:
+        return {None: chunk.index}
+    # Rows missing any key belong to no group (and keep a NaN rank)
+    key = by[0] if len(by) == 1 else by
+    return chunk.groupby(key, sort=False, dropna=True).groups
+
+
+def stream_percentile_ranks(
+    source: str,
+    output: str,
+    score_col: str,
+    by: Optional[Union[str, List[str]]] = None,
+    kind: str = "rank",
+    chunk_size: int = 1_000_000,
+    compression: float = 200
+) -> Dict[Hashable, TDigest]:
+    """
+    Approximate percentile ranks of a CSV too large for memory
+
+    Pass 1 reads the file in chunks into one TDigest per group; pass 2
+    re-reads it and writes every row plus "<score_col>_percentile" to
+    the output CSV. Memory is one chunk plus the digests. Rows with a
+    missing group key get NaN, as in percentile_ranks.
+
+    Args:
+        source: Input CSV
+        output: Output CSV
+        score_col: Score column
+        by: Group column or columns (None ranks over the whole file)
+        kind: One of KINDS
+        chunk_size: Rows per chunk
+        compression: TDigest compression
+
+    Returns:
+        Group key -> digest (key None without grouping)
+    """
+    _check_kind(kind)
+    by = [by] if isinstance(by, str) else by
+    digests: Dict[Hashable, TDigest] = {}
+
+    for chunk in pd.read_csv(source, chunksize=chunk_size):
+        for key, index in _chunk_groups(chunk, by).items():
+            digests.setdefault(key, TDigest(compression)).update(chunk.loc[index, score_col].to_numpy())
+
+    header = True
+    for chunk in pd.read_csv(source, chunksize=chunk_size):
+        ranks = pd.Series(np.nan, index=chunk.index)
+        for key, index in _chunk_groups(chunk, by).items():
+            ranks[index] = digests[key].percentile_ranks(chunk.loc[index, score_col].to_numpy(), kind)
+        chunk[f"{score_col}_percentile"] = ranks
+        chunk.to_csv(output, mode="w" if header else "a", header=header, index=False)
+        header = False
+
+    return digests
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Percentile ranks of a score column")
+    parser.add_argument("csv", help="Input CSV")
+    parser.add_argument("--score-col", required=True)
+    parser.add_argument("--by", nargs="+", help="Group columns (e.g. merchant_category, day)")
+    parser.add_argument("--kind", default="rank", choices=KINDS)
+    parser.add_argument("--output", help="Write rows plus the percentile column to this CSV")
+    parser.add_argument("--approximate", action="store_true",
+                        help="Stream the file in chunks through t-digests (needs --output)")
+    parser.add_argument("--chunk-size", type=int, default=1_000_000)
+    parser.add_argument("--compression", type=float, default=200)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.approximate:
+        if not args.output:
+            parser.error("--approximate writes its result and needs --output")
+        digests = stream_percentile_ranks(args.csv, args.output, args.score_col, args.by,
+                                          args.kind, args.chunk_size, args.compression)
+        print(f"Ranked {sum(d.count for d in digests.values()):,} scores in {len(digests)} group(s) "
+              f"in {time.perf_counter() - started:.2f}s -> {args.output}")
+        return
+
+    df = pd.read_csv(args.csv)
+    df[f"{args.score_col}_percentile"] = percentile_rank_column(df, args.score_col, args.by, args.kind)
+    print(f"Ranked {len(df):,} scores in {time.perf_counter() - started:.2f}s")
+    if args.output:
+        df.to_csv(args.output, index=False)
+    else:
+        print(df.head(20).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()